@@ -24,6 +24,17 @@ from .file_utils import (
     atomic_write_json,
     atomic_read_json,
 )
+from .tracing import (
+    span,
+    traced,
+    trace_count,
+    trace_set,
+)
+from .aho_corasick import (
+    AhoCorasick,
+    KeywordMatcher,
+    keyword_matcher,
+)
 from .task_manager import (
     VALID_TRANSITIONS,
     get_project_root,
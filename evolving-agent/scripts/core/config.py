@@ -30,9 +30,124 @@ MIN_RELEVANCE_THRESHOLD = 0.25
 FUZZY_MATCH_EFF_SCALE = 0.35     # effectiveness weight multiplier for fuzzy-only matches
 FUZZY_MATCH_REC_SCALE = 0.50     # recency weight multiplier for fuzzy-only matches
 
+# BM25F field weighting (embedding.py)
+# Each field gets its own weight and length normalization (b) so a hit in the
+# entry name outranks the same hit buried in a long solution text.
+BM25F_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "triggers": 2.0,
+    "description": 1.0,
+    "solution": 0.7,
+    "symptoms": 0.7,
+    "root_causes": 0.5,
+    "pitfalls": 0.5,
+}
+BM25F_FIELD_B = {
+    "name": 0.5,
+    "triggers": 0.3,
+    "description": 0.75,
+    "solution": 0.75,
+    "symptoms": 0.75,
+    "root_causes": 0.75,
+    "pitfalls": 0.75,
+}
+
+# CJK tokenization for BM25 when jieba is not installed:
+#   "char"           — one token per character (legacy; huge, unselective postings)
+#   "bigram"         — overlapping bigrams with CJK stopword removal (default)
+#   "bigram+unigram" — bigrams plus single characters (more recall, larger index)
+BM25_CJK_MODE = "bigram"
+
+# Parallel BM25 index build (embedding.py)
+# Above BM25_PARALLEL_MIN_DOCS entries, file loading + tokenization runs in a
+# process pool over file chunks. BM25_PARALLEL_WORKERS = 0 → min(cpu_count, 8).
+BM25_PARALLEL_BUILD = True
+BM25_PARALLEL_MIN_DOCS = 2000
+BM25_PARALLEL_WORKERS = 0
+
+# Candidate over-fetch factor for trigger_knowledge global KB search
+# (was a hardcoded limit * 2; BM25F first-stage ranking is precise enough for less)
+TRIGGER_CANDIDATE_FACTOR = 1.5
+
+# Chinese tokenization (query.tokenize): jieba is imported on the first text
+# that contains CJK characters. The initialized prefix dictionary (including the
+# tech lexicon and a jieba-format <kb>/JIEBA_USER_DICT, if present) is cached
+# in the KB root as JIEBA_CACHE_FILE.
+JIEBA_CACHE_FILE = ".jieba_dict.cache"
+JIEBA_USER_DICT = "user_dict.txt"
+
+# Bounded LRU memos in query.py (hit rates reported by `knowledge query --stats`)
+TOKENIZE_CACHE_SIZE = 8192       # tokenize() results, keyed by (text, tokenizer mode)
+TOKENIZE_CACHE_MAX_CHARS = 1000  # longer texts (entry bodies) are not memoized
+SYNONYM_CACHE_SIZE = 1024        # expand_with_synonyms() results
+
+# Synonym dictionary (query.expand_with_synonyms): the built-in SYNONYM_MAP is
+# extended by <kb>/SYNONYMS_FILE and compiled into an id-based graph, recompiled
+# when the file's mtime changes. With SYNONYM_CLOSURE_DEPTH > 1, synonyms of
+# synonyms are added at compile time, at most SYNONYM_CLOSURE_MAX_NEIGHBORS per
+# term (direct synonyms are always kept). The file may override both.
+SYNONYMS_FILE = "synonyms.json"
+SYNONYM_CLOSURE_DEPTH = 1
+SYNONYM_CLOSURE_MAX_NEIGHBORS = 8
+
+# Rendered-context cache (trigger.format_for_context): each entry's markdown
+# block is cached by (entry id, updated_at, char budget), RENDER_CACHE_SIZE
+# blocks in memory (LRU). With RENDER_CACHE_PERSIST the blocks are also kept in
+# <knowledge base>/RENDER_CACHE_FILE, so separate CLI runs share them.
+RENDER_CACHE_SIZE = 512
+RENDER_CACHE_FILE = ".render_cache.json"
+RENDER_CACHE_PERSIST = False
+
+# Session-scoped delta triggering (knowledge/session.py, `trigger --session ID`):
+# <knowledge base>/SESSION_DIR/<id>.json remembers which entries (and which
+# updated_at) a session was already given, plus up to SESSION_MAX_CANDIDATE_SETS
+# cached search results. Session files idle for SESSION_TTL_HOURS are removed.
+SESSION_DIR = ".sessions"
+SESSION_TTL_HOURS = 24
+SESSION_MAX_CANDIDATE_SETS = 16
+
+# Tracing (core/tracing.py): EVOLVING_TRACE=1 appends span JSON lines to
+# <knowledge base>/TRACE_FILE_NAME; any other non-empty value is used as the path
+TRACE_ENV_VAR = "EVOLVING_TRACE"
+TRACE_FILE_NAME = ".trace.jsonl"
+
+# Hashed-vector dense retrieval (dense.py, query_semantic(method="dense"); needs NumPy)
+# Word tokens + character n-grams are feature-hashed into DENSE_HASH_DIM signed
+# buckets (TF-IDF), randomly projected to DENSE_DIM and searched through an IVF
+# index once the KB has DENSE_IVF_MIN_DOCS entries (brute force below that).
+DENSE_HASH_DIM = 1 << 16
+DENSE_DIM = 256
+DENSE_CHAR_NGRAM = 3
+DENSE_PROJECTION_NNZ = 4         # output dims each hashed bucket contributes to
+DENSE_IVF_MIN_DOCS = 1000
+DENSE_IVF_NPROBE = 8             # inverted lists scanned per query
+
+# Knowledge daemon (knowledge/daemon.py, `run.py knowledge serve`)
+# Socket lives in the KB directory; KNOWLEDGE_DAEMON_SOCKET overrides it and
+# KNOWLEDGE_DAEMON=0 makes run.py skip the daemon entirely.
+DAEMON_SOCKET_NAME = ".knowledge.sock"
+DAEMON_CONNECT_TIMEOUT = 0.2     # seconds; a dead daemon must not slow the CLI down
+DAEMON_REQUEST_TIMEOUT = 30.0    # seconds per request once connected
+DAEMON_IDLE_TIMEOUT = 3600       # exit after this many idle seconds (0 = never)
+# Client cwd + these variables travel with each trigger/run request and are
+# applied for that request only, so a daemon serves clients of any project / KB
+DAEMON_CLIENT_ENV = ("KNOWLEDGE_BASE_PATH", "SKILLS_BASE_DIR", "SKILLS_PLATFORM", "EVOLVING_TRACE")
+
 # Summarizer
 MIN_INPUT_LENGTH = 10            # Minimum text length for single-sentence validation
 
+# Streaming summarizer (summarizer.summarize_stream, `summarizer.py --stream/--file`)
+# The log is read in windows of whole lines of about STREAM_WINDOW_BYTES; the last
+# STREAM_OVERLAP_LINES lines of each window are carried into the next one so
+# multi-line patterns still match. With a session id the position reached is
+# saved in <knowledge base>/SUMMARIZER_CHECKPOINT_DIR/<id>.json (byte offset plus
+# a hash of the last STREAM_CHECKPOINT_HASH_BYTES read), so a rerun on the same,
+# appended log only processes the new tail.
+STREAM_WINDOW_BYTES = 256 * 1024
+STREAM_OVERLAP_LINES = 12
+STREAM_CHECKPOINT_HASH_BYTES = 64 * 1024
+SUMMARIZER_CHECKPOINT_DIR = ".summarizer_checkpoints"
+
 # Knowledge category to directory mapping (single source of truth)
 CATEGORY_DIRS = {
     'experience': 'experiences',
@@ -44,3 +159,11 @@ CATEGORY_DIRS = {
     'skill': 'skills',
 }
 VALID_CATEGORIES = list(CATEGORY_DIRS.keys())
+
+# Secondary indexes in the global index.json: scenario entries keyed by the
+# scenario they cover, problem entries by problem type (trigger.SCENARIO_KEYWORDS /
+# PROBLEM_SYMPTOMS detected in their triggers and tags at store time)
+LABEL_INDEXES = {
+    'scenario': 'scenario_index',
+    'problem': 'problem_index',
+}
@@ -13,6 +13,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .file_utils import atomic_read_json, atomic_write_json
+from .tracing import trace_set, traced
 
 
 # Valid state transitions (current_state -> [allowed_next_states])
@@ -160,6 +161,7 @@ def _validate_reviewer_notes(notes: Optional[str], task_id: str) -> None:
         )
 
 
+@traced("task.transition")
 def transition(
     project_root: Path,
     task_id: str,
@@ -193,6 +195,8 @@ def transition(
     
     # Get current status
     current_status = task.get("status", "pending")
+    trace_set("from", current_status)
+    trace_set("to", to_status)
     
     # Idempotent: same-state transition is a no-op
     if current_status == to_status:
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Tracing - Lightweight spans for finding hot paths in production runs.
+
+Enabled by the EVOLVING_TRACE environment variable:
+    EVOLVING_TRACE=1                 → append to <knowledge base>/.trace.jsonl
+    EVOLVING_TRACE=/path/trace.jsonl → append to that file
+Unset / empty / 0 disables tracing; spans then cost one environment lookup.
+
+Each finished span is written as one JSON line:
+    {"ts": ..., "name": "knowledge.trigger", "ms": 12.3, "pid": 123,
+     "parent": "run.knowledge.trigger", "ok": true,
+     "attrs": {"mode": "hybrid"}, "counters": {"results": 4}}
+
+Usage:
+    from core.tracing import span, traced, trace_count
+
+    @traced("task.transition")
+    def transition(...): ...
+
+    with span("lifecycle.gc", dry_run=True):
+        trace_count("deleted", len(deleted))
+
+Aggregate p50/p95/p99 per operation across runs:
+    python run.py trace report [--file PATH] [--json]
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from .config import TRACE_ENV_VAR, TRACE_FILE_NAME
+except ImportError:
+    TRACE_ENV_VAR = "EVOLVING_TRACE"
+    TRACE_FILE_NAME = ".trace.jsonl"
+
+
+class Span:
+    """A running span: attributes and counters are written out when it ends."""
+
+    __slots__ = ("name", "attrs", "counters", "parent", "_started")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.counters: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    def count(self, key: str, n: float = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+
+class _NullSpan:
+    """Returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def count(self, key: str, n: float = 1) -> None:
+        pass
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("evolving_trace_span", default=None)
+
+
+def trace_path() -> Optional[Path]:
+    """Trace file from EVOLVING_TRACE, or None when tracing is disabled."""
+    value = os.environ.get(TRACE_ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on"):
+        from .path_resolver import get_knowledge_base_dir
+        return get_knowledge_base_dir() / TRACE_FILE_NAME
+    return Path(value).expanduser()
+
+
+def is_enabled() -> bool:
+    return trace_path() is not None
+
+
+def _emit(path: Path, record: Dict[str, Any]) -> None:
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write() per line on an O_APPEND file: concurrent processes don't interleave
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError:
+        pass  # tracing must never break the traced command
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Any]:
+    """
+    Time a block as span `name`; yields a Span (count / set) or a no-op stand-in.
+
+    Errors propagate unchanged; the span is recorded with ok=false and the
+    exception type.
+    """
+    path = trace_path()
+    if path is None:
+        yield _NULL_SPAN
+        return
+
+    parent = _current.get()
+    current = Span(name, parent, attrs)
+    token = _current.set(current)
+    error: Optional[str] = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        record: Dict[str, Any] = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "name": name,
+            "ms": round((time.perf_counter() - current._started) * 1000, 3),
+            "pid": os.getpid(),
+            "parent": parent.name if parent is not None else None,
+            "ok": error is None,
+        }
+        if error is not None:
+            record["error"] = error
+        if current.attrs:
+            record["attrs"] = current.attrs
+        if current.counters:
+            record["counters"] = current.counters
+        _emit(path, record)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator: run the function inside span(name or module.qualname)."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_count(key: str, n: float = 1) -> None:
+    """Add to a counter of the innermost active span (no-op when none)."""
+    current = _current.get()
+    if current is not None:
+        current.count(key, n)
+
+
+def trace_set(key: str, value: Any) -> None:
+    """Set an attribute of the innermost active span (no-op when none)."""
+    current = _current.get()
+    if current is not None:
+        current.set(key, value)
+
+
+# =============================================================================
+# Aggregation
+# =============================================================================
+
+def load_spans(path: Path) -> List[Dict[str, Any]]:
+    """Read span records; malformed lines are skipped."""
+    records: List[Dict[str, Any]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "name" in record and "ms" in record:
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an ascending list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def aggregate(records: Iterable[Dict[str, Any]], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Per-operation latency summary.
+
+    Returns:
+        {name: {"count", "errors", "p50", "p95", "p99", "mean", "max", "counters"}}
+        with times in ms and counters summed over all spans of that name.
+    """
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    counters: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        name = record["name"]
+        if prefix and not name.startswith(prefix):
+            continue
+        durations.setdefault(name, []).append(float(record["ms"]))
+        if not record.get("ok", True):
+            errors[name] = errors.get(name, 0) + 1
+        totals = counters.setdefault(name, {})
+        for key, n in (record.get("counters") or {}).items():
+            if isinstance(n, (int, float)):
+                totals[key] = totals.get(key, 0) + n
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(durations):
+        values = sorted(durations[name])
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "mean": round(sum(values) / len(values), 3),
+            "max": round(values[-1], 3),
+            "counters": counters[name],
+        }
+    return summary
+
+
+def format_report(summary: Dict[str, Dict[str, Any]]) -> str:
+    if not summary:
+        return "No spans recorded."
+    width = max(len("operation"), *(len(name) for name in summary))
+    lines = [f"{'operation':<{width}} {'count':>6} {'err':>4} {'p50 ms':>9} "
+             f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for name, s in summary.items():
+        lines.append(f"{name:<{width}} {s['count']:>6} {s['errors']:>4} {s['p50']:>9.2f} "
+                     f"{s['p95']:>9.2f} {s['p99']:>9.2f} {s['max']:>9.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aggregate EVOLVING_TRACE span logs")
+    parser.add_argument("action", nargs="?", choices=["report", "clear"], default="report")
+    parser.add_argument("--file", help=f"Trace file (default: ${TRACE_ENV_VAR} or "
+                                       f"<knowledge base>/{TRACE_FILE_NAME})")
+    parser.add_argument("--name", default="", help="Only operations starting with this prefix")
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        path = Path(args.file).expanduser()
+    else:
+        path = trace_path()
+        if path is None:
+            from .path_resolver import get_knowledge_base_dir
+            path = get_knowledge_base_dir() / TRACE_FILE_NAME
+
+    if args.action == "clear":
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        print(f"Cleared {path}")
+        return 0
+
+    summary = aggregate(load_spans(path), prefix=args.name)
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
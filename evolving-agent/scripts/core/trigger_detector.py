@@ -5,6 +5,16 @@ Evolution Trigger Detector
 Determines when to trigger skill evolution based on session context.
 """
 
+try:
+    from .aho_corasick import keyword_matcher
+except ImportError:  # run as a script
+    from aho_corasick import keyword_matcher
+
+
+ATTEMPT_KEYWORDS = ['attempt', 'try', '尝试', 'fail', '错误', 'error']
+SUCCESS_KEYWORDS = ['success', '成功', '完成', 'done', 'work', 'working']
+FEEDBACK_KEYWORDS = ['记住', '以后', '保存', '重要', 'remember', 'save', 'important']
+
 
 def extract_session_summary(context: str) -> dict:
     """
@@ -22,30 +32,34 @@ def extract_session_summary(context: str) -> dict:
         'feedback': None
     }
 
+    # These dictionaries are small: one C-level str.count / str.find per
+    # keyword beats an automaton pass over a long transcript
     context_lower = context.lower()
 
-    # Count attempts (look for "attempt", "try", "失败", "错误")
-    attempt_keywords = ['attempt', 'try', '尝试', 'fail', '错误', 'error']
-    attempts = sum(context_lower.count(keyword) for keyword in attempt_keywords)
+    # Count attempts (look for "attempt", "try", "尝试", "fail", "错误", "error")
+    attempts = sum(context_lower.count(keyword) for keyword in ATTEMPT_KEYWORDS)
     if attempts > 0:
         summary['attempts'] = attempts + 1  # +1 for initial attempt
 
-    # Detect success (look for "成功", "完成", "done", "success", "完成")
-    success_keywords = ['success', '成功', '完成', 'done', 'work', 'working']
-    if any(keyword in context_lower for keyword in success_keywords):
+    # Detect success (look for "成功", "完成", "done", "success", ...)
+    if any(keyword in context_lower for keyword in SUCCESS_KEYWORDS):
         summary['success'] = True
 
-    # Extract user feedback (look for user statements with keywords)
-    feedback_keywords = ['记住', '以后', '保存', '重要', 'remember', 'save', 'important']
-    for line in context.split('\n'):
-        line_lower = line.lower()
-        if any(keyword in line_lower for keyword in feedback_keywords):
-            # Remove "用户:" prefix if present
-            feedback = line.strip()
-            if feedback.startswith('用户:') or feedback.startswith('user:'):
-                feedback = feedback.split(':', 1)[1].strip()
-            summary['feedback'] = feedback
-            break
+    # Feedback: the first line containing a feedback keyword. Lowercasing
+    # may change character offsets; then the line is located by number.
+    positions = [pos for pos in map(context_lower.find, FEEDBACK_KEYWORDS) if pos >= 0]
+    if positions:
+        pos = min(positions)
+        if len(context_lower) == len(context):
+            end = context.find('\n', pos)
+            line = context[context.rfind('\n', 0, pos) + 1:end if end >= 0 else None]
+        else:
+            line = context.split('\n')[context_lower.count('\n', 0, pos)]
+        # Remove "用户:" prefix if present
+        feedback = line.strip()
+        if feedback.startswith('用户:') or feedback.startswith('user:'):
+            feedback = feedback.split(':', 1)[1].strip()
+        summary['feedback'] = feedback
 
     return summary
 
@@ -69,7 +83,7 @@ def should_trigger_evolution(session_summary: dict) -> bool:
 
     # Condition 2: User explicit feedback
     feedback = session_summary.get('feedback', '')
-    if feedback and any(keyword in feedback.lower() for keyword in ['记住', '以后', '保存', '重要', 'remember', 'save', 'important']):
+    if feedback and keyword_matcher(FEEDBACK_KEYWORDS).first_position(feedback) is not None:
         return True
 
     # Condition 3: Successful completion with specific indicators
@@ -19,6 +19,15 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+_scripts_root = Path(__file__).parent.parent
+if str(_scripts_root) not in sys.path:
+    sys.path.insert(0, str(_scripts_root))
+
+try:
+    from core.aho_corasick import keyword_matcher
+except ImportError:
+    keyword_matcher = None
+
 
 def main():
     import argparse
@@ -234,84 +243,84 @@ def extract_best_practices(readme: str) -> list:
     return practices
 
 
+# Tech keyword → display name, scanned by detect_tech_stack in one pass
+TECH_FRAMEWORKS = {
+    # JavaScript/TypeScript
+    'react': 'React', 'vue': 'Vue', 'angular': 'Angular', 'svelte': 'Svelte',
+    'next.js': 'Next', 'nuxt.js': 'Nuxt', 'express': 'Express', 'fastify': 'Fastify',
+    'nest.js': 'NestJS', 'remix': 'Remix', 'astro': 'Astro',
+    # Python
+    'django': 'Django', 'flask': 'Flask', 'fastapi': 'FastAPI',
+    # Go
+    'gin': 'Gin', 'fiber': 'Fiber', 'echo': 'Echo', 'chi': 'Chi',
+    # Java
+    'spring boot': 'Spring Boot', 'spring': 'Spring', 'quarkus': 'Quarkus',
+    'micronaut': 'Micronaut',
+    # Ruby
+    'rails': 'Rails', 'sinatra': 'Sinatra',
+    # PHP
+    'laravel': 'Laravel', 'symfony': 'Symfony',
+    # Rust
+    'actix': 'Actix', 'axum': 'Axum', 'rocket': 'Rocket',
+}
+
+TECH_TOOLS = {
+    # Languages
+    'typescript': 'TypeScript', 'javascript': 'JavaScript', 'python': 'Python',
+    'golang': 'Go', 'go ': 'Go', 'rust': 'Rust', 'java': 'Java', 'kotlin': 'Kotlin',
+    # Package managers
+    'npm': 'npm', 'yarn': 'Yarn', 'pnpm': 'pnpm', 'pip': 'pip', 'poetry': 'Poetry',
+    'maven': 'Maven', 'gradle': 'Gradle', 'cargo': 'Cargo',
+    # DevOps
+    'docker': 'Docker', 'kubernetes': 'Kubernetes', 'jenkins': 'Jenkins',
+    'github actions': 'GitHub Actions', 'gitlab ci': 'GitLab CI',
+    # Build tools
+    'webpack': 'Webpack', 'vite': 'Vite', 'parcel': 'Parcel', 'esbuild': 'esbuild',
+    # Testing
+    'jest': 'Jest', 'vitest': 'Vitest', 'playwright': 'Playwright', 'cypress': 'Cypress',
+    'pytest': 'pytest', 'junit': 'JUnit', 'testify': 'testify',
+    # Databases
+    'mongodb': 'MongoDB', 'postgresql': 'PostgreSQL', 'mysql': 'MySQL',
+    'redis': 'Redis', 'sqlite': 'SQLite', 'elasticsearch': 'Elasticsearch',
+}
+
+TECH_LIBRARIES = {
+    # JavaScript
+    'react query': 'React Query', 'zustand': 'Zustand', 'redux': 'Redux',
+    'axios': 'Axios', 'zod': 'Zod', 'yup': 'Yup',
+    'tailwind': 'Tailwind', 'material-ui': 'Material UI', 'ant design': 'Ant Design',
+    'prisma': 'Prisma', 'sequelize': 'Sequelize', 'typeorm': 'TypeORM',
+    # Go
+    'gorm': 'GORM', 'sqlx': 'sqlx', 'viper': 'Viper', 'cobra': 'Cobra',
+    # Java
+    'mybatis': 'MyBatis', 'hibernate': 'Hibernate', 'lombok': 'Lombok',
+    # Python
+    'sqlalchemy': 'SQLAlchemy', 'celery': 'Celery', 'pydantic': 'Pydantic',
+}
+
+_TECH_STACK_KEYWORDS = (
+    [(kw, ('frameworks', name)) for kw, name in TECH_FRAMEWORKS.items()]
+    + [(kw, ('tools', name)) for kw, name in TECH_TOOLS.items()]
+    + [(kw, ('libraries', name)) for kw, name in TECH_LIBRARIES.items()]
+)
+
+
 def detect_tech_stack(readme: str) -> dict:
     """Detect technology stack from README content."""
-    readme_lower = readme.lower()
-
     tech_stack = {
         'frameworks': [],
         'tools': [],
         'libraries': []
     }
 
-    # Frameworks (extended)
-    frameworks = {
-        # JavaScript/TypeScript
-        'react': 'React', 'vue': 'Vue', 'angular': 'Angular', 'svelte': 'Svelte',
-        'next.js': 'Next', 'nuxt.js': 'Nuxt', 'express': 'Express', 'fastify': 'Fastify',
-        'nest.js': 'NestJS', 'remix': 'Remix', 'astro': 'Astro',
-        # Python
-        'django': 'Django', 'flask': 'Flask', 'fastapi': 'FastAPI',
-        # Go
-        'gin': 'Gin', 'fiber': 'Fiber', 'echo': 'Echo', 'chi': 'Chi',
-        # Java
-        'spring boot': 'Spring Boot', 'spring': 'Spring', 'quarkus': 'Quarkus',
-        'micronaut': 'Micronaut',
-        # Ruby
-        'rails': 'Rails', 'sinatra': 'Sinatra',
-        # PHP
-        'laravel': 'Laravel', 'symfony': 'Symfony',
-        # Rust
-        'actix': 'Actix', 'axum': 'Axum', 'rocket': 'Rocket',
-    }
-    
-    for keyword, name in frameworks.items():
-        if keyword in readme_lower and name not in tech_stack['frameworks']:
-            tech_stack['frameworks'].append(name)
-
-    # Tools (extended)
-    tools = {
-        # Languages
-        'typescript': 'TypeScript', 'javascript': 'JavaScript', 'python': 'Python',
-        'golang': 'Go', 'go ': 'Go', 'rust': 'Rust', 'java': 'Java', 'kotlin': 'Kotlin',
-        # Package managers
-        'npm': 'npm', 'yarn': 'Yarn', 'pnpm': 'pnpm', 'pip': 'pip', 'poetry': 'Poetry',
-        'maven': 'Maven', 'gradle': 'Gradle', 'cargo': 'Cargo',
-        # DevOps
-        'docker': 'Docker', 'kubernetes': 'Kubernetes', 'jenkins': 'Jenkins',
-        'github actions': 'GitHub Actions', 'gitlab ci': 'GitLab CI',
-        # Build tools
-        'webpack': 'Webpack', 'vite': 'Vite', 'parcel': 'Parcel', 'esbuild': 'esbuild',
-        # Testing
-        'jest': 'Jest', 'vitest': 'Vitest', 'playwright': 'Playwright', 'cypress': 'Cypress',
-        'pytest': 'pytest', 'junit': 'JUnit', 'testify': 'testify',
-        # Databases
-        'mongodb': 'MongoDB', 'postgresql': 'PostgreSQL', 'mysql': 'MySQL',
-        'redis': 'Redis', 'sqlite': 'SQLite', 'elasticsearch': 'Elasticsearch',
-    }
-    
-    for keyword, name in tools.items():
-        if keyword in readme_lower and name not in tech_stack['tools']:
-            tech_stack['tools'].append(name)
-
-    # Libraries (extended)
-    libraries = {
-        # JavaScript
-        'react query': 'React Query', 'zustand': 'Zustand', 'redux': 'Redux',
-        'axios': 'Axios', 'zod': 'Zod', 'yup': 'Yup',
-        'tailwind': 'Tailwind', 'material-ui': 'Material UI', 'ant design': 'Ant Design',
-        'prisma': 'Prisma', 'sequelize': 'Sequelize', 'typeorm': 'TypeORM',
-        # Go
-        'gorm': 'GORM', 'sqlx': 'sqlx', 'viper': 'Viper', 'cobra': 'Cobra',
-        # Java
-        'mybatis': 'MyBatis', 'hibernate': 'Hibernate', 'lombok': 'Lombok',
-        # Python
-        'sqlalchemy': 'SQLAlchemy', 'celery': 'Celery', 'pydantic': 'Pydantic',
-    }
-    
-    for keyword, name in libraries.items():
-        if keyword in readme_lower and name not in tech_stack['libraries']:
-            tech_stack['libraries'].append(name)
+    # One Aho-Corasick pass over the README; names keep dictionary order
+    if keyword_matcher is not None:
+        labels = keyword_matcher(_TECH_STACK_KEYWORDS).labels(readme)
+    else:
+        readme_lower = readme.lower()
+        labels = dict.fromkeys(label for kw, label in _TECH_STACK_KEYWORDS if kw in readme_lower)
+    for group, name in labels:
+        tech_stack[group].append(name)
 
     return tech_stack
 
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Knowledge Query Daemon
+
+可选的常驻进程：保持索引、缓存和分词器常热（index.json、BM25/dense 缓存、
+jieba 词典），通过 Unix domain socket 为 trigger / query / store 请求服务，
+省去每次 CLI 调用的 Python 启动与模块导入开销。
+
+协议：按行分隔的 JSON，每行一个请求、一行一个响应，同一连接可发送多个请求：
+
+    → {"op": "ping"}
+    ← {"ok": true, "pid": 1234, "uptime": 12.3, "requests": 5}
+    → {"op": "trigger", "args": {"user_input": "...", "project_dir": "/abs/path",
+                                 "limit": 5, "mode": "hybrid", "format": "json"}}
+    ← {"ok": true, "output": "..."}
+    → {"op": "run", "script": "query", "argv": ["--trigger", "react"], "stdin": ""}
+    ← {"ok": true, "code": 0, "stdout": "...", "stderr": ""}
+    → {"op": "shutdown"}
+    ← {"ok": true}
+
+出错时返回 {"ok": false, "error": "..."}。
+
+request() 为 trigger / run 请求附上客户端上下文
+{"client": {"cwd": "/abs/path", "env": {"KNOWLEDGE_BASE_PATH": ..., ...}}}
+（变量见 DAEMON_CLIENT_ENV）；daemon 仅在该请求期间切换到这个 cwd 与环境变量，
+另一个项目或另一个知识库的客户端不会读写 daemon 自己的知识库。
+
+"run" 在 daemon 进程内执行 query.py / store.py / trigger.py 的 main()，输出与子进程一致。
+每个请求前比对知识库文件统计（数量 + 最新 mtime），有变化则丢弃该库的
+内存索引，其他进程写入的新条目不会被旧缓存遮住。
+
+用法:
+    python run.py knowledge serve                # 前台运行
+    python run.py knowledge serve --stop         # 停止
+客户端 (run.py) 调用 request()；没有 daemon 在监听时返回 None，调用方回退到
+进程内 / 子进程执行。
+"""
+
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_KNOWLEDGE_DIR = Path(__file__).parent
+_SCRIPTS_DIR = _KNOWLEDGE_DIR.parent
+for _path in (str(_SCRIPTS_DIR), str(_KNOWLEDGE_DIR)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+try:
+    from core.config import (
+        DAEMON_SOCKET_NAME,
+        DAEMON_CONNECT_TIMEOUT,
+        DAEMON_REQUEST_TIMEOUT,
+        DAEMON_IDLE_TIMEOUT,
+        DAEMON_CLIENT_ENV,
+    )
+except ImportError:
+    DAEMON_SOCKET_NAME = ".knowledge.sock"
+    DAEMON_CONNECT_TIMEOUT = 0.2
+    DAEMON_REQUEST_TIMEOUT = 30.0
+    DAEMON_IDLE_TIMEOUT = 3600
+    DAEMON_CLIENT_ENV = ("KNOWLEDGE_BASE_PATH", "SKILLS_BASE_DIR", "SKILLS_PLATFORM", "EVOLVING_TRACE")
+
+try:
+    from core.path_resolver import get_knowledge_base_dir as get_kb_root
+except ImportError:
+    def get_kb_root() -> Path:
+        """Fallback: Get knowledge base root directory."""
+        env_path = os.environ.get('KNOWLEDGE_BASE_PATH')
+        if env_path:
+            return Path(env_path)
+        return Path.home() / '.config' / 'opencode' / 'knowledge'
+
+
+# Scripts whose main() may be run in the daemon via the "run" op
+RUNNABLE_SCRIPTS = ('query', 'store', 'trigger')
+
+# Ops that run with the client's cwd and environment
+CLIENT_CONTEXT_OPS = ('trigger', 'run')
+
+# sun_path is 108 bytes on Linux, 104 on macOS
+_MAX_SOCKET_PATH = 100
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+def socket_path() -> Path:
+    """Daemon socket path: $KNOWLEDGE_DAEMON_SOCKET or <kb_root>/.knowledge.sock."""
+    env_path = os.environ.get('KNOWLEDGE_DAEMON_SOCKET')
+    if env_path:
+        return Path(env_path)
+    path = get_kb_root() / DAEMON_SOCKET_NAME
+    if len(str(path)) > _MAX_SOCKET_PATH:
+        digest = hashlib.sha1(str(path).encode('utf-8')).hexdigest()[:12]
+        path = Path(tempfile.gettempdir()) / f"evolving-knowledge-{os.getuid()}-{digest}.sock"
+    return path
+
+
+def client_context() -> Dict[str, Any]:
+    """This process's cwd and DAEMON_CLIENT_ENV variables (None = unset)."""
+    return {
+        'cwd': os.getcwd(),
+        'env': {name: os.environ.get(name) for name in DAEMON_CLIENT_ENV},
+    }
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':'),
+                      default=str).encode('utf-8') + b'\n'
+
+
+def _read_line(sock: socket.socket) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks)
+
+
+def request(
+    payload: Dict[str, Any],
+    path: Optional[Path] = None,
+    timeout: float = DAEMON_REQUEST_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """
+    Send one request to the daemon.
+
+    Returns:
+        The response dict; None when no daemon is reachable (socket missing,
+        stale, or KNOWLEDGE_DAEMON=0) so the caller can fall back. Failures
+        after the request was sent return {"ok": False, "error": ...} instead:
+        the daemon may already have acted on it (e.g. a store).
+    """
+    if os.environ.get('KNOWLEDGE_DAEMON', '1') == '0':
+        return None
+    if payload.get('op') in CLIENT_CONTEXT_OPS and 'client' not in payload:
+        payload = {**payload, 'client': client_context()}
+    return _send(payload, path, timeout)
+
+
+def _send(
+    payload: Dict[str, Any], path: Optional[Path], timeout: float
+) -> Optional[Dict[str, Any]]:
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    path = path or socket_path()
+    if not path.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return None
+        try:
+            sock.settimeout(timeout)
+            sock.sendall(_encode(payload))
+            line = _read_line(sock)
+        except OSError as e:
+            return {'ok': False, 'error': f"daemon request failed: {e}"}
+    finally:
+        sock.close()
+
+    if not line:
+        return {'ok': False, 'error': 'daemon closed the connection'}
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {'ok': False, 'error': 'invalid daemon response'}
+
+
+def is_running(path: Optional[Path] = None) -> bool:
+    """True if a daemon answers ping on the socket."""
+    response = _send({'op': 'ping'}, path, DAEMON_CONNECT_TIMEOUT * 5)
+    return bool(response and response.get('ok'))
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+class KnowledgeDaemon:
+    """Request dispatcher holding the warm module state (one request at a time)."""
+
+    def __init__(self, kb_root: Optional[Path] = None):
+        self.kb_root = Path(kb_root) if kb_root else get_kb_root()
+        self.started_at = time.time()
+        self.last_activity = time.monotonic()
+        self.requests = 0
+        self.shutdown_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._file_stats: Dict[str, Any] = {}
+
+    def warm(self) -> None:
+        """Import the knowledge modules, load the tokenizer and build the global index."""
+        query = importlib.import_module('query')
+        embedding = importlib.import_module('embedding')
+        importlib.import_module('trigger')
+        query.tokenize('预热 warm up')
+        self._refresh([self.kb_root])
+        embedding.build_index(self.kb_root)
+
+    def _refresh(self, kb_roots: List[Path]) -> None:
+        """Drop in-memory indexes of KB roots whose files changed since last seen."""
+        embedding = importlib.import_module('embedding')
+        for kb_root in kb_roots:
+            key = str(kb_root)
+            stats = embedding._get_file_stats(kb_root)
+            previous = self._file_stats.get(key)
+            if previous is not None and previous != stats:
+                embedding.invalidate_cache(kb_root)
+                dense = sys.modules.get('dense')
+                if dense is not None:
+                    dense.invalidate_cache(kb_root)
+            self._file_stats[key] = stats
+
+    def dispatch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        op = payload.get('op')
+        with self._lock:
+            self.requests += 1
+            self.last_activity = time.monotonic()
+            try:
+                if op == 'ping':
+                    return {
+                        'ok': True,
+                        'pid': os.getpid(),
+                        'uptime': round(time.time() - self.started_at, 1),
+                        'requests': self.requests,
+                        'kb_root': str(self.kb_root),
+                    }
+                if op == 'trigger':
+                    with _client_context(payload.get('client')):
+                        return self._trigger(payload.get('args') or {})
+                if op == 'run':
+                    with _client_context(payload.get('client')):
+                        return self._run(payload)
+                if op == 'shutdown':
+                    self.shutdown_requested.set()
+                    return {'ok': True}
+                return {'ok': False, 'error': f"unknown op: {op}"}
+            except Exception as e:
+                return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            finally:
+                self.last_activity = time.monotonic()
+
+    def _trigger(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        trigger = importlib.import_module('trigger')
+        roots = [get_kb_root()]
+        project_dir = args.get('project_dir')
+        if project_dir:
+            roots.append(Path(project_dir) / '.opencode' / 'knowledge')
+        self._refresh(roots)
+
+        kwargs = dict(
+            user_input=args.get('user_input'),
+            project_dir=project_dir,
+            explicit_triggers=args.get('explicit_triggers'),
+            limit=args.get('limit', 5),
+            mode=args.get('mode', 'hybrid'),
+            session_id=args.get('session_id'),
+            deadline_ms=args.get('deadline_ms'),
+        )
+        if args.get('explain'):
+            return {'ok': True, 'output': trigger.format_result(trigger.explain_trigger(**kwargs), 'json')}
+        result = trigger.trigger_knowledge(**kwargs)
+        return {'ok': True, 'output': trigger.format_result(result, args.get('format', 'json'))}
+
+    def _run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        script = payload.get('script')
+        if script not in RUNNABLE_SCRIPTS:
+            return {'ok': False, 'error': f"script not runnable in daemon: {script}"}
+        module = importlib.import_module(script)
+        self._refresh([get_kb_root()] + [Path(key) for key in self._file_stats])
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_argv, saved_stdin = sys.argv, sys.stdin
+        sys.argv = [f"{script}.py"] + [str(a) for a in payload.get('argv') or []]
+        sys.stdin = io.StringIO(payload.get('stdin') or '')
+        code = 0
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    module.main()
+                except SystemExit as e:
+                    if isinstance(e.code, int):
+                        code = e.code
+                    elif e.code is not None:
+                        print(e.code, file=sys.stderr)
+                        code = 1
+        finally:
+            sys.argv, sys.stdin = saved_argv, saved_stdin
+        return {'ok': True, 'code': code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+
+@contextlib.contextmanager
+def _client_context(client: Optional[Dict[str, Any]]):
+    """
+    Run a request in the client's cwd and DAEMON_CLIENT_ENV variables.
+
+    Requests hold the dispatch lock, so swapping process-wide state is safe;
+    it is restored afterwards. Without a client context (older clients) the
+    daemon's own cwd and environment are used.
+    """
+    if not client:
+        yield
+        return
+    env = client.get('env') or {}
+    saved_cwd = os.getcwd()
+    saved_env = {name: os.environ.get(name) for name in DAEMON_CLIENT_ENV}
+    try:
+        if client.get('cwd'):
+            os.chdir(client['cwd'])
+        for name in DAEMON_CLIENT_ENV:
+            _set_env(name, env.get(name))
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for name, value in saved_env.items():
+            _set_env(name, value)
+
+
+def _set_env(name: str, value: Optional[str]) -> None:
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = str(value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        state: KnowledgeDaemon = self.server.state  # type: ignore[attr-defined]
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                response = {'ok': False, 'error': 'invalid JSON'}
+            else:
+                response = state.dispatch(payload if isinstance(payload, dict) else {})
+            self.wfile.write(_encode(response))
+            self.wfile.flush()
+            if state.shutdown_requested.is_set():
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    path: Optional[Path] = None,
+    idle_timeout: float = DAEMON_IDLE_TIMEOUT,
+    kb_root: Optional[Path] = None,
+    warm: bool = True,
+    ready: Optional[threading.Event] = None,
+) -> int:
+    """
+    Run the daemon in the foreground until shutdown, SIGTERM/SIGINT or idle timeout.
+
+    Args:
+        path: Socket path (default socket_path())
+        idle_timeout: Seconds without requests before exiting (0 = never)
+        kb_root: Global knowledge base root (default get_kb_root())
+        warm: Preload modules and the global BM25 index before listening
+        ready: Optional event set once the socket accepts connections
+
+    Returns:
+        Exit code (1 if another daemon already serves the socket)
+    """
+    path = Path(path) if path else socket_path()
+    if is_running(path):
+        print(f"Knowledge daemon already running on {path}", file=sys.stderr)
+        return 1
+    if path.exists():
+        path.unlink()  # stale socket from a daemon that did not shut down cleanly
+
+    state = KnowledgeDaemon(kb_root)
+    if warm:
+        state.warm()
+
+    server = _Server(str(path), _Handler)
+    server.state = state  # type: ignore[attr-defined]
+    os.chmod(path, 0o600)
+
+    def _stop(*_: Any) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+    if idle_timeout and idle_timeout > 0:
+        def _watch_idle() -> None:
+            while not state.shutdown_requested.wait(min(idle_timeout, 5.0)):
+                if time.monotonic() - state.last_activity > idle_timeout:
+                    server.shutdown()
+                    return
+        threading.Thread(target=_watch_idle, daemon=True).start()
+
+    print(f"Knowledge daemon listening on {path} (pid {os.getpid()})", file=sys.stderr)
+    if ready is not None:
+        ready.set()
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        state.shutdown_requested.set()
+        server.server_close()
+        with contextlib.suppress(OSError):
+            path.unlink()
+    return 0
+
+
+def stop(path: Optional[Path] = None) -> bool:
+    """Ask a running daemon to exit. Returns True if one was running."""
+    response = _send({'op': 'shutdown'}, path, DAEMON_REQUEST_TIMEOUT)
+    return bool(response and response.get('ok'))
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Hashed-vector Dense Retrieval.
+
+Dependency-light dense retriever for the knowledge base (the role the old
+sentence-transformers embeddings played before embedding.py became BM25):
+
+1. Features — BM25 word tokens plus character n-grams, feature-hashed into
+   DENSE_HASH_DIM signed buckets and weighted TF-IDF (sublinear tf).
+2. Reduction — very sparse random projection to DENSE_DIM dimensions: each
+   bucket adds ±weight to DENSE_PROJECTION_NNZ output dims drawn from a
+   seeded RNG. Rows are L2-normalized, so dot product = cosine.
+3. Storage — <kb_root>/.dense_index/: vectors.f32 (float32 matrix opened
+   with numpy.memmap), idf/centroids/inverted lists as .npy, doc ids and
+   file stats in meta.json.
+4. ANN — IVF: a spherical k-means coarse quantizer with ~sqrt(N) lists;
+   a query scans the DENSE_IVF_NPROBE closest lists and ranks those
+   candidates exactly. Below DENSE_IVF_MIN_DOCS entries it is brute force.
+
+Requires NumPy (HAS_NUMPY); query_semantic falls back to BM25 without it.
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+from embedding import (
+    _bm25_tokenize, _get_file_stats, _list_entry_files, _load_entry_file,
+)
+
+try:
+    from core.config import (
+        DENSE_HASH_DIM,
+        DENSE_DIM,
+        DENSE_CHAR_NGRAM,
+        DENSE_PROJECTION_NNZ,
+        DENSE_IVF_MIN_DOCS,
+        DENSE_IVF_NPROBE,
+    )
+except ImportError:
+    DENSE_HASH_DIM = 1 << 16
+    DENSE_DIM = 256
+    DENSE_CHAR_NGRAM = 3
+    DENSE_PROJECTION_NNZ = 4
+    DENSE_IVF_MIN_DOCS = 1000
+    DENSE_IVF_NPROBE = 8
+
+
+INDEX_DIR = ".dense_index"
+INDEX_VERSION = 1
+_SEED = 42
+_KMEANS_ITERS = 10
+_KMEANS_SAMPLE_PER_LIST = 64   # k-means trains on at most nlist * this many rows
+_CHUNK_ROWS = 4096             # rows per block when projecting / assigning
+
+_NON_WORD_RE = re.compile(r"[^0-9a-z\u4e00-\u9fff]+")
+
+
+# ---------------------------------------------------------------------------
+# Feature hashing
+# ---------------------------------------------------------------------------
+
+def _features(text: str) -> Dict[str, int]:
+    """Word tokens ("w:") and per-word character n-grams ("c:") with counts."""
+    counts: Dict[str, int] = {}
+    for token in _bm25_tokenize(text):
+        key = "w:" + token.lower()
+        counts[key] = counts.get(key, 0) + 1
+
+    n = DENSE_CHAR_NGRAM
+    for word in _NON_WORD_RE.sub(" ", text.lower()).split():
+        padded = f" {word} "
+        for i in range(len(padded) - n + 1):
+            key = "c:" + padded[i:i + n]
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _hashed_tf(text: str) -> Dict[int, float]:
+    """Signed feature hashing with sublinear tf: {bucket: weight}."""
+    buckets: Dict[int, float] = {}
+    for key, count in _features(text).items():
+        h = zlib.crc32(key.encode("utf-8"))
+        bucket = h % DENSE_HASH_DIM
+        weight = 1.0 + math.log(count)
+        if h & 0x80000000:
+            weight = -weight
+        buckets[bucket] = buckets.get(bucket, 0.0) + weight
+    return buckets
+
+
+_projection_cache: Dict[Tuple[int, int, int, int], Tuple[Any, Any]] = {}
+
+
+def _projection() -> Tuple[Any, Any]:
+    """Sparse random projection: (out dims, signs), each DENSE_HASH_DIM x NNZ."""
+    key = (DENSE_HASH_DIM, DENSE_DIM, DENSE_PROJECTION_NNZ, _SEED)
+    if key not in _projection_cache:
+        rng = np.random.default_rng(_SEED)
+        dims = rng.integers(0, DENSE_DIM, size=(DENSE_HASH_DIM, DENSE_PROJECTION_NNZ))
+        signs = rng.choice(np.array([-1.0, 1.0], dtype=np.float32),
+                           size=(DENSE_HASH_DIM, DENSE_PROJECTION_NNZ))
+        _projection_cache[key] = (dims.astype(np.int64), signs)
+    return _projection_cache[key]
+
+
+def _project(rows: Any, cols: Any, vals: Any, row_count: int) -> Any:
+    """Project sparse (row, bucket, value) triples to L2-normalized float32 rows."""
+    dims, signs = _projection()
+    flat = (rows[:, None] * DENSE_DIM + dims[cols]).ravel()
+    weights = (vals[:, None] * signs[cols]).ravel()
+    out = np.bincount(flat, weights=weights, minlength=row_count * DENSE_DIM)
+    out = out.reshape(row_count, DENSE_DIM).astype(np.float32)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out /= norms
+    return out
+
+
+def _vectorize(texts: List[str]) -> Tuple[Any, Any]:
+    """TF-IDF hash + project a corpus. Returns (vectors N x DENSE_DIM, idf)."""
+    doc_count = len(texts)
+    sparse: List[Tuple[Any, Any]] = []
+    df = np.zeros(DENSE_HASH_DIM, dtype=np.int64)
+    for text in texts:
+        tf = _hashed_tf(text)
+        cols = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+        vals = np.fromiter(tf.values(), dtype=np.float32, count=len(tf))
+        df[cols] += 1
+        sparse.append((cols, vals))
+
+    # Smoothed idf: log((1 + N) / (1 + df)) + 1
+    idf = (np.log((1.0 + doc_count) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    vectors = np.empty((doc_count, DENSE_DIM), dtype=np.float32)
+    for start in range(0, doc_count, _CHUNK_ROWS):
+        block = sparse[start:start + _CHUNK_ROWS]
+        rows = np.concatenate([np.full(len(c), i, dtype=np.int64)
+                               for i, (c, _) in enumerate(block)])
+        cols = np.concatenate([c for c, _ in block])
+        vals = np.concatenate([v for _, v in block]) * idf[cols]
+        vectors[start:start + len(block)] = _project(rows, cols, vals, len(block))
+    return vectors, idf
+
+
+# ---------------------------------------------------------------------------
+# IVF (inverted file) coarse quantizer
+# ---------------------------------------------------------------------------
+
+def _nearest_centroid(vectors: Any, centroids: Any) -> Any:
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + _CHUNK_ROWS])
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def _train_ivf(vectors: Any, nlist: int) -> Tuple[Any, Any, Any]:
+    """
+    Spherical k-means over the (unit) vectors.
+
+    Returns:
+        (centroids nlist x DENSE_DIM, list_order, list_offsets): rows of
+        list l are list_order[list_offsets[l]:list_offsets[l + 1]]
+    """
+    rng = np.random.default_rng(_SEED)
+    doc_count = len(vectors)
+    sample_size = min(doc_count, nlist * _KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(doc_count, sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(_KMEANS_ITERS):
+        assign = _nearest_centroid(sample, centroids)
+        order = np.argsort(assign, kind="stable")
+        sorted_assign = assign[order]
+        starts = np.flatnonzero(np.r_[True, sorted_assign[1:] != sorted_assign[:-1]])
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids[sorted_assign[starts]] = sums / norms  # empty lists keep their centroid
+
+    assign = _nearest_centroid(vectors, centroids)
+    list_order = np.argsort(assign, kind="stable").astype(np.int32)
+    list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=nlist), out=list_offsets[1:])
+    return centroids, list_order, list_offsets
+
+
+def _top_k(scores: Any, top_k: int) -> Any:
+    """Indices of the top_k scores, best first."""
+    if len(scores) > top_k:
+        part = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class DenseIndex:
+    """
+    Hashed TF-IDF vectors with an optional IVF index.
+
+    ``vectors`` is a float32 (N, DENSE_DIM) array — an np.memmap when
+    loaded from disk. ``centroids`` is None for brute-force indexes.
+    """
+
+    __slots__ = ("doc_ids", "vectors", "idf", "centroids", "list_order", "list_offsets")
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        vectors: Any,
+        idf: Any,
+        centroids: Any = None,
+        list_order: Any = None,
+        list_offsets: Any = None,
+    ):
+        self.doc_ids = doc_ids
+        self.vectors = vectors
+        self.idf = idf
+        self.centroids = centroids
+        self.list_order = list_order
+        self.list_offsets = list_offsets
+
+    @classmethod
+    def build(cls, texts: List[str], doc_ids: List[str]) -> "DenseIndex":
+        """Vectorize texts and train IVF lists when the corpus is large enough."""
+        vectors, idf = _vectorize(texts)
+        if len(texts) >= DENSE_IVF_MIN_DOCS:
+            nlist = max(1, int(round(math.sqrt(len(texts)))))
+            return cls(doc_ids, vectors, idf, *_train_ivf(vectors, nlist))
+        return cls(doc_ids, vectors, idf)
+
+    def encode(self, text: str) -> Any:
+        """Query vector (unit length, zeros if no feature is known)."""
+        tf = _hashed_tf(text)
+        cols = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+        vals = np.fromiter(tf.values(), dtype=np.float32, count=len(tf)) * self.idf[cols]
+        return _project(np.zeros(len(cols), dtype=np.int64), cols, vals, 1)[0]
+
+    def candidates(self, query_vec: Any, nprobe: int = DENSE_IVF_NPROBE) -> Optional[Any]:
+        """Row indices in the nprobe closest IVF lists (None = scan everything)."""
+        if self.centroids is None or nprobe >= len(self.centroids):
+            return None
+        probe = _top_k(self.centroids @ query_vec, nprobe)
+        offsets = self.list_offsets
+        return np.concatenate([self.list_order[offsets[l]:offsets[l + 1]] for l in probe])
+
+    def search_vector(
+        self, query_vec: Any, top_k: int = 10, exact: bool = False
+    ) -> List[Tuple[str, float]]:
+        """
+        Nearest documents by cosine similarity.
+
+        Args:
+            query_vec: Unit query vector from encode()
+            top_k: Number of results
+            exact: Scan every row instead of probing IVF lists
+
+        Returns:
+            List of (doc_id, cosine) with cosine > 0, best first
+        """
+        rows = None if exact else self.candidates(query_vec)
+        if rows is None:
+            scores = np.asarray(self.vectors) @ query_vec
+            best = _top_k(scores, top_k)
+            hits = [(self.doc_ids[i], float(scores[i])) for i in best]
+        else:
+            rows = np.sort(rows)  # sequential reads from the memmap
+            scores = np.asarray(self.vectors[rows]) @ query_vec
+            best = _top_k(scores, top_k)
+            hits = [(self.doc_ids[rows[i]], float(scores[i])) for i in best]
+        return [(doc_id, score) for doc_id, score in hits if score > 0]
+
+    def search(self, query: str, top_k: int = 10, exact: bool = False) -> List[Tuple[str, float]]:
+        """Encode query text and search (see search_vector)."""
+        return self.search_vector(self.encode(query), top_k=top_k, exact=exact)
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, index_dir: Path, meta: Dict[str, Any]) -> None:
+        """Write arrays then meta.json (written last; it marks the index valid)."""
+        index_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(index_dir / "vectors.f32", lambda f: np.ascontiguousarray(
+            self.vectors, dtype=np.float32).tofile(f))
+        _atomic_write(index_dir / "idf.npy", lambda f: np.save(f, self.idf))
+        if self.centroids is not None:
+            _atomic_write(index_dir / "centroids.npy", lambda f: np.save(f, self.centroids))
+            _atomic_write(index_dir / "list_order.npy", lambda f: np.save(f, self.list_order))
+            _atomic_write(index_dir / "list_offsets.npy", lambda f: np.save(f, self.list_offsets))
+        meta = dict(meta, doc_ids=self.doc_ids, ivf=self.centroids is not None)
+        _atomic_write(index_dir / "meta.json", lambda f: f.write(
+            json.dumps(meta, ensure_ascii=False).encode("utf-8")))
+
+    @classmethod
+    def load(cls, index_dir: Path, meta: Dict[str, Any]) -> "DenseIndex":
+        """Open a saved index; vectors are memory-mapped read-only."""
+        doc_ids = meta["doc_ids"]
+        vectors = np.memmap(index_dir / "vectors.f32", dtype=np.float32, mode="r",
+                            shape=(len(doc_ids), DENSE_DIM))
+        idf = np.load(index_dir / "idf.npy")
+        if meta.get("ivf"):
+            return cls(doc_ids, vectors, idf,
+                       np.load(index_dir / "centroids.npy"),
+                       np.load(index_dir / "list_order.npy"),
+                       np.load(index_dir / "list_offsets.npy"))
+        return cls(doc_ids, vectors, idf)
+
+
+def _atomic_write(path: Path, write) -> None:
+    """tempfile + rename, like embedding._save_cache."""
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.tmp.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Per-KB index cache
+# ---------------------------------------------------------------------------
+
+# Module-level cache (avoids reloading per query within same process)
+_cached_index: Dict[str, DenseIndex] = {}
+
+
+def _index_params() -> Dict[str, Any]:
+    """Parameters baked into saved vectors; a mismatch forces a rebuild."""
+    return {
+        "version": INDEX_VERSION,
+        "hash_dim": DENSE_HASH_DIM,
+        "dim": DENSE_DIM,
+        "char_ngram": DENSE_CHAR_NGRAM,
+        "nnz": DENSE_PROJECTION_NNZ,
+        "seed": _SEED,
+    }
+
+
+def _load_meta(index_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+
+
+def _get_or_build_index(kb_root: Path) -> Optional[DenseIndex]:
+    """
+    Get cached index, load it from disk, or build and persist a new one.
+
+    The on-disk index is valid while the entry file count / newest mtime and
+    the vectorizer parameters match meta.json (same check as the BM25 cache).
+    """
+    cache_key = str(kb_root)
+    if cache_key in _cached_index:
+        return _cached_index[cache_key]
+
+    index_dir = kb_root / INDEX_DIR
+    file_count, newest_mtime = _get_file_stats(kb_root)
+    params = _index_params()
+
+    meta = _load_meta(index_dir)
+    if (
+        meta
+        and all(meta.get(k) == v for k, v in params.items())
+        and meta.get("file_count") == file_count
+        and abs(meta.get("newest_mtime", 0.0) - newest_mtime) < 0.001
+        and meta.get("doc_ids")
+    ):
+        try:
+            index = DenseIndex.load(index_dir, meta)
+            _cached_index[cache_key] = index
+            return index
+        except (OSError, ValueError):
+            pass  # damaged files: rebuild below
+
+    texts: List[str] = []
+    doc_ids: List[str] = []
+    for entry_file in _list_entry_files(kb_root):
+        item = _load_entry_file(entry_file)
+        if item is not None:
+            _, entry_id, text, _ = item
+            doc_ids.append(entry_id)
+            texts.append(text)
+    if not texts:
+        return None
+
+    index = DenseIndex.build(texts, doc_ids)
+    try:
+        index.save(index_dir, dict(params, file_count=file_count, newest_mtime=newest_mtime))
+    except OSError:
+        pass
+    _cached_index[cache_key] = index
+    return index
+
+
+def invalidate_cache(kb_root: Path = None) -> None:
+    """
+    Invalidate dense index cache.
+
+    Args:
+        kb_root: Specific root to invalidate, or None to clear all
+    """
+    if kb_root is None:
+        _cached_index.clear()
+    else:
+        _cached_index.pop(str(kb_root), None)
+
+
+def search(query: str, kb_root: Path, top_k: int = 10) -> List[Tuple[str, float]]:
+    """
+    Dense search over one knowledge base (same contract as embedding.search).
+
+    Returns:
+        List of (entry_id, score), best first, normalized to 0-1 by the top hit
+    """
+    index = _get_or_build_index(kb_root)
+    if index is None:
+        return []
+    hits = index.search(query, top_k=top_k)
+    if not hits:
+        return []
+    max_score = hits[0][1]
+    return [(doc_id, score / max_score) for doc_id, score in hits]
+
+
+def federated_search(
+    query: str,
+    kb_roots: List[Path],
+    top_k: int = 10,
+) -> List[Tuple[Path, str, float]]:
+    """
+    Dense search over several knowledge bases in one ranked pass.
+
+    Cosine similarities are comparable across roots as long as each root's
+    vectors share the vectorizer parameters, so hits are merged directly.
+
+    Returns:
+        List of (kb_root, entry_id, score), best first, normalized to 0-1
+    """
+    hits: List[Tuple[Path, str, float]] = []
+    for kb_root in kb_roots:
+        index = _get_or_build_index(Path(kb_root))
+        if index is None:
+            continue
+        for doc_id, score in index.search(query, top_k=top_k):
+            hits.append((Path(kb_root), doc_id, score))
+    if not hits:
+        return []
+    hits.sort(key=lambda hit: hit[2], reverse=True)
+    hits = hits[:top_k]
+    max_score = hits[0][2]
+    return [(kb_root, doc_id, score / max_score) for kb_root, doc_id, score in hits]
@@ -2,7 +2,8 @@
 """
 Lightweight Semantic Search via BM25.
 
-Provides BM25-based search for the knowledge base.
+Provides BM25-based search for the knowledge base, with BM25F field
+weighting over name, triggers, description and richer content fields.
 Zero external dependencies — uses only Python stdlib + optional jieba.
 """
 
@@ -10,15 +11,22 @@ import json
 import math
 import os
 import re
+import sys
 import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # 复用 query.py 已有的分词器和同义词扩展
 try:
-    from query import tokenize as _base_tokenize, expand_with_synonyms
+    from query import tokenize as _base_tokenize, expand_with_synonyms, HAS_JIEBA, profile_count
 except ImportError:
+    HAS_JIEBA = False
+
+    def profile_count(key: str, n: int = 1) -> None:
+        pass
 
     def _base_tokenize(text: str) -> List[str]:
         return re.findall(r"[\u4e00-\u9fff]+|[a-zA-Z0-9]+", text.lower())
@@ -27,39 +35,126 @@ except ImportError:
         return tokens
 
 
+try:
+    from core.config import (
+        CATEGORY_DIRS,
+        BM25F_FIELD_WEIGHTS,
+        BM25F_FIELD_B,
+        BM25_CJK_MODE,
+        BM25_PARALLEL_BUILD,
+        BM25_PARALLEL_MIN_DOCS,
+        BM25_PARALLEL_WORKERS,
+    )
+except ImportError:
+    CATEGORY_DIRS = {
+        "experience": "experiences",
+        "tech-stack": "tech-stacks",
+        "scenario": "scenarios",
+        "problem": "problems",
+        "testing": "testing",
+        "pattern": "patterns",
+        "skill": "skills",
+    }
+    BM25F_FIELD_WEIGHTS = {
+        "name": 3.0,
+        "triggers": 2.0,
+        "description": 1.0,
+        "solution": 0.7,
+        "symptoms": 0.7,
+        "root_causes": 0.5,
+        "pitfalls": 0.5,
+    }
+    BM25F_FIELD_B = {
+        "name": 0.5,
+        "triggers": 0.3,
+        "description": 0.75,
+        "solution": 0.75,
+        "symptoms": 0.75,
+        "root_causes": 0.75,
+        "pitfalls": 0.75,
+    }
+    BM25_CJK_MODE = "bigram"
+    BM25_PARALLEL_BUILD = True
+    BM25_PARALLEL_MIN_DOCS = 2000
+    BM25_PARALLEL_WORKERS = 0
+
+# CJK 停用字：高频虚词，几乎出现在所有条目中。它们也是常用词的一部分
+# （目的 / 存在 / 行为 / 关于），所以不作为分隔符，只丢弃单独成词的停用字
+CJK_STOP_CHARS = frozenset("的了是在和与或及也就都而着把被这那个之其于为")
+# CJK 停用词：切分 CJK 串时作为分隔符；jieba 分词结果命中即丢弃
+CJK_STOPWORDS = {
+    "一个", "我们", "你们", "他们", "如何", "怎么", "什么", "为什么",
+    "进行", "使用", "可以", "需要", "应该", "通过", "没有", "已经",
+    "时候", "这样", "那样", "还是", "但是", "因为", "所以", "如果",
+    "帮我", "请帮", "一下",
+}
+
+_CJK_RUN_RE = re.compile(r"^[\u4e00-\u9fff]+$")
+# Multi-character stopwords act as cut points (longest alternatives first)
+_CJK_STOP_SPLIT_RE = re.compile(
+    "(?:" + "|".join(sorted(CJK_STOPWORDS, key=len, reverse=True)) + ")+"
+)
+
+
+def _split_cjk_run(run: str, mode: Optional[str] = None) -> List[str]:
+    """
+    Split a run of CJK characters into BM25 tokens (no-jieba path).
+
+    Modes (BM25_CJK_MODE):
+      - "char":           one token per character (legacy behaviour)
+      - "bigram":         overlapping bigrams, "跨域请求" → 跨域/域请/请求
+      - "bigram+unigram": bigrams plus single characters (higher recall)
+
+    In the bigram modes the run is first cut at CJK_STOPWORDS, so no
+    postings (and no junk bigrams spanning them, such as 何修) are created
+    for filler like 如何/可以. Stop characters (的/在/为...) are not cut
+    points, since they are part of real words (目的, 存在, 行为); they are
+    only dropped as standalone unigrams. Other one-character segments are
+    kept as unigrams so single-character queries (e.g. "慢") still match.
+    """
+    mode = mode or BM25_CJK_MODE
+    if mode == "char":
+        return list(run)
+
+    result: List[str] = []
+    for segment in _CJK_STOP_SPLIT_RE.split(run):
+        if not segment:
+            continue
+        if len(segment) == 1:
+            if segment not in CJK_STOP_CHARS:
+                result.append(segment)
+            continue
+        result.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        if mode == "bigram+unigram":
+            result.extend(ch for ch in segment if ch not in CJK_STOP_CHARS)
+    return result
+
+
 def _bm25_tokenize(text: str) -> List[str]:
     """
     BM25-optimized tokenizer.
 
     When jieba is unavailable, _base_tokenize groups consecutive CJK chars
     into one long token (e.g. "修复跨域请求问题" → ["修复跨域请求问题"]).
-    BM25 needs finer granularity, so we split those runs into individual
-    characters, enabling character-level matching.
-    With jieba, tokens are already properly segmented — no extra splitting.
+    BM25 needs finer granularity, so those runs are split according to
+    BM25_CJK_MODE (overlapping bigrams by default, see _split_cjk_run).
+    With jieba, tokens are already properly segmented — no extra splitting,
+    only CJK stopword removal.
     """
     tokens = _base_tokenize(text)
     result: List[str] = []
     for token in tokens:
-        if len(token) > 1 and all("\u4e00" <= c <= "\u9fff" for c in token):
-            result.extend(list(token))
+        if _CJK_RUN_RE.match(token):
+            if HAS_JIEBA:
+                if token not in CJK_STOPWORDS and token not in CJK_STOP_CHARS:
+                    result.append(token)
+            else:
+                result.extend(_split_cjk_run(token))
         else:
             result.append(token)
     return result
 
 
-try:
-    from core.config import CATEGORY_DIRS
-except ImportError:
-    CATEGORY_DIRS = {
-        "experience": "experiences",
-        "tech-stack": "tech-stacks",
-        "scenario": "scenarios",
-        "problem": "problems",
-        "testing": "testing",
-        "pattern": "patterns",
-        "skill": "skills",
-    }
-
 # BM25 参数
 BM25_K1 = 1.5  # 词频饱和参数
 BM25_B = 0.75  # 文档长度归一化参数
@@ -84,92 +179,392 @@ def _entry_to_text(entry: Dict[str, Any]) -> str:
     return " ".join(parts)
 
 
+def _join_field(value: Any) -> str:
+    """Flatten a content field (str, list of str, list of dicts) into text."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        parts = []
+        for item in value:
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, dict):
+                parts.extend(str(v) for v in item.values() if isinstance(v, str))
+        return " ".join(parts)
+    return ""
+
+
+def _entry_to_fields(entry: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Split a knowledge entry into the BM25F fields listed in BM25F_FIELD_WEIGHTS.
+
+    Unlike _entry_to_text, richer content fields (solution, symptoms,
+    root_causes, pitfalls) are included. Empty fields are omitted.
+    """
+    content = entry.get("content", {})
+    if not isinstance(content, dict):
+        content = {}
+
+    raw = {
+        "name": entry.get("name", ""),
+        "triggers": _join_field(entry.get("triggers", [])),
+        "description": _join_field(content.get("description", "")),
+        # experience entries carry 'solution', problem entries carry 'solutions'
+        "solution": " ".join(
+            t for t in (_join_field(content.get("solution", "")),
+                        _join_field(content.get("solutions", []))) if t
+        ),
+        "symptoms": _join_field(content.get("symptoms", [])),
+        "root_causes": _join_field(content.get("root_causes", [])),
+        "pitfalls": _join_field(content.get("pitfalls", [])),
+    }
+    return {
+        field: text for field, text in raw.items()
+        if field in BM25F_FIELD_WEIGHTS and text and text.strip()
+    }
+
+
+# Per-document tables produced by the tokenization stage of an index build:
+# (term -> tf, token count, field -> term -> tf, field -> token count)
+DocStats = Tuple[Dict[str, int], int, Dict[str, Dict[str, int]], Dict[str, int]]
+
+
+def _term_counts(text: str) -> Tuple[Dict[str, int], int]:
+    tokens = _bm25_tokenize(text)
+    tf: Dict[str, int] = {}
+    for token in tokens:
+        t = token.lower()
+        tf[t] = tf.get(t, 0) + 1
+    return tf, len(tokens)
+
+
+def _doc_stats(text: str, fields: Optional[Dict[str, str]] = None) -> DocStats:
+    """
+    Tokenize one document into partial tf/length tables.
+
+    With fields only the fields are tokenized (BM25F scores from them alone);
+    the plain tf table stays empty and the length is the fields' token total.
+    """
+    if fields is None:
+        tf, length = _term_counts(text)
+        return tf, length, {}, {}
+    per_field: Dict[str, Dict[str, int]] = {}
+    lens: Dict[str, int] = {}
+    for field, field_text in fields.items():
+        if field in BM25F_FIELD_WEIGHTS:
+            per_field[field], lens[field] = _term_counts(field_text)
+    return {}, sum(lens.values()), per_field, lens
+
+
+def _doc_stats_chunk(chunk: List[Tuple[str, Optional[Dict[str, str]]]]) -> List[DocStats]:
+    """Build worker: tokenize a chunk of (text, fields) pairs."""
+    return [_doc_stats(text, fields) for text, fields in chunk]
+
+
+def _build_worker_count() -> int:
+    if BM25_PARALLEL_WORKERS > 0:
+        return BM25_PARALLEL_WORKERS
+    return min(os.cpu_count() or 1, 8)
+
+
+def _use_parallel_build(doc_count: int) -> bool:
+    return (
+        BM25_PARALLEL_BUILD
+        and doc_count >= BM25_PARALLEL_MIN_DOCS
+        and _build_worker_count() > 1
+    )
+
+
+def _run_in_pool(func: Callable[[List[Any]], List[Any]], items: List[Any]) -> Optional[List[Any]]:
+    """
+    Map func over contiguous chunks of items in a process pool, keeping order.
+
+    Returns the flattened results, or None if the pool cannot be used
+    (e.g. no fork/semaphore support in a sandbox) so callers fall back to
+    the serial path.
+    """
+    workers = _build_worker_count()
+    # A few chunks per worker evens out slow files without much pickling overhead
+    chunk_size = max(1, math.ceil(len(items) / (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results: List[Any] = []
+            for part in pool.map(func, chunks):
+                results.extend(part)
+            return results
+    except (OSError, RuntimeError, ImportError):
+        # BrokenProcessPool is a RuntimeError
+        return None
+
+
+def _compute_doc_stats(
+    documents: List[str], fields: Optional[List[Dict[str, str]]] = None
+) -> List[DocStats]:
+    """Tokenize all documents, in a process pool when the corpus is large."""
+    pairs = list(zip(documents, fields if fields is not None else [None] * len(documents)))
+    if _use_parallel_build(len(pairs)):
+        stats = _run_in_pool(_doc_stats_chunk, pairs)
+        if stats is not None:
+            return stats
+    return _doc_stats_chunk(pairs)
+
+
+def _to_csr(
+    term_col: array, doc_col: array, value_col: array, term_count: int
+) -> Tuple[array, array, array]:
+    """
+    Pack (term id, doc index, value) posting triples into CSR form.
+
+    Counting sort by term id; stable, so each term's postings stay in doc
+    order. Postings of term t are docs[offsets[t]:offsets[t + 1]].
+    """
+    offsets = array("I", [0]) * (term_count + 1)
+    for tid in term_col:
+        offsets[tid + 1] += 1
+    for t in range(term_count):
+        offsets[t + 1] += offsets[t]
+
+    cursor = array("I", offsets[:-1]) if term_count else array("I")
+    docs = array("I", [0]) * len(doc_col)
+    values = array(value_col.typecode, [0]) * len(value_col)
+    for tid, doc, value in zip(term_col, doc_col, value_col):
+        pos = cursor[tid]
+        docs[pos] = doc
+        values[pos] = value
+        cursor[tid] = pos + 1
+    return offsets, docs, values
+
+
+def _idf(doc_count: int, df: int) -> float:
+    # IDF with smoothing: log((N - df + 0.5) / (df + 0.5) + 1)
+    return math.log((doc_count - df + 0.5) / (df + 0.5) + 1.0) if df else 0.0
+
+
 class BM25Index:
     """
     Pure-Python BM25 index for small document collections.
 
     Designed for knowledge bases with <10,000 entries.
     Supports Chinese + English mixed tokenization via query.tokenize().
+
+    When per-document ``fields`` are supplied, a BM25F table is built instead
+    of the plain one, from a single tokenization of each field: each field's
+    term frequency is length-normalized with its own b (BM25F_FIELD_B),
+    weighted (BM25F_FIELD_WEIGHTS), and summed into one pseudo term frequency
+    per (doc, term) before BM25 saturation.
+
+    Memory layout: terms are interned to integer ids (``term_ids``) and the
+    postings of all terms live in flat CSR arrays — ``array('I')`` offsets
+    and doc indices, ``array('H')`` term frequencies (``array('f')`` pseudo
+    frequencies for BM25F), ``array('d')`` idf by term id. That is a few
+    bytes per posting instead of a dict slot plus a boxed int.
     """
 
-    def __init__(self, documents: List[str], doc_ids: List[str]):
+    __slots__ = (
+        "doc_ids", "doc_count", "avgdl", "doc_lens", "term_ids", "has_fields",
+        "idf", "post_offsets", "post_docs", "post_tfs",
+        "field_idf", "field_offsets", "field_docs", "field_tfs",
+    )
+
+    def __init__(
+        self,
+        documents: List[str],
+        doc_ids: List[str],
+        fields: Optional[List[Dict[str, str]]] = None,
+        doc_stats: Optional[List[DocStats]] = None,
+    ):
         """
         Build index from documents.
 
         Args:
             documents: List of document text strings
             doc_ids: Parallel list of document IDs
+            fields: Optional parallel list of {field_name: text} dicts (BM25F)
+            doc_stats: Optional pre-tokenized per-document tables from
+                _doc_stats (e.g. produced by build workers); skips tokenization.
+                Must have been computed with the same fields.
         """
         self.doc_ids = doc_ids
         self.doc_count = len(documents)
         self.avgdl = 0.0
-        self.doc_lens: List[int] = []
-        self.doc_freqs: List[Dict[str, int]] = []  # per-doc term frequencies
-        self.idf: Dict[str, float] = {}  # inverse document frequency
-        self._build(documents)
+        self.doc_lens = array("I")
+        self.term_ids: Dict[str, int] = {}  # term -> term id
+        self.has_fields = fields is not None and len(fields) == self.doc_count
+        # Plain BM25 postings (CSR; left empty when scoring with fields)
+        self.idf = array("d")
+        self.post_offsets = array("I")
+        self.post_docs = array("I")
+        self.post_tfs = array("H")
+        # BM25F postings (CSR)
+        self.field_idf = array("d")
+        self.field_offsets = array("I")
+        self.field_docs = array("I")
+        self.field_tfs = array("f")
+        if fields is not None and not self.has_fields:
+            doc_stats = None  # tokenized for fields that are not used
+        self._build(documents, fields if self.has_fields else None, doc_stats)
+
+    def _intern(self, term: str) -> int:
+        tid = self.term_ids.get(term)
+        if tid is None:
+            tid = self.term_ids[term] = len(self.term_ids)
+        return tid
+
+    def _build(
+        self,
+        documents: List[str],
+        fields: Optional[List[Dict[str, str]]] = None,
+        doc_stats: Optional[List[DocStats]] = None,
+    ) -> None:
+        if doc_stats is None:
+            doc_stats = _compute_doc_stats(documents, fields)
 
-    def _build(self, documents: List[str]) -> None:
-        df: Dict[str, int] = {}  # document frequency: how many docs contain term
         total_len = 0
+        # Posting triples, packed into CSR once all documents are seen
+        p_terms, p_docs, p_tfs = array("I"), array("I"), array("H")
+
+        # BM25F accumulators (only used when fields are given)
+        field_lens: List[Dict[str, int]] = []
+        field_total_len: Dict[str, int] = {}
+        field_doc_count: Dict[str, int] = {}
+
+        for i, (tf, doc_len, per_field, lens) in enumerate(doc_stats):
+            self.doc_lens.append(doc_len)
+            total_len += doc_len
+
+            if fields is None:
+                for term, count in tf.items():
+                    p_terms.append(self._intern(term))
+                    p_docs.append(i)
+                    p_tfs.append(min(count, 0xFFFF))
+                continue
 
-        for doc_text in documents:
-            tokens = _bm25_tokenize(doc_text)
-            self.doc_lens.append(len(tokens))
-            total_len += len(tokens)
-
-            # Term frequency for this document
-            tf: Dict[str, int] = {}
-            seen_terms: set = set()
-            for token in tokens:
-                t = token.lower()
-                tf[t] = tf.get(t, 0) + 1
-                seen_terms.add(t)
-            self.doc_freqs.append(tf)
-
-            # Update document frequency
-            for term in seen_terms:
-                df[term] = df.get(term, 0) + 1
+            for field, f_len in lens.items():
+                field_total_len[field] = field_total_len.get(field, 0) + f_len
+                field_doc_count[field] = field_doc_count.get(field, 0) + 1
+                for term in per_field[field]:
+                    self._intern(term)
+            field_lens.append(lens)
 
         self.avgdl = total_len / max(self.doc_count, 1)
+        term_count = len(self.term_ids)
 
-        # IDF with smoothing: log((N - df + 0.5) / (df + 0.5) + 1)
-        for term, freq in df.items():
-            self.idf[term] = math.log(
-                (self.doc_count - freq + 0.5) / (freq + 0.5) + 1.0
+        if fields is None:
+            self.post_offsets, self.post_docs, self.post_tfs = _to_csr(
+                p_terms, p_docs, p_tfs, term_count
             )
-
-    def score(self, query_tokens: List[str]) -> List[float]:
+            self.idf = self._idf_table(self.post_offsets)
+            return
+        del p_terms, p_docs, p_tfs
+
+        # Average length per field, over documents that have the field
+        avg_field_len = {
+            field: field_total_len[field] / max(field_doc_count[field], 1)
+            for field in field_total_len
+        }
+
+        term_ids = self.term_ids
+        f_terms, f_docs, f_vals = array("I"), array("I"), array("f")
+        for i, (_, _, per_field, _) in enumerate(doc_stats):
+            weighted: Dict[int, float] = {}
+            for field, f_tf in per_field.items():
+                avg = avg_field_len.get(field) or 1.0
+                b = BM25F_FIELD_B.get(field, BM25_B)
+                norm = 1 - b + b * field_lens[i][field] / avg
+                weight = BM25F_FIELD_WEIGHTS[field] / norm
+                for term, count in f_tf.items():
+                    tid = term_ids[term]
+                    weighted[tid] = weighted.get(tid, 0.0) + count * weight
+            for tid, value in weighted.items():
+                f_terms.append(tid)
+                f_docs.append(i)
+                f_vals.append(value)
+
+        self.field_offsets, self.field_docs, self.field_tfs = _to_csr(
+            f_terms, f_docs, f_vals, term_count
+        )
+        self.field_idf = self._idf_table(self.field_offsets)
+
+    def _idf_table(self, offsets: array) -> array:
+        n = self.doc_count
+        return array("d", (
+            _idf(n, df)
+            for df in (offsets[t + 1] - offsets[t] for t in range(len(offsets) - 1))
+        ))
+
+    def doc_freq(self, term: str) -> int:
+        """Number of documents containing term (in the table used for scoring)."""
+        tid = self.term_ids.get(term.lower())
+        if tid is None:
+            return 0
+        offsets = self.field_offsets if self.has_fields else self.post_offsets
+        return offsets[tid + 1] - offsets[tid]
+
+    def score(
+        self, query_tokens: List[str], idf: Optional[Dict[str, float]] = None
+    ) -> List[float]:
         """
         Compute BM25 scores for all documents against query tokens.
 
+        Uses BM25F scoring when the index was built with fields.
+
         Args:
             query_tokens: Tokenized and synonym-expanded query
+            idf: Optional {lowercased term: idf} overriding this index's own
+                idf (federated search scores every root with merged statistics)
 
         Returns:
             List of float scores, parallel to self.doc_ids
         """
+        if self.has_fields:
+            return self._score_fields(query_tokens, idf)
+
         scores = [0.0] * self.doc_count
+        doc_lens = self.doc_lens
+        avgdl = self.avgdl or 1.0
 
         for token in query_tokens:
-            t = token.lower()
-            if t not in self.idf:
+            tid = self.term_ids.get(token.lower())
+            if tid is None:
+                continue
+            start, end = self.post_offsets[tid], self.post_offsets[tid + 1]
+            if start == end:
                 continue
-            idf = self.idf[t]
+            term_idf = self.idf[tid] if idf is None else idf.get(token.lower(), 0.0)
 
-            for i in range(self.doc_count):
-                tf = self.doc_freqs[i].get(t, 0)
-                if tf == 0:
-                    continue
-                dl = self.doc_lens[i]
+            for i, tf in zip(self.post_docs[start:end], self.post_tfs[start:end]):
                 # BM25 formula
                 numerator = tf * (BM25_K1 + 1)
-                denominator = tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / self.avgdl)
-                scores[i] += idf * numerator / denominator
+                denominator = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[i] / avgdl)
+                scores[i] += term_idf * numerator / denominator
+
+        return scores
+
+    def _score_fields(
+        self, query_tokens: List[str], idf: Optional[Dict[str, float]] = None
+    ) -> List[float]:
+        """BM25F scoring: saturate the weighted pseudo term frequency per doc."""
+        scores = [0.0] * self.doc_count
+
+        for token in query_tokens:
+            tid = self.term_ids.get(token.lower())
+            if tid is None:
+                continue
+            start, end = self.field_offsets[tid], self.field_offsets[tid + 1]
+            if start == end:
+                continue
+            term_idf = self.field_idf[tid] if idf is None else idf.get(token.lower(), 0.0)
+            for i, tf in zip(self.field_docs[start:end], self.field_tfs[start:end]):
+                scores[i] += term_idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
 
         return scores
 
     def search(
-        self, query_tokens: List[str], top_k: int = 10
+        self,
+        query_tokens: List[str],
+        top_k: int = 10,
+        idf: Optional[Dict[str, float]] = None,
     ) -> List[Tuple[str, float]]:
         """
         Search for top-k documents matching query.
@@ -177,11 +572,12 @@ class BM25Index:
         Args:
             query_tokens: Tokenized and synonym-expanded query
             top_k: Number of results
+            idf: Optional idf override (see score())
 
         Returns:
             List of (doc_id, score) sorted by score descending
         """
-        scores = self.score(query_tokens)
+        scores = self.score(query_tokens, idf)
 
         # Argsort descending without numpy
         indexed = [(score, i) for i, score in enumerate(scores) if score > 0]
@@ -189,44 +585,119 @@ class BM25Index:
 
         return [(self.doc_ids[i], score) for score, i in indexed[:top_k]]
 
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Approximate memory held by the index tables (excluding doc_ids).
+
+        Returns:
+            {"terms", "postings", "bytes", "bytes_per_posting"}
+        """
+        postings = len(self.post_docs) + len(self.field_docs)
+        size = sys.getsizeof(self.term_ids) + sum(
+            sys.getsizeof(term) for term in self.term_ids
+        )
+        for table in (
+            self.doc_lens, self.idf, self.post_offsets, self.post_docs, self.post_tfs,
+            self.field_idf, self.field_offsets, self.field_docs, self.field_tfs,
+        ):
+            size += sys.getsizeof(table)
+        return {
+            "terms": len(self.term_ids),
+            "postings": postings,
+            "bytes": size,
+            "bytes_per_posting": round(size / postings, 1) if postings else 0.0,
+        }
+
 
 # Module-level cache (avoids rebuilding per query within same process)
 _cached_index: Dict[str, Any] = {}
 
 
-def _load_entries(kb_root: Path) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+def _list_entry_files(kb_root: Path) -> List[Path]:
+    """All entry files under kb_root, in category order."""
+    files: List[Path] = []
+    for cat_dir in CATEGORY_DIRS.values():
+        cat_path = kb_root / cat_dir
+        if not cat_path.exists():
+            continue
+        files.extend(f for f in cat_path.glob("*.json") if f.name != "index.json")
+    return files
+
+
+def _load_entry_file(entry_file: Path) -> Optional[Tuple[Dict[str, Any], str, str, Dict[str, str]]]:
+    """Load one entry file; returns (entry, entry_id, text, fields) or None to skip."""
+    try:
+        with open(entry_file, "r", encoding="utf-8") as f:
+            profile_count("files_opened")
+            profile_count("bytes_read", os.fstat(f.fileno()).st_size)
+            entry = json.load(f)
+    except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+        return None
+    if not entry:
+        return None
+
+    text = _entry_to_text(entry)
+    if not text.strip():
+        return None
+    return entry, entry.get("id", entry_file.stem), text, _entry_to_fields(entry)
+
+
+def _load_chunk(paths: List[str]) -> List[Tuple[Dict[str, Any], str, str, Dict[str, str], DocStats]]:
+    """Build worker: load and tokenize a chunk of entry files."""
+    loaded = []
+    for path in paths:
+        item = _load_entry_file(Path(path))
+        if item is not None:
+            entry, entry_id, text, fields = item
+            loaded.append((entry, entry_id, text, fields, _doc_stats(text, fields)))
+    return loaded
+
+
+def _load_entries(
+    kb_root: Path,
+) -> Tuple[
+    List[Dict[str, Any]], List[str], List[str], List[Dict[str, str]], Optional[List[DocStats]]
+]:
     """
     Load all knowledge entries from kb_root.
 
+    Above BM25_PARALLEL_MIN_DOCS files, chunks of files are loaded and
+    tokenized in a process pool; the workers' partial tf/length tables are
+    returned as doc_stats and merged by BM25Index. Otherwise doc_stats is
+    None and the index tokenizes serially.
+
     Returns:
-        (entries, entry_ids, texts)
+        (entries, entry_ids, texts, fields, doc_stats)
     """
     entries: List[Dict[str, Any]] = []
     entry_ids: List[str] = []
     texts: List[str] = []
+    fields: List[Dict[str, str]] = []
 
-    for cat_dir in CATEGORY_DIRS.values():
-        cat_path = kb_root / cat_dir
-        if not cat_path.exists():
-            continue
-        for entry_file in cat_path.glob("*.json"):
-            if entry_file.name == "index.json":
-                continue
-            try:
-                with open(entry_file, "r", encoding="utf-8") as f:
-                    entry = json.load(f)
-            except (json.JSONDecodeError, IOError, UnicodeDecodeError):
-                continue
-            if not entry:
-                continue
+    files = _list_entry_files(kb_root)
 
-            text = _entry_to_text(entry)
-            if text.strip():
+    if _use_parallel_build(len(files)):
+        loaded = _run_in_pool(_load_chunk, [str(f) for f in files])
+        if loaded is not None:
+            doc_stats: List[DocStats] = []
+            for entry, entry_id, text, entry_fields, stats in loaded:
                 entries.append(entry)
-                entry_ids.append(entry.get("id", entry_file.stem))
+                entry_ids.append(entry_id)
                 texts.append(text)
+                fields.append(entry_fields)
+                doc_stats.append(stats)
+            return entries, entry_ids, texts, fields, doc_stats
 
-    return entries, entry_ids, texts
+    for entry_file in files:
+        item = _load_entry_file(entry_file)
+        if item is not None:
+            entry, entry_id, text, entry_fields = item
+            entries.append(entry)
+            entry_ids.append(entry_id)
+            texts.append(text)
+            fields.append(entry_fields)
+
+    return entries, entry_ids, texts, fields, None
 
 
 def _cleanup_old_cache(kb_root: Path) -> None:
@@ -281,6 +752,8 @@ def _load_cache(kb_root: Path) -> Dict[str, Any]:
 
     try:
         with open(cache_file, "r", encoding="utf-8") as f:
+            profile_count("files_opened")
+            profile_count("bytes_read", os.fstat(f.fileno()).st_size)
             cache = json.load(f)
 
         if cache.get("version") != 2:
@@ -328,6 +801,7 @@ def _get_or_build_index(kb_root: Path) -> Tuple[Any, List[str], List[Dict[str, A
     cache_key = str(kb_root)
 
     if cache_key in _cached_index:
+        profile_count("cache.bm25_index.memory")
         cached = _cached_index[cache_key]
         return cached["index"], cached["entry_ids"], cached["entries"]
 
@@ -351,10 +825,13 @@ def _get_or_build_index(kb_root: Path) -> Tuple[Any, List[str], List[Dict[str, A
     if cache_valid:
         doc_ids = disk_cache.get("doc_ids", [])
         doc_texts = disk_cache.get("doc_texts", [])
+        doc_fields = disk_cache.get("doc_fields")
 
-        if doc_ids and doc_texts:
+        # Caches written before BM25F carry no doc_fields: fall through and rebuild
+        if doc_ids and doc_texts and doc_fields is not None:
             # Build BM25 index from cached texts (skip full file I/O)
-            index = BM25Index(doc_texts, doc_ids)
+            profile_count("cache.bm25_index.disk")
+            index = BM25Index(doc_texts, doc_ids, doc_fields)
 
             _cached_index[cache_key] = {
                 "index": index,
@@ -364,11 +841,12 @@ def _get_or_build_index(kb_root: Path) -> Tuple[Any, List[str], List[Dict[str, A
             }
             return index, doc_ids, []
 
-    entries, entry_ids, texts = _load_entries(kb_root)
+    profile_count("cache.bm25_index.rebuilt")
+    entries, entry_ids, texts, fields, doc_stats = _load_entries(kb_root)
     if not texts:
         return None, [], []
 
-    index = BM25Index(texts, entry_ids)
+    index = BM25Index(texts, entry_ids, fields, doc_stats)
 
     cache_data = {
         "version": 2,
@@ -376,6 +854,7 @@ def _get_or_build_index(kb_root: Path) -> Tuple[Any, List[str], List[Dict[str, A
         "newest_mtime": current_newest_mtime,
         "doc_ids": entry_ids,
         "doc_texts": texts,
+        "doc_fields": fields,
         "built_at": datetime.now().isoformat(),
     }
     _save_cache(kb_root, cache_data)
@@ -421,11 +900,11 @@ def rebuild_cache(kb_root: Path) -> None:
         except OSError:
             pass
 
-    entries, entry_ids, texts = _load_entries(kb_root)
+    entries, entry_ids, texts, fields, doc_stats = _load_entries(kb_root)
     if not texts:
         return
 
-    index = BM25Index(texts, entry_ids)
+    index = BM25Index(texts, entry_ids, fields, doc_stats)
 
     current_file_count, current_newest_mtime = _get_file_stats(kb_root)
 
@@ -435,6 +914,7 @@ def rebuild_cache(kb_root: Path) -> None:
         "newest_mtime": current_newest_mtime,
         "doc_ids": entry_ids,
         "doc_texts": texts,
+        "doc_fields": fields,
         "built_at": datetime.now().isoformat(),
     }
     _save_cache(kb_root, cache_data)
@@ -461,6 +941,17 @@ def build_index(kb_root: Path) -> Tuple[Any, List[str], List[Dict[str, Any]]]:
     return _get_or_build_index(kb_root)
 
 
+def _query_tokens(query: str) -> List[str]:
+    """Tokenize and synonym-expand a query the same way documents are indexed."""
+    query_tokens = _bm25_tokenize(query)
+    expanded_tokens = expand_with_synonyms(query_tokens, max_expansions=3)
+    # Synonyms are whole words (e.g. "大列表"); split them like the index does
+    extra = expanded_tokens[len(query_tokens):]
+    if extra:
+        expanded_tokens = query_tokens + _bm25_tokenize(" ".join(extra))
+    return expanded_tokens
+
+
 def search(
     query: str,
     kb_root: Path,
@@ -484,10 +975,7 @@ def search(
     if index is None:
         return []
 
-    query_tokens = _bm25_tokenize(query)
-    expanded_tokens = expand_with_synonyms(query_tokens, max_expansions=3)
-
-    raw_results = index.search(expanded_tokens, top_k=top_k)
+    raw_results = index.search(_query_tokens(query), top_k=top_k)
     if not raw_results:
         return []
 
@@ -496,3 +984,76 @@ def search(
     if max_score > 0:
         return [(doc_id, score / max_score) for doc_id, score in raw_results]
     return raw_results
+
+
+def merged_idf(indexes: List[BM25Index], query_tokens: List[str]) -> Dict[str, float]:
+    """
+    IDF for query terms over the union of several indexes.
+
+    Document counts and per-term document frequencies are summed across the
+    indexes, so a term common in one KB but rare overall is weighted the
+    same wherever it matches.
+
+    Args:
+        indexes: BM25 indexes (one per KB root)
+        query_tokens: Query tokens to compute idf for
+
+    Returns:
+        {lowercased term: idf}
+    """
+    total_docs = sum(index.doc_count for index in indexes)
+    result: Dict[str, float] = {}
+    for token in query_tokens:
+        term = token.lower()
+        if term not in result:
+            df = sum(index.doc_freq(term) for index in indexes)
+            result[term] = _idf(total_docs, df)
+    return result
+
+
+def federated_search(
+    query: str,
+    kb_roots: List[Path],
+    top_k: int = 10,
+) -> List[Tuple[Path, str, float]]:
+    """
+    BM25 search over several knowledge bases in one ranked pass.
+
+    Each root keeps its own persisted index (.bm25_cache.json); only the
+    corpus statistics are shared: every root is scored with an idf merged
+    from all roots (see merged_idf), so scores are directly comparable.
+    Length normalization still uses each root's own average lengths.
+
+    Args:
+        query: Search query text
+        kb_roots: Knowledge base roots (e.g. project-local KB, global KB)
+        top_k: Number of top results across all roots
+
+    Returns:
+        List of (kb_root, entry_id, score) sorted by score descending.
+        Scores are normalized to 0-1 against the best hit across all roots.
+    """
+    indexes: List[Tuple[Path, BM25Index]] = []
+    for kb_root in kb_roots:
+        index, _, _ = _get_or_build_index(Path(kb_root))
+        if index is not None:
+            indexes.append((Path(kb_root), index))
+    if not indexes:
+        return []
+
+    query_tokens = _query_tokens(query)
+    idf = merged_idf([index for _, index in indexes], query_tokens)
+
+    hits: List[Tuple[Path, str, float]] = []
+    for kb_root, index in indexes:
+        for doc_id, score in index.search(query_tokens, top_k=top_k, idf=idf):
+            hits.append((kb_root, doc_id, score))
+    if not hits:
+        return []
+
+    hits.sort(key=lambda hit: hit[2], reverse=True)
+    hits = hits[:top_k]
+    max_score = hits[0][2]
+    if max_score > 0:
+        return [(kb_root, doc_id, score / max_score) for kb_root, doc_id, score in hits]
+    return hits
@@ -19,6 +19,7 @@ try:
     from core.config import DECAY_DAYS_THRESHOLD, DECAY_RATE, GC_EFFECTIVENESS_THRESHOLD, CATEGORY_DIRS
     from core.path_resolver import get_knowledge_base_dir as get_kb_root
     from core.file_utils import atomic_write_json
+    from core.tracing import trace_count, traced
 except ImportError:
     DECAY_DAYS_THRESHOLD = 90
     DECAY_RATE = 0.1
@@ -48,6 +49,13 @@ except ImportError:
         opencode_kb.mkdir(parents=True, exist_ok=True)
         return opencode_kb
 
+    def traced(name=None):
+        """Fallback: tracing unavailable"""
+        return lambda fn: fn
+
+    def trace_count(key, n=1):
+        pass
+
 
 def load_json(path: Path) -> Dict[str, Any]:
     """Safely load JSON file."""
@@ -60,6 +68,7 @@ def load_json(path: Path) -> Dict[str, Any]:
         return {}
 
 
+@traced("lifecycle.decay")
 def decay_unused(days_threshold: int = DECAY_DAYS_THRESHOLD, decay_rate: float = DECAY_RATE) -> List[Dict[str, Any]]:
     """
     衰减长期未使用的知识条目。
@@ -89,6 +98,7 @@ def decay_unused(days_threshold: int = DECAY_DAYS_THRESHOLD, decay_rate: float =
             entry = load_json(entry_file)
             if not entry:
                 continue
+            trace_count('entries_scanned')
             
             # Check last_used_at
             last_used_str = entry.get('last_used_at')
@@ -127,9 +137,11 @@ def decay_unused(days_threshold: int = DECAY_DAYS_THRESHOLD, decay_rate: float =
                 except Exception as e:
                     print(f"Error updating {entry_file}: {e}", file=sys.stderr)
     
+    trace_count('decayed', len(affected_entries))
     return affected_entries
 
 
+@traced("lifecycle.stale_entries")
 def get_stale_entries(effectiveness_threshold: float = GC_EFFECTIVENESS_THRESHOLD) -> List[Dict[str, Any]]:
     """
     获取低于有效性阈值的条目。
@@ -160,9 +172,11 @@ def get_stale_entries(effectiveness_threshold: float = GC_EFFECTIVENESS_THRESHOL
             if effectiveness < effectiveness_threshold:
                 stale_entries.append(entry)
     
+    trace_count('stale', len(stale_entries))
     return stale_entries
 
 
+@traced("lifecycle.gc")
 def gc(threshold: float = GC_EFFECTIVENESS_THRESHOLD, dry_run: bool = False) -> List[Dict[str, Any]]:
     """
     清理低效条目（垃圾回收）。
@@ -198,4 +212,5 @@ def gc(threshold: float = GC_EFFECTIVENESS_THRESHOLD, dry_run: bool = False) ->
                 except Exception as e:
                     print(f"Error deleting {entry_path}: {e}", file=sys.stderr)
     
+    trace_count('would_delete' if dry_run else 'deleted', len(stale_entries))
     return stale_entries
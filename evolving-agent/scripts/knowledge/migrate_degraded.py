@@ -324,6 +324,8 @@ def migrate_entry(
 
 def rebuild_indexes(kb_root: Path) -> None:
     """Rebuild all indexes from entry files."""
+    from store import entry_labels, update_label_index
+
     global_index = {
         'trigger_index': {},
         'category_index': {},
@@ -365,6 +367,10 @@ def rebuild_indexes(kb_root: Path) -> None:
             if eid not in global_index['category_index'][cat_dir_name]:
                 global_index['category_index'][cat_dir_name].append(eid)
 
+            update_label_index(global_index, eid, category,
+                               entry_labels(category, entry.get('triggers', []),
+                                            entry.get('tags', [])))
+
         cat_index = {
             'entries': cat_entries,
             'last_updated': datetime.now().isoformat()
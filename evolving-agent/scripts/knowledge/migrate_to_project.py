@@ -64,6 +64,8 @@ except ImportError:
 
 def rebuild_indexes(kb_root: Path) -> None:
     """Rebuild index.json and per-category indexes from entry files."""
+    from store import entry_labels, update_label_index
+
     global_index: Dict[str, Any] = {
         'trigger_index': {},
         'category_index': {},
@@ -104,6 +106,10 @@ def rebuild_indexes(kb_root: Path) -> None:
             if eid not in global_index['category_index'][cat_dir_name]:
                 global_index['category_index'][cat_dir_name].append(eid)
 
+            update_label_index(global_index, eid, category,
+                               entry_labels(category, entry.get('triggers', []),
+                                            entry.get('tags', [])))
+
         cat_index_path = cat_dir / 'index.json'
         atomic_write_json(cat_index_path, {
             'entries': cat_entries,
@@ -7,24 +7,33 @@ Unified Knowledge Query
 - 按分类查询
 - 按标签查询
 - 全文搜索
+- 批量查询（query_many / --batch NDJSON 流）
 """
 
 import argparse
+import hashlib
+import importlib.util
 import json
+import marshal
 import os
 import re
 import sys
+import tempfile
+import threading
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from difflib import SequenceMatcher
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
 
-# Optional jieba import for Chinese tokenization
+# Optional jieba for Chinese tokenization — only probed here; the import and
+# dictionary load are deferred to the first tokenize() call (_get_jieba)
 try:
-    import jieba
-
-    HAS_JIEBA = True
-except ImportError:
+    HAS_JIEBA = importlib.util.find_spec("jieba") is not None
+except (ImportError, ValueError):
     HAS_JIEBA = False
 
 # Import config constants
@@ -38,6 +47,15 @@ try:
         CATEGORY_DIRS,
         FUZZY_MATCH_EFF_SCALE,
         FUZZY_MATCH_REC_SCALE,
+        JIEBA_CACHE_FILE,
+        JIEBA_USER_DICT,
+        TOKENIZE_CACHE_SIZE,
+        TOKENIZE_CACHE_MAX_CHARS,
+        SYNONYM_CACHE_SIZE,
+        SYNONYMS_FILE,
+        SYNONYM_CLOSURE_DEPTH,
+        SYNONYM_CLOSURE_MAX_NEIGHBORS,
+        LABEL_INDEXES,
     )
 except ImportError:
     FUZZY_MATCH_THRESHOLD = 0.72
@@ -61,6 +79,15 @@ except ImportError:
     }
     FUZZY_MATCH_EFF_SCALE = 0.35
     FUZZY_MATCH_REC_SCALE = 0.50
+    JIEBA_CACHE_FILE = ".jieba_dict.cache"
+    JIEBA_USER_DICT = "user_dict.txt"
+    TOKENIZE_CACHE_SIZE = 8192
+    TOKENIZE_CACHE_MAX_CHARS = 1000
+    SYNONYM_CACHE_SIZE = 1024
+    SYNONYMS_FILE = "synonyms.json"
+    SYNONYM_CLOSURE_DEPTH = 1
+    SYNONYM_CLOSURE_MAX_NEIGHBORS = 8
+    LABEL_INDEXES = {"scenario": "scenario_index", "problem": "problem_index"}
 
 SYNONYM_MAP = {
     # performance / optimization
@@ -183,9 +210,231 @@ SYNONYM_MAP = {
 }
 
 
+# 技术术语用户词典：加载 jieba 时作为用户词加入，避免被切碎（虚拟列表 → 虚拟/列表）
+TECH_LEXICON = [
+    # frontend
+    "react", "vue", "angular", "svelte", "nextjs", "nuxt", "webpack", "vite",
+    "typescript", "javascript", "useEffect", "useState", "useMemo", "useCallback",
+    "useRef", "useContext", "props", "redux", "pinia", "vuex",
+    "跨域", "虚拟列表", "虚拟滚动", "懒加载", "防抖", "节流", "状态管理", "组件",
+    "路由守卫", "服务端渲染", "热更新", "白屏", "重绘", "回流",
+    # backend / data
+    "c++", "c#", "golang", "fastapi", "django", "flask", "springboot",
+    "postgres", "mysql", "redis", "mongodb", "kafka", "nginx",
+    "慢查询", "连接池", "分库分表", "读写分离", "缓存穿透", "缓存雪崩", "缓存击穿",
+    "消息队列", "负载均衡", "微服务", "限流", "熔断", "降级", "幂等", "分布式锁",
+    "鉴权", "单点登录", "序列化", "反序列化", "中间件", "依赖注入",
+    # runtime / language
+    "内存泄漏", "死循环", "死锁", "竞态条件", "线程池", "协程", "垃圾回收",
+    "类型推断", "泛型", "装饰器", "闭包", "回调地狱", "异步",
+    # tooling / testing / ops
+    "docker", "kubernetes", "k8s", "pytest", "jest", "vitest", "playwright",
+    "单元测试", "集成测试", "端到端测试", "持续集成", "容器化", "镜像",
+]
+
+
+class SynonymGraph:
+    """
+    Compiled synonym dictionary.
+
+    Terms are interned to ids (lookup by lowercase form) and adjacency is
+    stored in CSR arrays: the neighbours of term i are
+    targets[offsets[i]:offsets[i + 1]], direct synonyms first (in source
+    order), then terms reached through the bounded transitive closure by
+    hop distance. Closure is resolved at compile time, so expanding a token
+    is one dict lookup plus a slice however large the vocabulary is.
+    """
+
+    __slots__ = ("terms", "lower_terms", "term_ids", "offsets", "targets", "depth", "source")
+
+    def __init__(self, terms: List[str], edges: List[List[int]], depth: int = 1,
+                 max_neighbors: int = 0, source: Optional[str] = None):
+        self.terms = terms
+        self.lower_terms = [t.lower() for t in terms]
+        self.term_ids = {t: i for i, t in enumerate(self.lower_terms)}
+        self.depth = max(1, depth)
+        self.source = source
+        self.offsets = array("I", [0])
+        self.targets = array("I")
+        for node in range(len(terms)):
+            self.targets.extend(self._closure(edges, node, max_neighbors))
+            self.offsets.append(len(self.targets))
+
+    def _closure(self, edges: List[List[int]], node: int, max_neighbors: int) -> List[int]:
+        """BFS up to self.depth hops; direct synonyms always kept, indirect ones capped."""
+        direct = [n for n in edges[node] if n != node]
+        if self.depth == 1:
+            return direct
+        limit = max(len(direct), max_neighbors) if max_neighbors > 0 else None
+        result = list(direct)
+        seen = {node, *direct}
+        frontier = direct
+        for _ in range(self.depth - 1):
+            next_frontier = []
+            for current in frontier:
+                for n in edges[current]:
+                    if n not in seen:
+                        seen.add(n)
+                        next_frontier.append(n)
+            if limit is not None:
+                next_frontier = next_frontier[:max(0, limit - len(result))]
+            result.extend(next_frontier)
+            frontier = next_frontier
+            if not frontier:
+                break
+        return result
+
+    @classmethod
+    def compile(cls, mapping: Dict[str, List[str]], groups: Iterable[List[str]] = (),
+                depth: int = 1, max_neighbors: int = 0,
+                source: Optional[str] = None) -> "SynonymGraph":
+        """Build from directed term -> synonyms mappings plus mutual-synonym groups."""
+        terms: List[str] = []
+        ids: Dict[str, int] = {}
+        edges: List[List[int]] = []
+
+        def intern(term: str) -> int:
+            key = term.lower()
+            if key not in ids:
+                ids[key] = len(terms)
+                terms.append(term)
+                edges.append([])
+            return ids[key]
+
+        def link(src: int, dst: int) -> None:
+            if dst not in edges[src]:
+                edges[src].append(dst)
+
+        for key, synonyms in mapping.items():
+            src = intern(key)
+            for syn in synonyms:
+                link(src, intern(syn))
+        for group in groups:
+            members = [intern(term) for term in group]
+            for src in members:
+                for dst in members:
+                    if dst != src:
+                        link(src, dst)
+        return cls(terms, edges, depth=depth, max_neighbors=max_neighbors, source=source)
+
+    def neighbors(self, term: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """[(synonym, synonym.lower()), ...] of a term, closure included."""
+        i = self.term_ids.get(term.lower())
+        if i is None:
+            return []
+        start, end = self.offsets[i], self.offsets[i + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [(self.terms[j], self.lower_terms[j]) for j in self.targets[start:end]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source or "builtin",
+            "terms": len(self.terms),
+            "edges": len(self.targets),
+            "closure_depth": self.depth,
+        }
+
+
+def _read_synonyms_file(path: Path) -> Tuple[Dict[str, List[str]], List[List[str]], Dict[str, Any]]:
+    """
+    Parse <kb>/SYNONYMS_FILE.
+
+    Either a plain {"term": ["synonym", ...]} mapping, or
+    {"map": {...}, "groups": [[...], ...], "extend": true, "closure_depth": 2}
+    where groups are mutual synonyms and extend=false drops the built-in
+    SYNONYM_MAP.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("synonyms file must contain a JSON object")
+    if not {"map", "groups"} & data.keys():
+        data = {"map": data}
+    mapping = {str(k): [str(s) for s in v] for k, v in (data.get("map") or {}).items()}
+    groups = [[str(t) for t in group] for group in data.get("groups") or []]
+    options = {k: data[k] for k in ("extend", "closure_depth", "max_neighbors") if k in data}
+    return mapping, groups, options
+
+
+def _compile_synonyms(path: Optional[Path]) -> SynonymGraph:
+    mapping: Dict[str, List[str]] = {}
+    groups: List[List[str]] = []
+    options: Dict[str, Any] = {}
+    if path is not None:
+        try:
+            mapping, groups, options = _read_synonyms_file(path)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: ignoring {path}: {e}", file=sys.stderr)
+            path = None
+    if options.get("extend", True):
+        merged = {k: list(v) for k, v in SYNONYM_MAP.items()}
+        for key, synonyms in mapping.items():
+            merged.setdefault(key, []).extend(synonyms)
+        mapping = merged
+    return SynonymGraph.compile(
+        mapping,
+        groups,
+        depth=int(options.get("closure_depth", SYNONYM_CLOSURE_DEPTH)),
+        max_neighbors=int(options.get("max_neighbors", SYNONYM_CLOSURE_MAX_NEIGHBORS)),
+        source=str(path) if path is not None else None,
+    )
+
+
+# synonyms file path -> ((mtime_ns, size) or None, compiled graph)
+_synonym_graphs: Dict[str, Tuple[Optional[Tuple[int, int]], SynonymGraph]] = {}
+
+
+def get_synonym_graph(kb_root: Optional[Path] = None) -> SynonymGraph:
+    """
+    Compiled synonyms of a KB: built-in SYNONYM_MAP plus <kb>/SYNONYMS_FILE.
+
+    Cached per file and recompiled only when its mtime/size changes (one
+    stat per call).
+    """
+    try:
+        path = Path(kb_root or get_kb_root()) / SYNONYMS_FILE
+    except OSError:
+        path = None
+    try:
+        st = path.stat() if path is not None else None
+        stamp = (st.st_mtime_ns, st.st_size) if st else None
+    except OSError:
+        stamp = None
+    key = str(path)
+    cached = _synonym_graphs.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    graph = _compile_synonyms(path if stamp is not None else None)
+    _synonym_graphs[key] = (stamp, graph)
+    _expand_cached.cache_clear()
+    return graph
+
+
+@lru_cache(maxsize=SYNONYM_CACHE_SIZE)
+def _expand_cached(graph: SynonymGraph, tokens: Tuple[str, ...], max_expansions: int,
+                   max_total: int) -> Tuple[str, ...]:
+    expanded = list(tokens)
+    seen = {t.lower() for t in tokens}
+    for token in tokens:
+        if len(expanded) >= max_total:
+            break
+        for syn, syn_lower in graph.neighbors(token, max_expansions):
+            if len(expanded) >= max_total:
+                break
+            if syn_lower not in seen:
+                seen.add(syn_lower)
+                expanded.append(syn)
+    return tuple(expanded)
+
+
 def expand_with_synonyms(tokens: List[str], max_expansions: int = 3, max_total: int = 30) -> List[str]:
     """Expand a token list with synonyms to improve recall.
     
+    Synonyms come from the compiled graph of the current KB
+    (get_synonym_graph). Results are memoized (bounded LRU) per
+    (tokens, max_expansions, max_total).
+
     Args:
         tokens: List of tokens to expand
         max_expansions: Max synonyms per token (default 3)
@@ -194,18 +443,109 @@ def expand_with_synonyms(tokens: List[str], max_expansions: int = 3, max_total:
     Returns:
         Expanded token list (capped at max_total)
     """
-    expanded = list(tokens)
-    for token in tokens:
-        if len(expanded) >= max_total:
-            break
-        key = token.lower()
-        synonyms = SYNONYM_MAP.get(key, [])
-        for syn in synonyms[:max_expansions]:
-            if len(expanded) >= max_total:
-                break
-            if syn.lower() not in {t.lower() for t in expanded}:
-                expanded.append(syn)
-    return expanded
+    graph = get_synonym_graph()
+    return list(_expand_cached(graph, tuple(tokens), max_expansions, max_total))
+
+
+_JIEBA_CACHE_VERSION = 1
+_jieba = None
+_jieba_lock = threading.Lock()
+
+
+def _jieba_cache_key(jieba, user_dict: Optional[Path]) -> str:
+    """Key identifying the dictionary state: jieba version, dictionary, lexicon, user dict."""
+    parts: List[Any] = [_JIEBA_CACHE_VERSION, getattr(jieba, "__version__", ""),
+                        jieba.dt.dictionary, TECH_LEXICON]
+    for path in (jieba.dt.dictionary, user_dict):
+        try:
+            parts.append(os.path.getmtime(path) if path else None)
+        except OSError:
+            parts.append(None)
+    return hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+
+
+def _load_jieba_cache(jieba, cache_file: Path, key: str) -> bool:
+    """Install a cached prefix dictionary into jieba's default tokenizer."""
+    try:
+        cached_key, freq, total = marshal.loads(cache_file.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return False
+    if cached_key != key:
+        return False
+    jieba.dt.FREQ, jieba.dt.total = freq, total
+    jieba.dt.initialized = True
+    return True
+
+
+def _save_jieba_cache(jieba, cache_file: Path, key: str) -> None:
+    """Atomically write the initialized prefix dictionary (tempfile + rename)."""
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=cache_file.parent, prefix=cache_file.name + ".tmp.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(marshal.dumps((key, jieba.dt.FREQ, jieba.dt.total)))
+            os.replace(temp_path, cache_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+    except OSError:
+        pass
+
+
+def _get_jieba():
+    """
+    Import and initialize jieba on first use.
+
+    The initialized prefix dictionary — jieba's default dictionary plus
+    TECH_LEXICON and an optional <kb>/JIEBA_USER_DICT (jieba user-dict
+    format) — is cached in the KB root as JIEBA_CACHE_FILE. Later processes
+    load it in one read instead of rebuilding the dictionary; jieba's own
+    /tmp cache is read in small chunks and is barely faster than a rebuild.
+    """
+    global _jieba
+    if _jieba is not None:
+        return _jieba
+    with _jieba_lock:
+        if _jieba is not None:
+            return _jieba
+        import logging
+
+        import jieba
+
+        jieba.setLogLevel(logging.WARNING)
+        try:
+            kb_root = get_kb_root()
+        except OSError:
+            kb_root = None
+        user_dict = kb_root / JIEBA_USER_DICT if kb_root else None
+        if user_dict is not None and not user_dict.is_file():
+            user_dict = None
+        key = _jieba_cache_key(jieba, user_dict)
+        cache_file = kb_root / JIEBA_CACHE_FILE if kb_root else None
+
+        if cache_file is None or not _load_jieba_cache(jieba, cache_file, key):
+            jieba.initialize()
+            for word in TECH_LEXICON:
+                jieba.add_word(word)
+            if user_dict is not None:
+                try:
+                    jieba.load_userdict(str(user_dict))
+                except (OSError, ValueError, UnicodeDecodeError):
+                    pass
+            if cache_file is not None:
+                _save_jieba_cache(jieba, cache_file, key)
+        _jieba = jieba
+    return _jieba
+
+
+@lru_cache(maxsize=TOKENIZE_CACHE_SIZE)
+def _tokenize_cached(text: str, use_jieba: bool) -> Tuple[str, ...]:
+    if use_jieba:
+        tokens = _get_jieba().lcut(text)
+        return tuple(t for t in tokens if t.strip() and re.search(r"[\w\u4e00-\u9fff]", t))
+    else:
+        return tuple(re.findall(r"[\u4e00-\u9fff]+|[a-zA-Z0-9]+", text.lower()))
 
 
 def tokenize(text: str) -> List[str]:
@@ -214,7 +554,11 @@ def tokenize(text: str) -> List[str]:
 
     Uses jieba for Chinese tokenization if available; otherwise falls back
     to whitespace splitting + regex extraction of Chinese characters and
-    ASCII alphanumeric sequences.
+    ASCII alphanumeric sequences. jieba is imported and its dictionary loaded
+    on the first call, not at module import.
+
+    Texts up to TOKENIZE_CACHE_MAX_CHARS are memoized in a bounded LRU keyed
+    by (text, tokenizer mode); longer ones (entry bodies) bypass it.
 
     Args:
         text: Input text (may contain Chinese, English, or mixed content)
@@ -222,11 +566,32 @@ def tokenize(text: str) -> List[str]:
     Returns:
         List of non-empty token strings
     """
-    if HAS_JIEBA:
-        tokens = jieba.lcut(text)
-        return [t for t in tokens if t.strip() and re.search(r"[\w\u4e00-\u9fff]", t)]
-    else:
-        return re.findall(r"[\u4e00-\u9fff]+|[a-zA-Z0-9]+", text.lower())
+    if len(text) > TOKENIZE_CACHE_MAX_CHARS:
+        return list(_tokenize_cached.__wrapped__(text, HAS_JIEBA))
+    return list(_tokenize_cached(text, HAS_JIEBA))
+
+
+def memo_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of the tokenize and synonym-expansion memos."""
+    stats = {}
+    for name, fn in (("tokenize", _tokenize_cached), ("synonyms", _expand_cached)):
+        info = fn.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0,
+        }
+    return stats
+
+
+def clear_memo() -> None:
+    """Drop memoized tokens / expansions and the compiled synonym graphs."""
+    _tokenize_cached.cache_clear()
+    _expand_cached.cache_clear()
+    _synonym_graphs.clear()
 
 
 # Import atomic_write_json from file_utils
@@ -259,17 +624,142 @@ except ImportError:
         return opencode_kb
 
 
-def load_json(path: Path) -> Dict[str, Any]:
-    """Safely load JSON file."""
+# 批量查询期间共享的 memo（index.json、条目文件、项目检测结果）；None 表示未处于批量中
+_batch_memo: Optional[Dict[Any, Any]] = None
+
+
+@contextmanager
+def batch_cache() -> Iterator[None]:
+    """
+    在一批查询内共享文件加载结果。
+
+    期间 load_json 对同一路径只读一次磁盘（返回浅拷贝，调用方可以放心
+    添加 _match_score 等字段），batch_memo 的其他结果也会被复用。
+    嵌套使用时沿用外层缓存。
+    """
+    global _batch_memo
+    if _batch_memo is not None:
+        yield
+        return
+    _batch_memo = {}
+    try:
+        yield
+    finally:
+        _batch_memo = None
+
+
+def batch_memo(key: Any, compute: Callable[[], Any]) -> Any:
+    """在 batch_cache() 内按 key 复用 compute() 的结果；批量之外直接计算。"""
+    if _batch_memo is None:
+        return compute()
+    if key not in _batch_memo:
+        _batch_memo[key] = compute()
+    return _batch_memo[key]
+
+
+class QueryProfile:
+    """
+    Per-stage wall time and counters of a profiled query (--explain / --profile).
+
+    Stage times accumulate over calls (e.g. keyword.fuzzy across KB roots);
+    trigger.* stages enclose the keyword.* / semantic.* stages they call.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {"files_opened": 0, "bytes_read": 0}
+        self.scores: List[Dict[str, Any]] = []
+        self._memo_start = memo_stats()
+        self._started = time.perf_counter()
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        info = self.stages.setdefault(stage, {"ms": 0.0, "calls": 0})
+        info["ms"] += seconds * 1000
+        info["calls"] += 1
+
+    def note(self, stage: str, **counts: int) -> None:
+        """Add per-stage counters such as candidates=..."""
+        info = self.stages.setdefault(stage, {"ms": 0.0, "calls": 0})
+        for key, n in counts.items():
+            info[key] = info.get(key, 0) + n
+
+    def count(self, key: str, n: int = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        cache_hits = {key: n for key, n in self.counters.items() if key.startswith("cache.")}
+        for name, now in memo_stats().items():
+            before = self._memo_start.get(name, {})
+            cache_hits[f"cache.{name}.hits"] = now["hits"] - before.get("hits", 0)
+            cache_hits[f"cache.{name}.misses"] = now["misses"] - before.get("misses", 0)
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "stages": {
+                name: {**info, "ms": round(info["ms"], 3)} for name, info in self.stages.items()
+            },
+            "counters": {k: n for k, n in self.counters.items() if not k.startswith("cache.")},
+            "cache": cache_hits,
+            "scores": self.scores,
+        }
+
+
+_profile: Optional[QueryProfile] = None
+
+
+@contextmanager
+def profiling() -> Iterator[QueryProfile]:
+    """Collect a QueryProfile for everything run inside (nested use shares the outer one)."""
+    global _profile
+    outer = _profile
+    if outer is None:
+        _profile = QueryProfile()
+    try:
+        yield _profile
+    finally:
+        _profile = outer
+
+
+def profile_stage(name: str):
+    """Time a stage when profiling is active; no-op context otherwise."""
+    return _profile.stage(name) if _profile is not None else nullcontext()
+
+
+def profile_count(key: str, n: int = 1) -> None:
+    if _profile is not None:
+        _profile.count(key, n)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
     try:
         with open(path, "r", encoding="utf-8") as f:
+            if _profile is not None:
+                _profile.count("files_opened")
+                _profile.count("bytes_read", os.fstat(f.fileno()).st_size)
             return json.load(f)
     except (json.JSONDecodeError, IOError, UnicodeDecodeError):
         return {}
 
 
+def load_json(path: Path) -> Dict[str, Any]:
+    """Safely load JSON file."""
+    if _batch_memo is None:
+        return _read_json(path)
+    key = ("json", str(path))
+    if _profile is not None and key in _batch_memo:
+        _profile.count("cache.batch_json.hits")
+    return dict(batch_memo(key, lambda: _read_json(path)))
+
+
 def update_usage(entry_path: Path, entry_data: Dict[str, Any]) -> None:
     """
     Update usage statistics for a knowledge entry.
@@ -294,6 +784,8 @@ def update_usage(entry_path: Path, entry_data: Dict[str, Any]) -> None:
     except Exception:
         # Silently fail if write fails (don't break query)
         pass
+    if _batch_memo is not None:
+        _batch_memo.pop(("json", str(entry_path)), None)
 
 
 def batch_update_usage(entries: List[tuple]) -> None:
@@ -351,7 +843,7 @@ def fuzzy_match(
 
 def compute_relevance(entry: Dict[str, Any], query_tokens: List[str]) -> float:
     """
-    计算知识条目的相关性分数。
+    计算知识条目的相关性分数（各分项见 explain_relevance）。
 
     综合评分 = 触发词匹配分 × 0.4 + effectiveness × 0.3 + recency × 0.2 + usage_count 归一化 × 0.1
 
@@ -367,6 +859,16 @@ def compute_relevance(entry: Dict[str, Any], query_tokens: List[str]) -> float:
     Returns:
         相关性分数（0.0 到 1.0）
     """
+    return explain_relevance(entry, query_tokens)["score"]
+
+
+def explain_relevance(entry: Dict[str, Any], query_tokens: List[str]) -> Dict[str, Any]:
+    """
+    compute_relevance 的分项明细：各分量、实际权重和总分（--explain 输出）。
+
+    Returns:
+        {"score", "match", "effectiveness", "recency", "usage", "weights", "gated"}
+    """
     raw_match = entry.get("_match_score", 0)
     is_semantic = entry.get("_match_type") == "semantic"
 
@@ -374,7 +876,7 @@ def compute_relevance(entry: Dict[str, Any], query_tokens: List[str]) -> float:
     # Without this gate, entries with effectiveness=1.0 + recency=1.0 score 0.5,
     # exceeding the old high_threshold=0.45 despite having NO keyword overlap.
     if raw_match == 0 and not is_semantic:
-        return 0.0
+        return {"score": 0.0, "gated": True, "match": 0.0}
 
     # 1. Trigger match score (normalize; accumulates as multiples of 3 for exact+partial combos)
     match_score = min(1.0, raw_match / 3.0)
@@ -414,7 +916,20 @@ def compute_relevance(entry: Dict[str, Any], query_tokens: List[str]) -> float:
         + usage_normalized * RELEVANCE_WEIGHTS["usage"]
     )
 
-    return relevance
+    return {
+        "score": relevance,
+        "gated": False,
+        "match": match_score,
+        "effectiveness": effectiveness,
+        "recency": recency,
+        "usage": usage_normalized,
+        "weights": {
+            "trigger_match": RELEVANCE_WEIGHTS["trigger_match"],
+            "effectiveness": eff_weight,
+            "recency": rec_weight,
+            "usage": RELEVANCE_WEIGHTS["usage"],
+        },
+    }
 
 
 def get_global_index() -> Dict[str, Any]:
@@ -442,7 +957,8 @@ def query_by_triggers(
         匹配的知识条目列表，按匹配度排序
     """
     if use_synonyms:
-        triggers = expand_with_synonyms(triggers, max_expansions=2)
+        with profile_stage("keyword.synonyms"):
+            triggers = expand_with_synonyms(triggers, max_expansions=2)
 
     return _query_by_triggers_single_root(triggers, limit, get_kb_root())
 
@@ -469,65 +985,114 @@ def query_by_triggers_in(
         匹配的知识条目列表，按匹配度排序
     """
     if use_synonyms:
-        triggers = expand_with_synonyms(triggers, max_expansions=2)
+        with profile_stage("keyword.synonyms"):
+            triggers = expand_with_synonyms(triggers, max_expansions=2)
 
     return _query_by_triggers_single_root(triggers, limit, kb_root)
 
 
-def _query_by_triggers_single_root(
-    triggers: List[str], limit: int, kb_root
-) -> List[Dict[str, Any]]:
-    """
-    Internal: query a single knowledge base root by triggers.
-    
-    Optimizations:
-    - Trigger cap: Limits triggers to MAX_TRIGGERS (20) to prevent performance issues
-    - Early termination: Skips fuzzy matching if exact+partial matches are sufficient
-    - Deferred usage update: No longer writes usage stats during query (caller handles)
+class KeywordSearch:
     """
-    MAX_TRIGGERS = 20
-    
-    index = load_json(kb_root / "index.json")
-    trigger_index = index.get("trigger_index", {})
-
-    # Trigger cap: Limit number of triggers to prevent performance degradation
-    if len(triggers) > MAX_TRIGGERS:
-        # Sort by length (descending) to keep more specific triggers
-        triggers = sorted(triggers, key=len, reverse=True)[:MAX_TRIGGERS]
+    Keyword match over one KB root, run as separate passes (exact → partial → fuzzy).
 
-    # Track matches with type information
-    entry_info: Dict[str, Dict[str, Any]] = {}  # entry_id -> {score, match_type}
+    results() can be taken after any pass, so callers with a latency budget
+    (trigger --deadline-ms) can stop between passes. partial() redoes the exact
+    lookups interleaved with the substring scan, so scores and match types are
+    the same as a full _query_by_triggers_single_root call.
+    """
 
-    for trigger in triggers:
-        trigger_lower = trigger.lower()
+    MAX_TRIGGERS = 20
 
-        # 1. Exact match (highest priority)
-        if trigger_lower in trigger_index:
-            for entry_id in trigger_index[trigger_lower]:
+    def __init__(self, triggers: List[str], limit: int, kb_root) -> None:
+        self.prof = _profile
+        self.limit = limit
+        self.kb_root = kb_root
+        with profile_stage("keyword.index_load"):
+            index = load_json(kb_root / "index.json")
+        self.trigger_index: Dict[str, List[str]] = index.get("trigger_index", {})
+
+        # Trigger cap: Limit number of triggers to prevent performance degradation
+        if len(triggers) > self.MAX_TRIGGERS:
+            # Sort by length (descending) to keep more specific triggers
+            triggers = sorted(triggers, key=len, reverse=True)[:self.MAX_TRIGGERS]
+        self.triggers = triggers
+
+        # Track matches with type information
+        self.entry_info: Dict[str, Dict[str, Any]] = {}  # entry_id -> {score, match_type}
+
+    def _add_exact(self, trigger_lower: str) -> None:
+        entry_info = self.entry_info
+        if trigger_lower in self.trigger_index:
+            for entry_id in self.trigger_index[trigger_lower]:
                 if entry_id not in entry_info:
                     entry_info[entry_id] = {"score": 0, "match_type": "exact"}
                 entry_info[entry_id]["score"] += 3  # Highest weight
 
-        # 2. Partial match (medium priority)
-        for indexed_trigger, entry_ids in trigger_index.items():
-            if trigger_lower in indexed_trigger or indexed_trigger in trigger_lower:
-                for entry_id in entry_ids:
-                    if entry_id not in entry_info:
-                        entry_info[entry_id] = {"score": 0, "match_type": "partial"}
-                    elif entry_info[entry_id]["match_type"] == "exact":
-                        continue  # Don't downgrade exact match
-                    entry_info[entry_id]["score"] += 2
-
-    # Early termination: Skip fuzzy matching if we have enough high-quality results
-    skip_fuzzy = False
-    if len(entry_info) >= limit:
-        min_score = min(info["score"] for info in entry_info.values())
-        if min_score >= 2:  # At least partial match
-            skip_fuzzy = True
-
-    # 3. Fuzzy match (lowest priority) — only if not skipped
-    if not skip_fuzzy:
-        for trigger in triggers:
+    def exact(self) -> None:
+        """Exact trigger lookups only (cheap: one dict lookup per trigger)."""
+        with profile_stage("keyword.exact"):
+            for trigger in self.triggers:
+                self._add_exact(trigger.lower())
+
+    def partial(self) -> None:
+        """Exact + substring matches (replaces the state of exact())."""
+        prof = self.prof
+        trigger_index = self.trigger_index
+        entry_info = self.entry_info = {}
+
+        for trigger in self.triggers:
+            trigger_lower = trigger.lower()
+            if prof is not None:
+                started = time.perf_counter()
+
+            # 1. Exact match (highest priority)
+            self._add_exact(trigger_lower)
+
+            if prof is not None:
+                exact_done = time.perf_counter()
+                prof.add_time("keyword.exact", exact_done - started)
+
+            # 2. Partial match (medium priority)
+            for indexed_trigger, entry_ids in trigger_index.items():
+                if trigger_lower in indexed_trigger or indexed_trigger in trigger_lower:
+                    for entry_id in entry_ids:
+                        if entry_id not in entry_info:
+                            entry_info[entry_id] = {"score": 0, "match_type": "partial"}
+                        elif entry_info[entry_id]["match_type"] == "exact":
+                            continue  # Don't downgrade exact match
+                        entry_info[entry_id]["score"] += 2
+
+            if prof is not None:
+                prof.add_time("keyword.partial", time.perf_counter() - exact_done)
+
+        if prof is not None:
+            matched_types = [info["match_type"] for info in entry_info.values()]
+            prof.note("keyword.exact", candidates=matched_types.count("exact"))
+            prof.note("keyword.partial", candidates=matched_types.count("partial"),
+                      keys_scanned=len(trigger_index) * len(self.triggers))
+
+    def fuzzy(self) -> None:
+        """Fuzzy token matches for entries not matched yet (skipped when enough results)."""
+        prof = self.prof
+        trigger_index = self.trigger_index
+        entry_info = self.entry_info
+
+        # Early termination: Skip fuzzy matching if we have enough high-quality results
+        skip_fuzzy = False
+        if len(entry_info) >= self.limit:
+            min_score = min(info["score"] for info in entry_info.values())
+            if min_score >= 2:  # At least partial match
+                skip_fuzzy = True
+
+        # 3. Fuzzy match (lowest priority) — only if not skipped
+        if prof is not None:
+            prof.note("keyword.fuzzy", skipped=int(skip_fuzzy))
+            before_fuzzy = len(entry_info)
+        if skip_fuzzy:
+            return
+        if prof is not None:
+            started = time.perf_counter()
+        for trigger in self.triggers:
             trigger_tokens = tokenize(trigger)
             for indexed_trigger, entry_ids in trigger_index.items():
                 indexed_tokens = tokenize(indexed_trigger)
@@ -544,37 +1109,83 @@ def _query_by_triggers_single_root(
                                 "match_type": "fuzzy",
                             }
 
-    if not entry_info:
-        return []
-
-    # Sort by score
-    sorted_entries = sorted(
-        entry_info.items(), key=lambda x: x[1]["score"], reverse=True
-    )
+        if prof is not None:
+            prof.add_time("keyword.fuzzy", time.perf_counter() - started)
+            prof.note("keyword.fuzzy", candidates=len(entry_info) - before_fuzzy,
+                      comparisons=len(trigger_index) * len(self.triggers))
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Load the top `limit` matched entries, sorted by relevance."""
+        prof = self.prof
+        kb_root = self.kb_root
+        triggers = self.triggers
+        if not self.entry_info:
+            return []
+
+        # Sort by score
+        sorted_entries = sorted(
+            self.entry_info.items(), key=lambda x: x[1]["score"], reverse=True
+        )
+
+        # Load entry details
+        results: List[Dict[str, Any]] = []
+        for entry_id, info in sorted_entries[:self.limit]:
+            # Determine category from entry_id
+            category = entry_id.split("-")[0] if "-" in entry_id else "experience"
+            cat_dir = CATEGORY_DIRS.get(category, "experiences")
 
-    # Load entry details
-    results: List[Dict[str, Any]] = []
-    for entry_id, info in sorted_entries[:limit]:
-        # Determine category from entry_id
-        category = entry_id.split("-")[0] if "-" in entry_id else "experience"
-        cat_dir = CATEGORY_DIRS.get(category, "experiences")
+            entry_path = kb_root / cat_dir / f"{entry_id}.json"
+            if prof is not None:
+                started = time.perf_counter()
+            if entry_path.exists():
+                entry = load_json(entry_path)
+                entry["_match_score"] = info["score"]
+                entry["_match_type"] = info["match_type"]
+                entry["_entry_path"] = entry_path  # Store path for deferred usage update
+                if prof is not None:
+                    loaded = time.perf_counter()
+                    prof.add_time("keyword.entry_load", loaded - started)
+
+                # Compute relevance score
+                if prof is None:
+                    entry["_relevance_score"] = compute_relevance(entry, triggers)
+                else:
+                    breakdown = explain_relevance(entry, triggers)
+                    entry["_relevance_score"] = breakdown["score"]
+                    prof.add_time("keyword.relevance", time.perf_counter() - loaded)
+                    prof.scores.append({
+                        "id": entry_id,
+                        "kb_root": str(kb_root),
+                        "match_type": info["match_type"],
+                        "match_score": info["score"],
+                        **breakdown,
+                    })
 
-        entry_path = kb_root / cat_dir / f"{entry_id}.json"
-        if entry_path.exists():
-            entry = load_json(entry_path)
-            entry["_match_score"] = info["score"]
-            entry["_match_type"] = info["match_type"]
-            entry["_entry_path"] = entry_path  # Store path for deferred usage update
+                results.append(entry)
+        if prof is not None:
+            prof.note("keyword.entry_load", candidates=len(results))
 
-            # Compute relevance score
-            entry["_relevance_score"] = compute_relevance(entry, triggers)
+        # Sort by relevance score
+        results.sort(key=lambda x: x.get("_relevance_score", 0), reverse=True)
 
-            results.append(entry)
+        return results
 
-    # Sort by relevance score
-    results.sort(key=lambda x: x.get("_relevance_score", 0), reverse=True)
 
-    return results
+def _query_by_triggers_single_root(
+    triggers: List[str], limit: int, kb_root
+) -> List[Dict[str, Any]]:
+    """
+    Internal: query a single knowledge base root by triggers.
+    
+    Optimizations:
+    - Trigger cap: Limits triggers to MAX_TRIGGERS (20) to prevent performance issues
+    - Early termination: Skips fuzzy matching if exact+partial matches are sufficient
+    - Deferred usage update: No longer writes usage stats during query (caller handles)
+    """
+    search = KeywordSearch(triggers, limit, kb_root)
+    search.partial()
+    search.fuzzy()
+    return search.results()
 
 
 def query_by_category(category: str, limit: int = 20) -> List[Dict[str, Any]]:
@@ -614,6 +1225,40 @@ def query_by_category(category: str, limit: int = 20) -> List[Dict[str, Any]]:
     return results
 
 
+def query_by_label(category: str, label: str, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+    """
+    按二级索引查询：scenario 条目按场景、problem 条目按问题类型（见 LABEL_INDEXES）。
+
+    只读取 index.json 中该键下的条目文件，不扫描分类目录。
+
+    Args:
+        category: 'scenario' 或 'problem'
+        label: 场景名 / 问题类型（trigger.detect_scenarios / detect_problems 的结果）
+        limit: 返回数量限制
+
+    Returns:
+        条目列表（按有效性和使用次数排序）；知识库尚无该索引（旧版本建立）时返回 None
+    """
+    index_name = LABEL_INDEXES.get(category)
+    if index_name is None:
+        return []
+    index = get_global_index()
+    if index_name not in index:
+        return None
+
+    kb_root = get_kb_root()
+    results: List[Dict[str, Any]] = []
+    for entry_id in index[index_name].get(label, []):
+        entry = get_entry(entry_id, kb_root)
+        if entry:
+            results.append(entry)
+
+    results.sort(
+        key=lambda x: (x.get("effectiveness", 0), x.get("usage_count", 0)), reverse=True
+    )
+    return results[:limit]
+
+
 def query_by_tags(tags: List[str], limit: int = 10) -> List[Dict[str, Any]]:
     """
     按标签查询知识。
@@ -699,17 +1344,19 @@ def search_content(keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
     return results
 
 
-def get_entry(entry_id: str) -> Optional[Dict[str, Any]]:
+def get_entry(entry_id: str, kb_root: Optional[Path] = None) -> Optional[Dict[str, Any]]:
     """
     获取单个知识条目。
 
     Args:
         entry_id: 知识条目ID
+        kb_root: 知识库根目录（默认全局知识库）
 
     Returns:
         知识条目，如不存在则返回 None
     """
-    kb_root = get_kb_root()
+    if kb_root is None:
+        kb_root = get_kb_root()
 
     # Try to determine category from ID
     parts = entry_id.split("-")
@@ -730,65 +1377,124 @@ def get_entry(entry_id: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def query_semantic(query_text: str, limit: int = TOP_K_RESULTS) -> List[Dict[str, Any]]:
+def query_semantic(
+    query_text: str,
+    limit: int = TOP_K_RESULTS,
+    kb_roots: Optional[List[Path]] = None,
+    method: str = "bm25",
+) -> List[Dict[str, Any]]:
     """
-    Semantic search using BM25.
+    Semantic search using BM25 or hashed dense vectors.
 
     Args:
         query_text: Natural language query
         limit: Max results
+        kb_roots: Optional list of KB roots searched together with shared
+            corpus statistics (default: global KB only). Entries from a
+            federated search carry _kb_root.
+        method: 'bm25' (default) or 'dense' (dense.py; falls back to BM25
+            when NumPy is not installed)
 
     Returns:
         Matched knowledge entries with _relevance_score
     """
     try:
-        from embedding import search as bm25_search
+        with profile_stage("semantic.import"):
+            from embedding import search as bm25_search, federated_search
     except ImportError:
         tokens = query_text.replace(",", " ").split()
         return query_by_triggers(tokens, limit=limit)
 
-    kb_root = get_kb_root()
-    hits = bm25_search(query_text, kb_root, top_k=limit)
+    stage = "semantic.bm25"
+    if method == "dense":
+        try:
+            import dense
+        except ImportError:
+            dense = None
+        if dense is not None and dense.HAS_NUMPY:
+            bm25_search, federated_search = dense.search, dense.federated_search
+            stage = "semantic.dense"
+
+    with profile_stage(stage):
+        if kb_roots:
+            hits = federated_search(query_text, kb_roots, top_k=limit)
+        else:
+            kb_root = get_kb_root()
+            hits = [(None, entry_id, score)
+                    for entry_id, score in bm25_search(query_text, kb_root, top_k=limit)]
 
     results: List[Dict[str, Any]] = []
-    for entry_id, score in hits:
-        entry = get_entry(entry_id)
-        if entry:
-            entry["_relevance_score"] = score
-            entry["_match_type"] = "semantic"
-            results.append(entry)
+    with profile_stage("semantic.entry_load"):
+        for kb_root, entry_id, score in hits:
+            entry = get_entry(entry_id, kb_root)
+            if entry:
+                entry["_relevance_score"] = score
+                entry["_match_type"] = "semantic"
+                if kb_root is not None:
+                    entry["_kb_root"] = str(kb_root)
+                results.append(entry)
 
+    if _profile is not None:
+        _profile.note(stage, candidates=len(hits))
+        _profile.note("semantic.entry_load", candidates=len(results))
+        _profile.scores.extend(
+            {"id": e.get("id"), "kb_root": e.get("_kb_root"), "match_type": "semantic",
+             "score": e["_relevance_score"]}
+            for e in results
+        )
     return results
 
 
-def query_hybrid(query_text: str, limit: int = TOP_K_RESULTS) -> List[Dict[str, Any]]:
+def query_hybrid(
+    query_text: str,
+    limit: int = TOP_K_RESULTS,
+    kb_roots: Optional[List[Path]] = None,
+) -> List[Dict[str, Any]]:
     """
     Hybrid search: combine keyword + semantic results.
 
     Args:
         query_text: Query string
         limit: Max results
+        kb_roots: Optional list of KB roots ranked in one pass (keyword
+            search per root, federated BM25 across roots). Entries carry
+            _kb_root when given.
 
     Returns:
         Merged and deduplicated results
     """
     tokens = query_text.replace(",", " ").split()
-    keyword_results = query_by_triggers(tokens, limit=limit)
-    semantic_results = query_semantic(query_text, limit=limit)
+    if kb_roots:
+        keyword_results = []
+        for kb_root in kb_roots:
+            if not (Path(kb_root) / "index.json").exists():
+                continue
+            for entry in query_by_triggers_in(tokens, kb_root=Path(kb_root), limit=limit):
+                entry["_kb_root"] = str(kb_root)
+                keyword_results.append(entry)
+    else:
+        keyword_results = query_by_triggers(tokens, limit=limit)
+    semantic_results = query_semantic(query_text, limit=limit, kb_roots=kb_roots)
+    return merge_hybrid(keyword_results, semantic_results, limit)
 
-    seen_ids: Set[str] = set()
-    merged: List[Dict[str, Any]] = []
 
-    for entry in keyword_results:
-        eid = entry.get("id", "")
-        if eid not in seen_ids:
-            seen_ids.add(eid)
-            merged.append(entry)
+def merge_hybrid(
+    keyword_results: List[Dict[str, Any]],
+    semantic_results: List[Dict[str, Any]],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """
+    Merge keyword and semantic hits as query_hybrid does: dedup by
+    (_kb_root, id) keeping the keyword hit, rank by _relevance_score, and
+    batch-update usage statistics of the kept top `limit` entries.
+    """
+    seen_ids: Set[tuple] = set()
+    merged: List[Dict[str, Any]] = []
 
-    for entry in semantic_results:
-        eid = entry.get("id", "")
-        if eid not in seen_ids:
-            seen_ids.add(eid)
+    for entry in keyword_results + semantic_results:
+        key = (entry.get("_kb_root"), entry.get("id", ""))
+        if key not in seen_ids:
+            seen_ids.add(key)
             merged.append(entry)
 
     merged.sort(key=lambda x: x.get("_relevance_score", 0), reverse=True)
@@ -801,7 +1507,8 @@ def query_hybrid(query_text: str, limit: int = TOP_K_RESULTS) -> List[Dict[str,
             entries_to_update.append((entry["_entry_path"], entry))
     
     if entries_to_update:
-        batch_update_usage(entries_to_update)
+        with profile_stage("hybrid.usage_update"):
+            batch_update_usage(entries_to_update)
     
     return final_results
 
@@ -815,13 +1522,119 @@ def get_stats() -> Dict[str, Any]:
         "stats": index.get("stats", {}),
         "trigger_count": len(index.get("trigger_index", {})),
         "recent_entries": index.get("recent_entries", [])[:5],
+        "memo": memo_stats(),
+        "synonyms": get_synonym_graph().stats(),
     }
 
 
+def _split_list(value: Any) -> List[str]:
+    """'a, b' or ['a', 'b'] -> ['a', 'b']"""
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value or [] if str(v).strip()]
+
+
+def execute_query(spec: Dict[str, Any]) -> Any:
+    """
+    执行一个查询，spec 的键与命令行参数一致。
+
+    优先级同 CLI: stats > id > trigger (+mode) > category > tags > search，
+    都没有时返回统计信息。
+
+    Args:
+        spec: 如 {"trigger": "react,hooks", "mode": "hybrid", "limit": 5}
+
+    Returns:
+        查询结果；id 不存在时返回 None
+    """
+    limit = spec.get("limit") or 10
+    mode = spec.get("mode") or "keyword"
+
+    if spec.get("stats"):
+        return get_stats()
+    if spec.get("id"):
+        return get_entry(spec["id"])
+    if spec.get("trigger"):
+        triggers = _split_list(spec["trigger"])
+        query_text = " ".join(triggers)
+        if mode == "semantic":
+            return query_semantic(query_text, limit)
+        if mode == "dense":
+            return query_semantic(query_text, limit, method="dense")
+        if mode == "hybrid":
+            return query_hybrid(query_text, limit)
+        return query_by_triggers(triggers, limit)
+    if spec.get("category"):
+        return query_by_category(spec["category"], limit)
+    if spec.get("tags"):
+        return query_by_tags(_split_list(spec["tags"]), limit)
+    if spec.get("search"):
+        return search_content(spec["search"], limit)
+    return get_stats()
+
+
+def query_many(specs: List[Dict[str, Any]]) -> List[Any]:
+    """
+    批量执行查询，整批共享 index.json / 条目文件加载（见 batch_cache）。
+
+    Args:
+        specs: execute_query 的 spec 列表
+
+    Returns:
+        与 specs 一一对应的结果列表
+    """
+    with batch_cache():
+        return [execute_query(spec) for spec in specs]
+
+
+def stream_batch(
+    lines: Iterable[str], out: TextIO, handler: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> int:
+    """
+    NDJSON 流式批处理：每个非空输入行是一个 JSON 对象，每个结果立即写出一行。
+
+    输出行: {"index": n, "ok": true, ...handler 返回的字段}，出错时
+    {"index": n, "ok": false, "error": "..."}；输入中的 "ref" 原样带回。
+    单行出错不会中断整个流。
+
+    Returns:
+        失败的行数
+    """
+    failures = 0
+    index = 0
+    with batch_cache():
+        for line in lines:
+            if not line.strip():
+                continue
+            record: Dict[str, Any] = {"index": index}
+            index += 1
+            try:
+                spec = json.loads(line)
+                if not isinstance(spec, dict):
+                    raise ValueError("each line must be a JSON object")
+                if "ref" in spec:
+                    record["ref"] = spec["ref"]
+                record["ok"] = True
+                record.update(handler(spec))
+            except Exception as e:  # report per line, keep streaming
+                failures += 1
+                record["ok"] = False
+                record["error"] = f"{type(e).__name__}: {e}"
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+    return failures
+
+
+def run_batch(lines: Iterable[str], out: TextIO) -> int:
+    """query.py --batch: stream execute_query results as NDJSON. Returns failure count."""
+    return stream_batch(lines, out, lambda spec: {"result": execute_query(spec)})
+
+
 def format_output(data: Any, fmt: str = "json") -> str:
     """Format output based on type."""
     if fmt == "json":
-        return json.dumps(data, indent=2, ensure_ascii=False)
+        # default=str: keyword hits carry a Path in _entry_path
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str)
     elif fmt == "markdown":
         if isinstance(data, list):
             lines = []
@@ -869,6 +1682,12 @@ Examples:
   
   # Get stats
   python knowledge_query.py --stats
+
+  # Batch: NDJSON queries on stdin, NDJSON results on stdout
+  printf '%s\\n' '{"trigger": "react"}' '{"category": "problem"}' | python knowledge_query.py --batch
+
+  # Per-stage timings, file reads, cache hits and score breakdown
+  python knowledge_query.py --trigger react,hooks --explain
         """,
     )
 
@@ -893,39 +1712,42 @@ Examples:
     parser.add_argument(
         "--mode",
         "-m",
-        choices=["keyword", "semantic", "hybrid"],
+        choices=["keyword", "semantic", "hybrid", "dense"],
         default="keyword",
-        help="Search mode: keyword (default), semantic, hybrid",
+        help="Search mode: keyword (default), semantic (BM25), hybrid, "
+             "dense (hashed vectors + ANN, needs NumPy)",
+    )
+
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Read NDJSON queries from stdin (keys as the flags above, e.g. "
+             '{"trigger": "react,hooks", "mode": "hybrid"}) and stream NDJSON results',
+    )
+    parser.add_argument(
+        "--explain",
+        "--profile",
+        dest="explain",
+        action="store_true",
+        help="Output JSON {result, profile}: per-stage wall time, candidate counts, "
+             "files read, cache hits and per-entry score breakdown",
     )
 
     args = parser.parse_args()
 
-    if args.stats:
-        result = get_stats()
-    elif args.id:
-        result = get_entry(args.id)
-        if not result:
-            print(f"Entry not found: {args.id}", file=sys.stderr)
-            sys.exit(1)
-    elif args.trigger:
-        triggers = [t.strip() for t in args.trigger.split(",")]
-        query_text = " ".join(triggers)
-        if args.mode == "semantic":
-            result = query_semantic(query_text, args.limit)
-        elif args.mode == "hybrid":
-            result = query_hybrid(query_text, args.limit)
-        else:
-            result = query_by_triggers(triggers, args.limit)
-    elif args.category:
-        result = query_by_category(args.category, args.limit)
-    elif args.tags:
-        tags = [t.strip() for t in args.tags.split(",")]
-        result = query_by_tags(tags, args.limit)
-    elif args.search:
-        result = search_content(args.search, args.limit)
-    else:
-        # Default: show stats
-        result = get_stats()
+    if args.batch:
+        sys.exit(1 if run_batch(sys.stdin, sys.stdout) else 0)
+
+    if args.explain:
+        with profiling() as profile:
+            result = execute_query(vars(args))
+        print(format_output({"result": result, "profile": profile.to_dict()}, "json"))
+        return
+
+    result = execute_query(vars(args))
+    if args.id and not result:
+        print(f"Entry not found: {args.id}", file=sys.stderr)
+        sys.exit(1)
 
     print(format_output(result, args.format))
 
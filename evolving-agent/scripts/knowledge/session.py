@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Knowledge Trigger Sessions
+
+会话级增量触发：同一 agent 会话中每轮用户输入都会调用 knowledge trigger，
+高相关条目往往每轮重复返回。会话状态记录已下发的条目 (id → updated_at)：
+
+- 未下发或已更新的条目照常返回
+- 已下发且未变化的条目只保留在紧凑的引用列表 knowledge.already_delivered 中
+- 会话内相同检索（模式 + 查询 + 知识库）的候选集在知识库 index.json
+  未变化时直接复用，不再检索
+
+状态文件: <知识库>/.sessions/<session id>.json（daemon 中同样适用，
+进程内另有按 mtime 校验的缓存）。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from core.config import SESSION_DIR, SESSION_TTL_HOURS, SESSION_MAX_CANDIDATE_SETS
+    from core.file_utils import atomic_write_json
+except ImportError:
+    SESSION_DIR = ".sessions"
+    SESSION_TTL_HOURS = 24
+    SESSION_MAX_CANDIDATE_SETS = 16
+
+    def atomic_write_json(filepath, data):
+        """Fallback atomic write"""
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+from query import get_kb_root
+
+SECTIONS = ('project_local', 'high_relevance', 'medium_relevance')
+
+# path → (mtime_ns, state)，daemon 中多轮请求免重复读文件
+_states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+
+def session_path(session_id: str, kb_root: Optional[Path] = None) -> Path:
+    """会话状态文件路径（id 中的非常规字符替换为 _）。"""
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', session_id)[:128] or '_'
+    return Path(kb_root or get_kb_root()) / SESSION_DIR / f"{safe_id}.json"
+
+
+def _new_state(session_id: str) -> Dict[str, Any]:
+    now = datetime.now().isoformat()
+    return {'id': session_id, 'created_at': now, 'updated_at': now, 'turns': 0,
+            'delivered': {}, 'candidates': {}}
+
+
+def load_session(session_id: str, kb_root: Optional[Path] = None) -> Dict[str, Any]:
+    """读取会话状态，不存在或损坏时返回新状态。"""
+    path = session_path(session_id, kb_root)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return _new_state(session_id)
+    with _lock:
+        cached = _states.get(str(path))
+        if cached is not None and cached[0] == mtime:
+            return json.loads(json.dumps(cached[1]))
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return _new_state(session_id)
+    if not isinstance(state, dict) or state.get('id') != session_id:
+        return _new_state(session_id)
+    state.setdefault('delivered', {})
+    state.setdefault('candidates', {})
+    with _lock:
+        _states[str(path)] = (mtime, state)
+    return json.loads(json.dumps(state))
+
+
+def save_session(state: Dict[str, Any], kb_root: Optional[Path] = None) -> None:
+    """写回会话状态，并顺带清理过期的会话文件。"""
+    path = session_path(state['id'], kb_root)
+    state['updated_at'] = datetime.now().isoformat()
+    try:
+        atomic_write_json(path, state)
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return
+    with _lock:
+        _states[str(path)] = (mtime, json.loads(json.dumps(state)))
+    prune_sessions(path.parent)
+
+
+def prune_sessions(session_dir: Path, ttl_hours: float = SESSION_TTL_HOURS) -> int:
+    """删除超过 ttl_hours 未更新的会话文件，返回删除数。"""
+    cutoff = time.time() - ttl_hours * 3600
+    removed = 0
+    try:
+        files = list(session_dir.glob('*.json'))
+    except OSError:
+        return 0
+    for path in files:
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+                with _lock:
+                    _states.pop(str(path), None)
+        except OSError:
+            continue
+    return removed
+
+
+def clear_session(session_id: str, kb_root: Optional[Path] = None) -> bool:
+    """删除会话状态（下一轮重新完整下发）。"""
+    path = session_path(session_id, kb_root)
+    with _lock:
+        _states.pop(str(path), None)
+    try:
+        path.unlink()
+        return True
+    except OSError:
+        return False
+
+
+def kb_fingerprint(kb_roots: List[Path]) -> List[List[Any]]:
+    """各知识库 index.json 的 [路径, mtime_ns, 大小]；任何存储都会改写 index.json。"""
+    fingerprint = []
+    for root in kb_roots:
+        try:
+            st = os.stat(Path(root) / 'index.json')
+            fingerprint.append([str(root), st.st_mtime_ns, st.st_size])
+        except OSError:
+            fingerprint.append([str(root), None, None])
+    return fingerprint
+
+
+def cached_candidates(state: Dict[str, Any], key: str,
+                      fingerprint: List[List[Any]]) -> Optional[List[Dict[str, Any]]]:
+    """本会话中相同检索的候选集；知识库有变化时返回 None。"""
+    hit = state['candidates'].get(key)
+    if hit is None or hit.get('fingerprint') != fingerprint:
+        return None
+    return hit['entries']
+
+
+def store_candidates(state: Dict[str, Any], key: str, fingerprint: List[List[Any]],
+                     entries: List[Dict[str, Any]]) -> None:
+    """记录候选集（去掉不可序列化的内部字段），最多保留 SESSION_MAX_CANDIDATE_SETS 组。"""
+    candidates = state['candidates']
+    candidates.pop(key, None)
+    candidates[key] = {
+        'fingerprint': fingerprint,
+        'entries': json.loads(json.dumps(
+            [{k: v for k, v in entry.items() if k != '_entry_path'} for entry in entries],
+            ensure_ascii=False, default=str)),
+    }
+    while len(candidates) > SESSION_MAX_CANDIDATE_SETS:
+        candidates.pop(next(iter(candidates)))
+
+
+def apply_delta(result: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    只保留本会话未下发或已更新的条目，其余移入 knowledge.already_delivered。
+
+    Returns:
+        result['session']: {"id", "turn", "new", "changed", "already_delivered"}
+    """
+    delivered = state['delivered']
+    knowledge = result['knowledge']
+    references: List[Dict[str, Any]] = []
+    new = changed = 0
+    for section in SECTIONS:
+        kept = []
+        for entry in knowledge.get(section, []):
+            eid = entry.get('id')
+            version = str(entry.get('updated_at', ''))
+            if not eid:
+                kept.append(entry)
+            elif delivered.get(eid) == version:
+                references.append({'id': eid, 'name': entry.get('name', ''),
+                                   'category': entry.get('category', '')})
+            else:
+                if eid in delivered:
+                    changed += 1
+                else:
+                    new += 1
+                delivered[eid] = version
+                kept.append(entry)
+        knowledge[section] = kept
+    knowledge['already_delivered'] = references
+    state['turns'] = state.get('turns', 0) + 1
+    result['session'] = {'id': state['id'], 'turn': state['turns'], 'new': new,
+                         'changed': changed, 'already_delivered': len(references)}
+    return result
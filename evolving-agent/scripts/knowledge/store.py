@@ -37,8 +37,9 @@ except ImportError:
 
 # Import centralized constants and path resolution
 try:
-    from core.config import CATEGORY_DIRS, VALID_CATEGORIES
+    from core.config import CATEGORY_DIRS, VALID_CATEGORIES, LABEL_INDEXES
     from core.path_resolver import get_knowledge_base_dir as get_kb_root
+    from core.tracing import trace_count, trace_set, traced
 except ImportError:
     CATEGORY_DIRS = {
         'experience': 'experiences', 'tech-stack': 'tech-stacks',
@@ -46,6 +47,7 @@ except ImportError:
         'testing': 'testing', 'pattern': 'patterns', 'skill': 'skills',
     }
     VALID_CATEGORIES = list(CATEGORY_DIRS.keys())
+    LABEL_INDEXES = {'scenario': 'scenario_index', 'problem': 'problem_index'}
 
     def get_kb_root() -> Path:
         """Fallback: Get knowledge base root directory."""
@@ -58,6 +60,16 @@ except ImportError:
         opencode_kb.mkdir(parents=True, exist_ok=True)
         return opencode_kb
 
+    def traced(name=None):
+        """Fallback: tracing unavailable"""
+        return lambda fn: fn
+
+    def trace_count(key, n=1):
+        pass
+
+    def trace_set(key, value):
+        pass
+
 
 def generate_id(category: str, name: str) -> str:
     """Generate unique ID for knowledge entry."""
@@ -171,7 +183,66 @@ def extract_triggers(name: str, content: Dict[str, Any], tags: Optional[List[str
     return sorted(list(triggers))
 
 
-def update_global_index(kb_root: Path, entry_id: str, category: str, triggers: List[str]) -> None:
+def entry_labels(category: str, triggers: List[str], tags: Optional[List[str]] = None) -> List[str]:
+    """
+    Secondary-index keys of an entry: the scenarios (scenario entries) or
+    problem types (problem entries) detected in its triggers and tags.
+    """
+    if category not in LABEL_INDEXES:
+        return []
+    try:
+        from trigger import detect_problems, detect_scenarios
+    except ImportError:
+        return []
+    text = ' '.join(list(triggers) + list(tags or []))
+    return detect_scenarios(text) if category == 'scenario' else detect_problems(text)
+
+
+def update_label_index(index: Dict[str, Any], entry_id: str, category: str,
+                       labels: List[str]) -> None:
+    """Point the entry's secondary index (scenario_index / problem_index) at `labels` only."""
+    name = LABEL_INDEXES.get(category)
+    if name is None:
+        return
+    label_index = index.setdefault(name, {})
+    for label in list(label_index):
+        if label not in labels and entry_id in label_index[label]:
+            label_index[label].remove(entry_id)
+            if not label_index[label]:
+                del label_index[label]
+    for label in labels:
+        ids = label_index.setdefault(label, [])
+        if entry_id not in ids:
+            ids.append(entry_id)
+
+
+def build_label_index(kb_root: Path, category: str) -> Dict[str, List[str]]:
+    """
+    Build a category's secondary index from all of its entry files.
+
+    Knowledge bases created before the label indexes existed get it filled in
+    completely on their first store, so query_by_label never sees a partial index.
+    """
+    label_index: Dict[str, List[str]] = {}
+    cat_path = kb_root / CATEGORY_DIRS.get(category, category)
+    if not cat_path.exists():
+        return label_index
+    for entry_file in sorted(cat_path.glob('*.json')):
+        if entry_file.name == 'index.json':
+            continue
+        entry = load_json(entry_file)
+        if not entry:
+            continue
+        entry_id = entry.get('id', entry_file.stem)
+        for label in entry_labels(category, entry.get('triggers', []), entry.get('tags', [])):
+            ids = label_index.setdefault(label, [])
+            if entry_id not in ids:
+                ids.append(entry_id)
+    return label_index
+
+
+def update_global_index(kb_root: Path, entry_id: str, category: str, triggers: List[str],
+                        labels: Optional[List[str]] = None) -> None:
     """Update the global index with new entry and trigger mappings."""
     index_path = kb_root / 'index.json'
     index = load_json(index_path)
@@ -198,6 +269,12 @@ def update_global_index(kb_root: Path, entry_id: str, category: str, triggers: L
     if entry_id not in index['category_index'][cat_dir]:
         index['category_index'][cat_dir].append(entry_id)
     
+    # Update scenario / problem secondary index (backfilled first on older KBs)
+    label_index_name = LABEL_INDEXES.get(category)
+    if label_index_name is not None and label_index_name not in index:
+        index[label_index_name] = build_label_index(kb_root, category)
+    update_label_index(index, entry_id, category, labels or [])
+    
     # Update stats
     index['stats']['total_entries'] = sum(
         len(entries) for entries in index['category_index'].values()
@@ -241,6 +318,7 @@ def update_category_index(kb_root: Path, category: str, entry_id: str, name: str
     save_json(index_path, index)
 
 
+@traced('knowledge.store')
 def store_knowledge(
     category: str,
     name: str,
@@ -331,7 +409,11 @@ def store_knowledge(
     
     # Update indexes
     update_category_index(kb_root, category, entry_id, name)
-    update_global_index(kb_root, entry_id, category, triggers)
+    update_global_index(kb_root, entry_id, category, triggers,
+                        entry_labels(category, triggers, entry['tags']))
+    trace_set('category', category)
+    trace_set('updated', bool(existing))
+    trace_count('triggers', len(triggers))
     
     return entry
 
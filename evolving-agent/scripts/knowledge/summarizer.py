@@ -13,12 +13,15 @@ Knowledge Summarizer
 """
 
 import argparse
+import hashlib
+import itertools
 import json
 import re
 import sys
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from store import (
     store_experience, store_tech_stack, store_scenario,
@@ -36,11 +39,25 @@ try:
     if _core_dir not in _sys.path:
         _sys.path.insert(0, _core_dir)
     from config import MIN_INPUT_LENGTH
+    from config import (
+        STREAM_WINDOW_BYTES, STREAM_OVERLAP_LINES, STREAM_CHECKPOINT_HASH_BYTES,
+        SUMMARIZER_CHECKPOINT_DIR,
+    )
 except ImportError:
     MIN_INPUT_LENGTH = 10
+    STREAM_WINDOW_BYTES = 256 * 1024
+    STREAM_OVERLAP_LINES = 12
+    STREAM_CHECKPOINT_HASH_BYTES = 64 * 1024
+    SUMMARIZER_CHECKPOINT_DIR = ".summarizer_checkpoints"
+
+# 多关键字单遍匹配（store 已将 scripts 目录加入 sys.path）
+try:
+    from core.aho_corasick import keyword_matcher
+except ImportError:
+    keyword_matcher = None
 
 
-# 知识提取模式
+# 知识提取模式（预编译见 _RULES；带 PATTERN_GUARDS 的模式逐行匹配）
 EXTRACTION_PATTERNS = {
     # 问题-解决方案模式
     'problem_solution': [
@@ -87,6 +104,39 @@ EXTRACTION_PATTERNS = {
     ]
 }
 
+# 会回溯的提取模式的有序必要片段，与 EXTRACTION_PATTERNS 一一对应（None 表示
+# 模式本身线性，直接 findall 整段文本）。片段依次紧接上一片段之后搜索，"."
+# 表示至少隔一个字符；它们是匹配成立的必要条件，在单行内也是充分条件。
+# 这些模式逐行匹配：行内预检失败就整行跳过，懒惰量词不会在长行上逐个起点
+# 回溯到行尾（原先 DOTALL 下还会一直回溯到全文末尾）。
+PATTERN_GUARDS = {
+    'problem_solution': [
+        (r'问题[：:]', r'.(?:→|->)\s*解决[：:]\s*[^\n]'),
+        (r'问题[：:]', r'.[\n。]', r'解决[：:方案]', r'.[\n。]'),
+        (r'遇到', r'.(?:错误|问题|bug)', r'.通过', r'.解决'),
+        (r'error|issue|bug', r'.fixed by .'),
+        (r'修复了', r'.[，,].'),
+    ],
+    'lesson': [
+        (r'教训[：:]', r'.(?:→|->)\s*避免[：:]\s*[^\n]'),
+    ],
+    'decision': [
+        (r'决策[：:]', r'.(?:→|->)\s*原因[：:]\s*[^\n]'),
+    ],
+    'best_practice': [None, None, None, None],
+    'gotcha': [None, None, None, None, None],
+    'user_feedback': [
+        None,
+        None,
+        None,
+        (r'[^\n](?:项目|工程)(?:都|一直|统一)(?:使用|用)[^\n]',),
+    ],
+}
+
+# 可跨行的模式（"问题：...\n...解决：..."），在起始行之后最多再看 CROSS_LINE_SPAN 行
+CROSS_LINE_PATTERNS = {('problem_solution', 1)}
+CROSS_LINE_SPAN = 8
+
 # 分类推断关键字
 CATEGORY_INDICATORS = {
     'experience': ['经验', '教训', '学到', 'learned', '发现'],
@@ -107,6 +157,126 @@ FORMAT_PATTERNS = [
 ]
 
 
+class _Rule:
+    """一个编译后的提取模式（见 PATTERN_GUARDS）。"""
+
+    __slots__ = ('family', 'index', 'regex', 'steps', 'cross_line', 'spans_blank')
+
+    def __init__(self, family: str, index: int, pattern: str,
+                 steps: Optional[Tuple[str, ...]], dotall: bool = False) -> None:
+        self.family = family
+        self.index = index
+        self.cross_line = (family, index) in CROSS_LINE_PATTERNS
+        flags = re.IGNORECASE | (re.DOTALL if dotall or self.cross_line else 0)
+        self.regex = re.compile(pattern, flags)
+        self.steps = tuple(re.compile(step, re.IGNORECASE | re.DOTALL) for step in steps or ())
+        # 含 \s 的模式可越过行尾空白延续到下一个非空行（如 "注意：\n  xxx"）
+        self.spans_blank = not self.cross_line and r'\s' in pattern
+
+    def findall(self, text: str) -> List[Any]:
+        """
+        与 re.findall 相同形状的结果。
+
+        无必要片段的模式本身是线性的，直接 findall 整段文本。其余模式按行
+        匹配：定位首个片段所在行，行内预检通过才运行正则（预检在行内是充分
+        条件，正则不会失败回溯），否则整行跳过。
+        """
+        if not self.steps:
+            return self.regex.findall(text)
+        return [_findall_item(m) for m in self.finditer(text)]
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator['re.Match']:
+        """按 findall 的顺序逐个给出匹配，从 pos 开始（流式窗口续扫用）。"""
+        if not self.steps:
+            yield from self.regex.finditer(text, pos)
+            return
+        first, size = self.steps[0], len(text)
+        while pos < size:
+            hit = first.search(text, pos)
+            if hit is None:
+                break
+            line_start = text.rfind('\n', 0, hit.start()) + 1
+            line_end = text.find('\n', hit.start())
+            if line_end < 0:
+                line_end = size
+            if self.cross_line:
+                end = _line_window_end(text, line_end, CROSS_LINE_SPAN)
+            elif self.spans_blank:
+                end = text.find('\n', _WHITESPACE_RE.match(text, line_end).end())
+                end = size if end < 0 else end
+            else:
+                end = line_end
+            start = max(pos, line_start)
+            m = None
+            if self.feasible(text, start, line_end):
+                m = self.regex.search(text, start, end)
+            elif end > line_end and self.feasible(text, start, end):
+                # 只能靠 \s* 越过行尾匹配：若有匹配，从本行第一个起点开始的必然成立
+                m = self.regex.match(text, hit.start(), end)
+            if m is not None and m.start() < line_end:
+                yield m
+                pos = m.end() if m.end() > m.start() else m.start() + 1
+            else:
+                pos = line_end + 1
+
+    def feasible(self, text: str, pos: int, end: int) -> bool:
+        """有序必要片段是否依次出现在 text[pos:end] 中。"""
+        for step in self.steps:
+            m = step.search(text, pos, end)
+            if m is None:
+                return False
+            pos = m.end()
+        return True
+
+
+def _compile_rules() -> List[_Rule]:
+    return [
+        _Rule(family, i, pattern, PATTERN_GUARDS[family][i])
+        for family, patterns in EXTRACTION_PATTERNS.items()
+        for i, pattern in enumerate(patterns)
+    ]
+
+
+_RULES = _compile_rules()
+_WHITESPACE_RE = re.compile(r'\s*')
+_FORMAT_RULES = [
+    (_Rule('format', 0, pattern, (head, r'.(?:→|->)\s*' + tail + r'[：:].'), dotall=True), format_type)
+    for (pattern, format_type), (head, tail) in zip(
+        FORMAT_PATTERNS, [(r'问题[：:]', '解决'), (r'决策[：:]', '原因'), (r'教训[：:]', '避免')])
+]
+
+
+def _findall_item(m: 're.Match') -> Any:
+    """与 re.findall 相同的结果形状：无分组→整段，单分组→字符串，多分组→元组。"""
+    groups = m.groups(default='')
+    if not groups:
+        return m.group()
+    return groups[0] if len(groups) == 1 else groups
+
+
+def _line_window_end(text: str, line_end: int, extra_lines: int) -> int:
+    end = line_end
+    for _ in range(extra_lines):
+        if end >= len(text):
+            break
+        nxt = text.find('\n', end + 1)
+        end = len(text) if nxt < 0 else nxt
+    return end
+
+
+def scan_patterns(text: str) -> Dict[str, List[List[Any]]]:
+    """
+    运行全部 EXTRACTION_PATTERNS（预编译，等价于逐个 re.findall）。
+
+    Returns:
+        {family: [每个模式的 findall 风格结果列表, ...]}
+    """
+    found: Dict[str, List[List[Any]]] = {family: [] for family in EXTRACTION_PATTERNS}
+    for rule in _RULES:
+        found[rule.family].append(rule.findall(text))
+    return found
+
+
 def validate_input(text: str) -> Tuple[bool, str]:
     """
     验证输入文本格式并尝试自动矫正。
@@ -124,9 +294,9 @@ def validate_input(text: str) -> Tuple[bool, str]:
     
     text = text.strip()
     
-    # 检查是否匹配预定义格式
-    for pattern, format_type in FORMAT_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE | re.DOTALL):
+    # 检查是否匹配预定义格式（必要片段预检即等价于整段 search）
+    for rule, format_type in _FORMAT_RULES:
+        if rule.feasible(text, 0, len(text)):
             return True, text
     
     # 尝试自动矫正：将自由文本转换为"问题→解决"格式
@@ -158,12 +328,37 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
     Returns:
         提取的知识条目列表
     """
-    extracted: List[Dict[str, Any]] = []
     text = text.strip()
+    extracted = _knowledge_from_matches(scan_patterns(text))
+
+    # 如果没有匹配到任何模式，但输入足够短且有意义，作为通用经验存储
+    if not extracted and 5 < len(text) < 200:
+        extracted.append({
+            'type': 'experience',
+            'name': text[:50],
+            'content': {
+                'description': text,
+                'context': '用户记录的经验',
+                'solution': text,
+                'pitfalls': [],
+                'related_tech': []
+            }
+        })
     
+    return extracted
+
+
+def _knowledge_from_matches(found: Dict[str, List[List[Any]]],
+                            seen_preferences: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    scan_patterns 的结果 → 知识条目。
+
+    seen_preferences 用于用户偏好去重，流式模式在各窗口间共用同一个集合。
+    """
+    extracted: List[Dict[str, Any]] = []
+
     # 问题-解决方案
-    for pattern in EXTRACTION_PATTERNS['problem_solution']:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.DOTALL)
+    for matches in found['problem_solution']:
         for match in matches:
             if isinstance(match, tuple) and len(match) >= 2:
                 problem, solution = match[0].strip(), match[1].strip()
@@ -181,8 +376,7 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                     })
     
     # 教训-避免
-    for pattern in EXTRACTION_PATTERNS['lesson']:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.DOTALL)
+    for matches in found['lesson']:
         for match in matches:
             if isinstance(match, tuple) and len(match) >= 2:
                 lesson, avoidance = match[0].strip(), match[1].strip()
@@ -200,8 +394,7 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                     })
 
     # 决策-原因
-    for pattern in EXTRACTION_PATTERNS['decision']:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.DOTALL)
+    for matches in found['decision']:
         for match in matches:
             if isinstance(match, tuple) and len(match) >= 2:
                 decision, reason = match[0].strip(), match[1].strip()
@@ -219,8 +412,7 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                     })
 
     # 最佳实践
-    for pattern in EXTRACTION_PATTERNS['best_practice']:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for matches in found['best_practice']:
         for match in matches:
             practice = match.strip() if isinstance(match, str) else match[0].strip()
             if len(practice) > 10:
@@ -237,8 +429,7 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                 })
     
     # 注意事项 (gotchas)
-    for pattern in EXTRACTION_PATTERNS['gotcha']:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for matches in found['gotcha']:
         for match in matches:
             gotcha = match.strip() if isinstance(match, str) else match[0].strip()
             if len(gotcha) > 5:
@@ -255,9 +446,9 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                 })
     
     # 用户偏好/反馈 - 使用 set 去重
-    seen_preferences: Set[str] = set()
-    for pattern in EXTRACTION_PATTERNS['user_feedback']:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    if seen_preferences is None:
+        seen_preferences = set()
+    for matches in found['user_feedback']:
         for match in matches:
             if isinstance(match, tuple):
                 # 多组捕获，合并为完整内容
@@ -280,21 +471,7 @@ def extract_knowledge_from_text(text: str) -> List[Dict[str, Any]]:
                         'related_tech': []
                     }
                 })
-    
-    # 如果没有匹配到任何模式，但输入足够短且有意义，作为通用经验存储
-    if not extracted and 5 < len(text) < 200:
-        extracted.append({
-            'type': 'experience',
-            'name': text[:50],
-            'content': {
-                'description': text,
-                'context': '用户记录的经验',
-                'solution': text,
-                'pitfalls': [],
-                'related_tech': []
-            }
-        })
-    
+
     return extracted
 
 
@@ -309,13 +486,14 @@ def infer_category(text: str, default: str = 'experience') -> str:
     Returns:
         推断的分类
     """
-    text_lower = text.lower()
     scores: Dict[str, int] = {cat: 0 for cat in CATEGORY_INDICATORS}
     
-    for category, indicators in CATEGORY_INDICATORS.items():
-        for indicator in indicators:
-            if indicator in text_lower:
-                scores[category] += 1
+    if keyword_matcher is not None:
+        scores.update(keyword_matcher(CATEGORY_INDICATORS).label_hits(text))
+    else:
+        text_lower = text.lower()
+        for category, indicators in CATEGORY_INDICATORS.items():
+            scores[category] += sum(1 for indicator in indicators if indicator in text_lower)
     
     # 返回得分最高的分类
     max_score = max(scores.values())
@@ -327,31 +505,28 @@ def infer_category(text: str, default: str = 'experience') -> str:
     return default
 
 
+# 常见技术栈列表
+TECH_KEYWORDS = [
+    'react', 'vue', 'angular', 'svelte', 'next', 'nuxt',
+    'express', 'fastify', 'nest', 'koa',
+    'django', 'flask', 'fastapi',
+    'spring', 'springboot', 'quarkus',
+    'gin', 'fiber', 'echo',
+    'typescript', 'javascript', 'python', 'java', 'go', 'rust',
+    'mysql', 'postgres', 'mongodb', 'redis',
+    'docker', 'kubernetes', 'k8s',
+    'jest', 'vitest', 'pytest', 'junit',
+    'webpack', 'vite', 'rollup',
+    'graphql', 'rest', 'grpc'
+]
+
+
 def extract_tech_stack(text: str) -> List[str]:
-    """从文本中提取技术栈关键字。"""
-    # 常见技术栈列表
-    tech_keywords = [
-        'react', 'vue', 'angular', 'svelte', 'next', 'nuxt',
-        'express', 'fastify', 'nest', 'koa',
-        'django', 'flask', 'fastapi',
-        'spring', 'springboot', 'quarkus',
-        'gin', 'fiber', 'echo',
-        'typescript', 'javascript', 'python', 'java', 'go', 'rust',
-        'mysql', 'postgres', 'mongodb', 'redis',
-        'docker', 'kubernetes', 'k8s',
-        'jest', 'vitest', 'pytest', 'junit',
-        'webpack', 'vite', 'rollup',
-        'graphql', 'rest', 'grpc'
-    ]
-    
+    """从文本中提取技术栈关键字（按 TECH_KEYWORDS 顺序）。"""
+    if keyword_matcher is not None:
+        return keyword_matcher(TECH_KEYWORDS).keywords(text)
     text_lower = text.lower()
-    found: Set[str] = set()
-    
-    for tech in tech_keywords:
-        if tech in text_lower:
-            found.add(tech)
-    
-    return list(found)
+    return [tech for tech in TECH_KEYWORDS if tech in text_lower]
 
 
 def find_similar_entries(name: str, content: Dict[str, Any], threshold: float = 0.5) -> List[Dict[str, Any]]:
@@ -411,14 +586,7 @@ def summarize_session(
             'validation': {...}      # 输入验证结果
         }
     """
-    result: Dict[str, Any] = {
-        'extracted': [],
-        'categorized': {cat: [] for cat in CATEGORY_DIRS.keys()},
-        'tech_stack': [],
-        'stored': [],
-        'similar_found': [],
-        'validation': {'valid': True, 'message': ''}
-    }
+    result = _empty_result()
     
     # 0. 输入验证
     is_valid, processed_text = validate_input(session_content)
@@ -443,6 +611,32 @@ def summarize_session(
     tech_stack = extract_tech_stack(session_content)
     result['tech_stack'] = tech_stack
     
+    _classify_and_store(result, extracted, tech_stack, session_id, auto_store,
+                        kb_root, project_path)
+    return result
+
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        'extracted': [],
+        'categorized': {cat: [] for cat in CATEGORY_DIRS.keys()},
+        'tech_stack': [],
+        'stored': [],
+        'similar_found': [],
+        'validation': {'valid': True, 'message': ''}
+    }
+
+
+def _classify_and_store(
+    result: Dict[str, Any],
+    extracted: List[Dict[str, Any]],
+    tech_stack: List[str],
+    session_id: Optional[str],
+    auto_store: bool,
+    kb_root: Optional[Path],
+    project_path: Optional[str],
+) -> None:
+    """summarize_session / summarize_stream 共用的后续步骤：分类、查找相似条目、自动存储。"""
     # 3. 分类知识
     for entry in extracted:
         entry_type = entry.get('type', 'experience')
@@ -492,7 +686,295 @@ def summarize_session(
                 result['stored'].append(stored.get('id'))
             except Exception as e:
                 result['stored'].append(f"Error: {str(e)}")
-    
+
+
+# =============================================================================
+# 流式归纳：大型 / 持续增长的会话日志
+# =============================================================================
+#
+# 日志按行切成约 window_bytes 的窗口逐个扫描，每个窗口末尾的 overlap 行
+# 带入下一窗口，跨行模式（最多 CROSS_LINE_SPAN 行）不会被窗口边界截断。
+# 每个窗口只报告起点在带出部分之前的匹配，各模式最后一个匹配若延伸到
+# 下一窗口，则记下续扫位置，与整段 findall 的结果一致、不重复。
+#
+# 给定 session_id 时把读到的位置写入检查点
+# <知识库>/.summarizer_checkpoints/<session id>.json：
+#   offset     下次从这里续读（末尾 overlap 行的起点）
+#   length     本次读到的字节数
+#   hash_start / sha256   [hash_start, length) 的内容哈希，校验日志只被追加
+#   resume     各模式在 offset 之后的续扫状态（见 _scan_window）
+#   preferences  已提取的用户偏好（去重键），续读时沿用
+# 重跑时哈希一致只处理新增的尾部，否则（日志被改写或截断）从头处理。
+
+
+def checkpoint_path(session_id: str, kb_root: Optional[Path] = None) -> Path:
+    """流式归纳检查点路径（id 中的非常规字符替换为 _）。"""
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', session_id)[:128] or '_'
+    return Path(kb_root or get_kb_root()) / SUMMARIZER_CHECKPOINT_DIR / f"{safe_id}.json"
+
+
+def load_checkpoint(session_id: str, kb_root: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """读取检查点，不存在或损坏时返回 None。"""
+    try:
+        with open(checkpoint_path(session_id, kb_root), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(checkpoint, dict) or checkpoint.get('session_id') != session_id:
+        return None
+    return checkpoint
+
+
+def _read_chunks(stream: BinaryIO, size: int) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    """读满 size 字节（管道的 read 可能读不满），遇到 EOF 提前返回。"""
+    parts: List[bytes] = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        parts.append(chunk)
+        size -= len(chunk)
+    return b''.join(parts)
+
+
+def _spooled_chunks(spool: Any, size: int) -> Iterator[bytes]:
+    try:
+        yield from _read_chunks(spool, size)
+    finally:
+        spool.close()
+
+
+def _resume_stream(
+    stream: BinaryIO,
+    checkpoint: Optional[Dict[str, Any]],
+    window_bytes: int,
+) -> Tuple[Iterable[bytes], int, Dict[str, List[Any]], bool]:
+    """
+    按检查点定位输入。
+
+    Returns:
+        (字节块, 起始字节偏移, 各模式续扫状态, 是否从检查点续读)
+    """
+    fresh: Tuple[Iterable[bytes], int, Dict[str, List[Any]], bool] = (
+        _read_chunks(stream, window_bytes), 0, {}, False)
+    if not checkpoint:
+        return fresh
+    try:
+        offset, length = int(checkpoint['offset']), int(checkpoint['length'])
+        hash_start, digest = int(checkpoint['hash_start']), str(checkpoint['sha256'])
+        resume = {str(k): [int(v[0]), None if v[1] is None else str(v[1])]
+                  for k, v in (checkpoint.get('resume') or {}).items()}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return fresh
+    if not 0 <= hash_start <= offset <= length:
+        return fresh
+
+    try:
+        seekable = stream.seekable()
+    except (AttributeError, OSError, ValueError):
+        seekable = False
+    spool = None
+    if seekable:
+        stream.seek(hash_start)
+    else:
+        # 管道无法回退：跳过的前缀暂存到临时文件（超过一个窗口即落盘），
+        # 校验失败时还能从头处理
+        spool = tempfile.SpooledTemporaryFile(max_size=window_bytes)
+        remaining = hash_start
+        while remaining > 0:
+            chunk = stream.read(min(window_bytes, remaining))
+            if not chunk:
+                break
+            spool.write(chunk)
+            remaining -= len(chunk)
+
+    tail = _read_exact(stream, length - hash_start)
+    if len(tail) == length - hash_start and hashlib.sha256(tail).hexdigest() == digest:
+        if spool is not None:
+            spool.close()
+        chunks = itertools.chain([tail[offset - hash_start:]], _read_chunks(stream, window_bytes))
+        return chunks, offset, resume, True
+
+    # 日志被改写或截断：从头处理
+    if spool is None:
+        stream.seek(0)
+        return fresh
+    spool.write(tail)
+    spool.seek(0)
+    chunks = itertools.chain(_spooled_chunks(spool, window_bytes), _read_chunks(stream, window_bytes))
+    return chunks, 0, {}, False
+
+
+def _overlap_cut(buf: bytes, lines: int, end: Optional[int] = None) -> int:
+    """buf[:end] 中倒数第 lines 行的起始位置（不足 lines 行时为 0）。"""
+    end = len(buf) if end is None else end
+    pos = end - 1 if end and buf[end - 1:end] == b'\n' else end
+    for _ in range(lines):
+        pos = buf.rfind(b'\n', 0, pos)
+        if pos < 0:
+            return 0
+    return pos + 1
+
+
+def _scan_window(
+    text: str,
+    cut: int,
+    origin: int,
+    resume: Dict[str, List[Any]],
+    final: bool = False,
+) -> Tuple[Dict[str, List[List[Any]]], Dict[str, List[Any]]]:
+    """
+    扫描一个窗口，只报告起点在 cut 之前的匹配。
+
+    resume 给出各模式的续扫状态 [起点, 摘要]：从起点继续扫描；摘要非空时
+    起点处的匹配上次已报告过，结果不变则不重复报告。返回的续扫状态以
+    origin（下一窗口 / 检查点的起点）为原点。final 时记下最后一个匹配的
+    起点和摘要 —— 日志末尾的匹配在追加内容后可能变化（如 "注意：" 后的
+    内容写在下一行），续读时从该起点重扫。
+    """
+    found: Dict[str, List[List[Any]]] = {family: [] for family in EXTRACTION_PATTERNS}
+    carried: Dict[str, List[Any]] = {}
+    for rule in _RULES:
+        key = f"{rule.family}:{rule.index}"
+        pos, digest = resume.get(key, (0, None))
+        items: List[Any] = []
+        last: Optional[Tuple[int, int, Any]] = None
+        for m in rule.finditer(text, pos):
+            if m.start() >= cut:
+                break
+            item = _findall_item(m)
+            reported = digest is not None and m.start() == pos and _item_digest(item) == digest
+            digest = None
+            if not reported:
+                items.append(item)
+            last = (m.start(), m.end(), item)
+        found[rule.family].append(items)
+        if last is None:
+            if pos > origin or (digest is not None and pos == origin):
+                carried[key] = [pos - origin, digest]
+        elif final and last[0] >= origin:
+            carried[key] = [last[0] - origin, _item_digest(last[2])]
+        elif last[1] > origin:
+            carried[key] = [last[1] - origin, None]
+    return found, carried
+
+
+def _item_digest(item: Any) -> str:
+    return hashlib.sha1(json.dumps(item, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def summarize_stream(
+    stream: BinaryIO,
+    session_id: Optional[str] = None,
+    auto_store: bool = False,
+    kb_root: Optional[Path] = None,
+    project_path: Optional[str] = None,
+    window_bytes: int = STREAM_WINDOW_BYTES,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    """
+    流式归纳：按窗口增量读取二进制流（文件或 stdin），内存占用与日志大小无关。
+
+    与 summarize_session 的区别：不做输入矫正（validate_input 的自动改写针对
+    单段短文本），也不把整段短文本记为通用经验；提取规则与 scan_patterns 相同。
+
+    Args:
+        stream: 以二进制方式打开的输入（UTF-8）
+        session_id: 会话ID (作为来源标识；给定时读写检查点)
+        auto_store: 是否自动存储到知识库
+        kb_root: 知识库根目录（检查点也存于此）
+        project_path: 项目路径（存储时标记来源）
+        window_bytes: 每个窗口的字节数
+        resume: False 时忽略已有检查点从头处理（仍会写入新检查点）
+
+    Returns:
+        summarize_session 的结果，另加
+        'stream': {'resumed', 'start_offset', 'end_offset', 'windows', 'checkpoint'}
+    """
+    result = _empty_result()
+    window_bytes = max(1, int(window_bytes))
+    overlap = max(STREAM_OVERLAP_LINES, CROSS_LINE_SPAN + 2)
+    checkpoint = load_checkpoint(session_id, kb_root) if session_id and resume else None
+    chunks, start_offset, carried, resumed = _resume_stream(stream, checkpoint, window_bytes)
+
+    extracted: List[Dict[str, Any]] = []
+    tech: Set[str] = set()
+    seen_preferences: Set[str] = set()
+    if resumed:
+        seen_preferences.update(str(p) for p in checkpoint.get('preferences') or ())
+    buf = b''
+    buf_start = start_offset
+    windows = 0
+
+    for chunk in chunks:
+        buf += chunk
+        if len(buf) < window_bytes:
+            continue
+        end = buf.rfind(b'\n') + 1
+        cut = _overlap_cut(buf, overlap, end)
+        if cut == 0:
+            continue  # 行太长（或太少），继续读到凑够 overlap 行
+        head = buf[:cut].decode('utf-8', 'replace')
+        text = head + buf[cut:end].decode('utf-8', 'replace')
+        found, carried = _scan_window(text, len(head), len(head), carried)
+        extracted.extend(_knowledge_from_matches(found, seen_preferences))
+        tech.update(extract_tech_stack(head))
+        windows += 1
+        buf = buf[cut:]
+        buf_start += cut
+
+    # 最后一个窗口：报告全部匹配，末尾 overlap 行留作下次续读的起点
+    cut = _overlap_cut(buf, overlap)
+    if buf:
+        head = buf[:cut].decode('utf-8', 'replace')
+        text = head + buf[cut:].decode('utf-8', 'replace')
+        found, carried = _scan_window(text, len(text), len(head), carried, final=True)
+        extracted.extend(_knowledge_from_matches(found, seen_preferences))
+        tech.update(extract_tech_stack(text))
+        windows += 1
+    end_offset = buf_start + len(buf)
+
+    tech_stack = [t for t in TECH_KEYWORDS if t in tech]
+    result['extracted'] = extracted
+    result['tech_stack'] = tech_stack
+    _classify_and_store(result, extracted, tech_stack, session_id, auto_store,
+                        kb_root, project_path)
+
+    saved = None
+    if session_id:
+        offset = buf_start + cut
+        hash_start = max(buf_start, offset - STREAM_CHECKPOINT_HASH_BYTES)
+        saved = checkpoint_path(session_id, kb_root)
+        try:
+            _atomic_write_json(saved, {
+                'session_id': session_id,
+                'offset': offset,
+                'length': end_offset,
+                'hash_start': hash_start,
+                'sha256': hashlib.sha256(buf[hash_start - buf_start:]).hexdigest(),
+                'resume': carried,
+                'preferences': sorted(seen_preferences),
+                'updated_at': datetime.now().isoformat(),
+            })
+        except OSError as e:
+            print(f"Warning: checkpoint not saved: {e}", file=sys.stderr)
+            saved = None
+
+    result['stream'] = {
+        'resumed': resumed,
+        'start_offset': start_offset,
+        'end_offset': end_offset,
+        'windows': windows,
+        'checkpoint': str(saved) if saved else None,
+    }
     return result
 
 
@@ -542,6 +1024,10 @@ Examples:
   
   # Analyze and auto-store
   cat session.txt | python knowledge_summarizer.py --auto-store
+
+  # Stream a large / growing log; reruns only process the appended tail
+  python knowledge_summarizer.py --file session.log --session-id "session-123"
+  cat session.log | python knowledge_summarizer.py --stream --session-id "session-123"
   
   # Update effectiveness
   python knowledge_summarizer.py --feedback positive --entry-id "problem-cors-abc123"
@@ -558,6 +1044,13 @@ Examples:
     parser.add_argument('--project', help=(
         '项目根目录。指定后将存入 $PROJECT_ROOT/.opencode/knowledge/ 项目级知识库，'
         '用于隔离项目特有知识，避免跨项目污染全局知识库。'))
+    parser.add_argument('--stream', action='store_true',
+                        help='流式读取 stdin（按窗口增量处理，内存占用与日志大小无关）')
+    parser.add_argument('--file', help='流式读取该日志文件（隐含 --stream）')
+    parser.add_argument('--window-bytes', type=int, default=STREAM_WINDOW_BYTES,
+                        help=f'流式窗口大小（字节，默认 {STREAM_WINDOW_BYTES}）')
+    parser.add_argument('--from-start', action='store_true',
+                        help='流式模式忽略已有检查点，从头处理（仍会写入新检查点）')
 
     args = parser.parse_args()
 
@@ -573,20 +1066,45 @@ Examples:
         _proj_kb.mkdir(parents=True, exist_ok=True)
         kb_root = _proj_kb
 
-    # Read session content from stdin
-    session_content = sys.stdin.read()
+    project_path = str(Path(args.project).resolve()) if getattr(args, 'project', None) else None
 
-    if not session_content.strip():
-        print("Error: No session content provided via stdin", file=sys.stderr)
-        sys.exit(1)
+    if args.stream or args.file:
+        try:
+            stream = open(args.file, 'rb') if args.file else sys.stdin.buffer
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            result = summarize_stream(
+                stream,
+                session_id=args.session_id,
+                auto_store=args.auto_store,
+                kb_root=kb_root,
+                project_path=project_path,
+                window_bytes=args.window_bytes,
+                resume=not args.from_start,
+            )
+        finally:
+            if args.file:
+                stream.close()
+        if not result['stream']['resumed'] and result['stream']['end_offset'] == 0:
+            print("Error: No session content provided", file=sys.stderr)
+            sys.exit(1)
+    else:
+        # Read session content from stdin
+        session_content = sys.stdin.read()
 
-    result = summarize_session(
-        session_content=session_content,
-        session_id=args.session_id,
-        auto_store=args.auto_store,
-        kb_root=kb_root,
-        project_path=str(Path(args.project).resolve()) if getattr(args, 'project', None) else None,
-    )
+        if not session_content.strip():
+            print("Error: No session content provided via stdin", file=sys.stderr)
+            sys.exit(1)
+
+        result = summarize_session(
+            session_content=session_content,
+            session_id=args.session_id,
+            auto_store=args.auto_store,
+            kb_root=kb_root,
+            project_path=project_path,
+        )
     
     if args.format == 'json':
         print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -601,6 +1119,10 @@ Examples:
             print(f"\n已存储: {len(result['stored'])} 条")
         if result['similar_found']:
             print(f"\n发现相似条目: {len(result['similar_found'])} 组")
+        if 'stream' in result:
+            stream_info = result['stream']
+            print(f"\n流式处理: 字节 {stream_info['start_offset']}-{stream_info['end_offset']}，"
+                  f"{stream_info['windows']} 个窗口" + ("（从检查点续读）" if stream_info['resumed'] else ""))
 
 
 if __name__ == '__main__':
@@ -12,19 +12,28 @@ Knowledge Trigger Detector
 
 import argparse
 import json
+import math
 import re
 import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple
 
 # Import query functions
 from pathlib import Path as _Path
 
 from query import (
     get_kb_root, load_json, get_global_index,
-    query_by_triggers, query_by_category, get_entry,
+    query_by_triggers, query_by_category, query_by_label, get_entry,
     query_semantic, query_hybrid, query_by_triggers_in,
+    KeywordSearch, merge_hybrid, expand_with_synonyms,
+    batch_cache, batch_memo, stream_batch, profiling, profile_stage, profile_count,
+    atomic_write_json,
 )
+import session as trigger_session
 
 # Threshold constants (with fallback so trigger.py works as a standalone script)
 try:
@@ -33,10 +42,31 @@ try:
     _core_dir = _os.path.join(_os.path.dirname(__file__), '..', 'core')
     if _core_dir not in _sys.path:
         _sys.path.insert(0, _core_dir)
-    from core.config import HIGH_RELEVANCE_THRESHOLD, MIN_RELEVANCE_THRESHOLD
+    from core.config import (
+        HIGH_RELEVANCE_THRESHOLD, MIN_RELEVANCE_THRESHOLD, TRIGGER_CANDIDATE_FACTOR,
+        RENDER_CACHE_SIZE, RENDER_CACHE_FILE, RENDER_CACHE_PERSIST,
+    )
+    from core.tracing import trace_count, trace_set, traced
+    from core.aho_corasick import keyword_matcher
 except ImportError:
     HIGH_RELEVANCE_THRESHOLD = 0.65
     MIN_RELEVANCE_THRESHOLD = 0.25
+    TRIGGER_CANDIDATE_FACTOR = 1.5
+    RENDER_CACHE_SIZE = 512
+    RENDER_CACHE_FILE = ".render_cache.json"
+    RENDER_CACHE_PERSIST = False
+
+    def traced(name=None):
+        """Fallback: tracing unavailable"""
+        return lambda fn: fn
+
+    def trace_count(key, n=1):
+        pass
+
+    def trace_set(key, value):
+        pass
+
+    keyword_matcher = None
 
 
 # 场景关键字映射
@@ -97,63 +127,212 @@ def extract_keywords(text: str) -> List[str]:
     return list(keywords)
 
 
+# 场景 / 问题 / 动作三个词典合并为 (关键字, (类别, 名称)) 列表，编译成一个自动机
+_DETECTION_KEYWORDS = (
+    [(kw, ('scenario', s)) for s, kws in SCENARIO_KEYWORDS.items() for kw in kws]
+    + [(kw, ('problem', p)) for p, kws in PROBLEM_SYMPTOMS.items() for kw in kws]
+    + [(kw, ('action', c)) for kw, c in ACTION_TO_SCENARIO.items()]
+)
+
+
+@lru_cache(maxsize=64)
+def _detect_labels(text: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    一次线性扫描匹配三类关键字，按词典顺序返回命中的 (类别, 名称)。
+
+    detect_scenarios / detect_problems / detect_action_type 对同一输入
+    共享这一次扫描结果。
+    """
+    if keyword_matcher is None:
+        text_lower = text.lower()
+        return tuple(dict.fromkeys(label for kw, label in _DETECTION_KEYWORDS
+                                   if kw in text_lower))
+    return tuple(keyword_matcher(_DETECTION_KEYWORDS).labels(text))
+
+
+def _detected(text: str, group: str) -> List[str]:
+    return [name for g, name in _detect_labels(text) if g == group]
+
+
 def detect_scenarios(text: str) -> List[str]:
     """检测文本中涉及的场景。"""
-    text_lower = text.lower()
-    detected: Set[str] = set()
-    
-    for scenario, keywords in SCENARIO_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                detected.add(scenario)
-                break
-    
-    return list(detected)
+    return _detected(text, 'scenario')
 
 
 def detect_problems(text: str) -> List[str]:
     """检测文本中描述的问题类型。"""
-    text_lower = text.lower()
-    detected: Set[str] = set()
-    
-    for problem, symptoms in PROBLEM_SYMPTOMS.items():
-        for symptom in symptoms:
-            if symptom in text_lower:
-                detected.add(problem)
-                break
-    
-    return list(detected)
+    return _detected(text, 'problem')
 
 
 def detect_action_type(text: str) -> Optional[str]:
     """检测用户意图的动作类型。"""
-    text_lower = text.lower()
-    
-    for action, category in ACTION_TO_SCENARIO.items():
-        if action in text_lower:
-            return category
-    
-    return None
+    actions = _detected(text, 'action')
+    return actions[0] if actions else None
 
 
-def detect_project_tech(project_dir: str) -> Dict[str, Any]:
-    """检测项目技术栈。"""
-    detector_path = Path(__file__).parent.parent / 'programming'
-    sys.path.insert(0, str(detector_path))
-    
+@lru_cache(maxsize=1)
+def _project_detector():
+    """首次使用时导入项目检测器（只修改一次 sys.path）。"""
+    detector_path = str(Path(__file__).parent.parent / 'programming')
+    if detector_path not in sys.path:
+        sys.path.insert(0, detector_path)
     try:
-        from detect_project import detect_project
-        return detect_project(project_dir)
+        from detect_project import detect_project_cached
     except ImportError:
+        return None
+    return detect_project_cached
+
+
+def detect_project_tech(project_dir: str) -> Dict[str, Any]:
+    """
+    检测项目技术栈。
+
+    结果缓存在 <project>/.opencode/tech_cache.json，以各清单文件
+    (package.json, go.mod, pom.xml ...) 的 (路径, mtime, 大小) 为键，
+    清单未变化时不再重新解析。
+    """
+    detector = _project_detector()
+    if detector is None:
         return {'error': 'Project detector not available'}
+    return detector(project_dir)
 
 
+class StageBudget:
+    """
+    --deadline-ms 的延迟预算：检索阶段按优先级依次执行，预算耗尽后跳过其余阶段。
+
+    计时从 trigger_knowledge 开始（含输入/项目检测）。精确匹配阶段只是
+    index.json 的字典查找，总会执行，保证降级后仍有结果。
+    """
+
+    def __init__(self, deadline_ms: float) -> None:
+        self.deadline_ms = deadline_ms
+        self.completed: List[str] = []
+        self.skipped: List[str] = []
+        self._started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def run(self, stage: str, fn: Callable[[], Any], required: bool = False) -> bool:
+        """预算未耗尽（或 required）时执行 fn 并记入 completed，否则记入 skipped。"""
+        if not required and self.elapsed_ms() >= self.deadline_ms:
+            self.skipped.append(stage)
+            return False
+        fn()
+        self.completed.append(stage)
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'deadline_ms': self.deadline_ms,
+            'elapsed_ms': round(self.elapsed_ms(), 3),
+            'completed': self.completed,
+            'skipped': self.skipped,
+        }
+
+
+def _search_within_budget(
+    budget: StageBudget,
+    mode: str,
+    raw_query: str,
+    all_triggers: Set[str],
+    proj_triggers: List[str],
+    project_kb: Optional[Path],
+    kb_roots: Optional[List[Path]],
+    limit: int,
+    fetch_limit: int,
+    search_global: bool = True,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    限时检索：project.exact → global.exact → bm25 → partial → fuzzy。
+
+    与不限时路径检索相同的知识库和参数，只是把各知识库的关键字匹配拆成
+    精确 / 部分 / 模糊三遍（query.KeywordSearch），让 BM25 排在部分匹配之前。
+    阶段全部完成时结果与不限时路径一致。
+
+    Returns:
+        (项目级知识库命中, 全局检索候选)
+    """
+    # (scope, triggers, kb_root, limit, 候选是否标记 _kb_root)
+    specs: List[Tuple[str, List[str], Path, int, bool]] = []
+    if project_kb is not None and proj_triggers:
+        specs.append(('project', proj_triggers, project_kb, limit, False))
+    if search_global:
+        if mode == 'keyword' and all_triggers:
+            specs.append(('global', list(all_triggers), get_kb_root(), fetch_limit, False))
+        elif mode == 'hybrid' and raw_query:
+            tokens = raw_query.replace(',', ' ').split()
+            for root in kb_roots or [get_kb_root()]:
+                if kb_roots and not (Path(root) / 'index.json').exists():
+                    continue
+                scope = 'project' if kb_roots and root == project_kb else 'global'
+                specs.append((scope, tokens, Path(root), fetch_limit, bool(kb_roots)))
+
+    searches: List[Optional[KeywordSearch]] = [None] * len(specs)
+
+    def _exact(scope: str) -> None:
+        for i, (spec_scope, triggers, root, spec_limit, _) in enumerate(specs):
+            if spec_scope == scope:
+                with profile_stage('keyword.synonyms'):
+                    triggers = expand_with_synonyms(triggers, max_expansions=2)
+                searches[i] = KeywordSearch(triggers, spec_limit, root)
+                searches[i].exact()
+
+    for scope in ('project', 'global'):
+        if any(spec[0] == scope for spec in specs):
+            budget.run(f'{scope}.exact', lambda scope=scope: _exact(scope), required=True)
+
+    semantic: List[Dict[str, Any]] = []
+    if search_global and mode in ('semantic', 'hybrid') and raw_query:
+        bm25_done = budget.run('bm25', lambda: semantic.extend(
+            query_semantic(raw_query, limit=fetch_limit, kb_roots=kb_roots)))
+    else:
+        bm25_done = False
+
+    if specs:
+        budget.run('partial', lambda: [search.partial() for search in searches])
+        budget.run('fuzzy', lambda: [search.fuzzy() for search in searches])
+
+    if search_global and mode == 'semantic' and raw_query and not bm25_done:
+        # semantic 模式没有关键字阶段：BM25 被跳过时退回全局精确匹配
+        tokens = raw_query.replace(',', ' ').split()
+        for root in kb_roots or [get_kb_root()]:
+            if (Path(root) / 'index.json').exists():
+                specs.append(('global', tokens, Path(root), fetch_limit, bool(kb_roots)))
+                searches.append(None)
+        budget.run('global.exact', lambda: _exact('global'), required=True)
+
+    project_local: List[Dict[str, Any]] = []
+    keyword_results: List[Dict[str, Any]] = []
+    for (scope, _, root, _, tag_root), search in zip(specs, searches):
+        hits = search.results()
+        if scope == 'project' and not tag_root:
+            project_local.extend(hits)
+            continue
+        for entry in hits:
+            if tag_root:
+                entry['_kb_root'] = str(root)
+            keyword_results.append(entry)
+
+    if not search_global:
+        return project_local, []
+    if mode == 'semantic':
+        return project_local, semantic if bm25_done else keyword_results
+    if mode == 'hybrid':
+        return project_local, merge_hybrid(keyword_results, semantic, fetch_limit)
+    return project_local, keyword_results
+
+
+@traced('knowledge.trigger')
 def trigger_knowledge(
     user_input: Optional[str] = None,
     project_dir: Optional[str] = None,
     explicit_triggers: Optional[List[str]] = None,
     limit: int = 5,
     mode: str = 'hybrid',
+    session_id: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     主触发函数 - 根据输入检测并加载相关知识。
@@ -164,10 +343,16 @@ def trigger_knowledge(
         explicit_triggers: 显式指定的触发关键字
         limit: 每类知识返回的条目数限制
         mode: 搜索模式 — 'keyword', 'semantic', 'hybrid'（默认 hybrid）
+        session_id: 会话 ID；给定时只返回本会话尚未下发或已更新的条目，
+            其余列入 knowledge.already_delivered（见 session.py）
+        deadline_ms: 延迟预算（毫秒）；给定时检索阶段按优先级执行，预算耗尽后
+            跳过其余阶段（见 StageBudget），结果的 deadline 字段列出
+            completed / skipped 阶段
     
     Returns:
         检测结果和匹配的知识
     """
+    budget = StageBudget(deadline_ms) if deadline_ms is not None else None
     result: Dict[str, Any] = {
         'detected': {
             'keywords': [],
@@ -194,24 +379,28 @@ def trigger_knowledge(
     
     # 2. 从用户输入提取
     if user_input:
-        keywords = extract_keywords(user_input)
-        result['detected']['keywords'] = keywords
-        all_triggers.update(keywords)
-        
-        scenarios = detect_scenarios(user_input)
-        result['detected']['scenarios'] = scenarios
-        all_triggers.update(scenarios)
-        
-        problems = detect_problems(user_input)
-        result['detected']['problems'] = problems
-        all_triggers.update(problems)
-        
-        action_type = detect_action_type(user_input)
-        result['detected']['action_type'] = action_type
+        with profile_stage('trigger.detect_input'):
+            keywords = extract_keywords(user_input)
+            result['detected']['keywords'] = keywords
+            all_triggers.update(keywords)
+
+            scenarios = detect_scenarios(user_input)
+            result['detected']['scenarios'] = scenarios
+            all_triggers.update(scenarios)
+
+            problems = detect_problems(user_input)
+            result['detected']['problems'] = problems
+            all_triggers.update(problems)
+
+            action_type = detect_action_type(user_input)
+            result['detected']['action_type'] = action_type
     
-    # 3. 从项目检测
+    # 3. 从项目检测（批量内同一项目只检测一次）
     if project_dir:
-        tech_detection = detect_project_tech(project_dir)
+        with profile_stage('trigger.detect_project'):
+            tech_detection = batch_memo(
+                ('project_tech', project_dir), lambda: detect_project_tech(project_dir)
+            )
         if 'error' not in tech_detection:
             result['detected']['tech_stack'] = tech_detection
             all_triggers.update(tech_detection.get('base_tech', []))
@@ -222,34 +411,83 @@ def trigger_knowledge(
     
     # 4a. 项目级知识库检索（最高优先级，完全隔离跨项目噪音）
     seen_ids: Set[str] = set()
+    project_kb: Optional[Path] = None
     if project_dir:
-        project_kb = _Path(project_dir) / '.opencode' / 'knowledge'
-        if project_kb.exists() and (project_kb / 'index.json').exists():
-            proj_triggers = list(all_triggers) if all_triggers else []
-            if not proj_triggers and user_input:
-                proj_triggers = user_input.split()
-            if proj_triggers:
+        candidate = _Path(project_dir) / '.opencode' / 'knowledge'
+        if candidate.exists() and (candidate / 'index.json').exists():
+            project_kb = candidate
+
+    raw_query = user_input or ' '.join(sorted(all_triggers))
+    # semantic/hybrid: project-local and global KBs are ranked together in one
+    # federated BM25 pass (shared idf), so their scores are comparable. The
+    # project trigger pass below still runs first: it is the only pass that sees
+    # the detected tech stack / extracted keywords rather than the raw input.
+    federated = project_kb is not None and mode in ('semantic', 'hybrid') and bool(raw_query)
+
+    proj_triggers: List[str] = []
+    if project_kb is not None:
+        proj_triggers = list(all_triggers) if all_triggers else []
+        if not proj_triggers and user_input:
+            proj_triggers = user_input.split()
+        if proj_triggers and budget is None:
+            with profile_stage('trigger.project_kb'):
                 project_local = query_by_triggers_in(
                     proj_triggers,
                     kb_root=project_kb,
                     limit=limit,
                 )
-                for entry in project_local:
-                    eid = entry.get('id', '')
-                    if eid not in seen_ids:
-                        seen_ids.add(eid)
-                        result['knowledge']['project_local'].append(entry)
+            for entry in project_local:
+                eid = entry.get('id', '')
+                if eid not in seen_ids:
+                    seen_ids.add(eid)
+                    result['knowledge']['project_local'].append(entry)
 
     # 4b. 全局知识库检索 — 根据 mode 选择路径
-    raw_query = user_input or ' '.join(sorted(all_triggers))
     matched: List[Dict[str, Any]] = []
-
-    if mode == 'semantic' and raw_query:
-        matched = query_semantic(raw_query, limit=limit * 2)
-    elif mode == 'hybrid' and raw_query:
-        matched = query_hybrid(raw_query, limit=limit * 2)
-    elif all_triggers:
-        matched = query_by_triggers(list(all_triggers), limit=limit * 2)
+    # Over-fetch a little to survive dedup against project-local hits and the
+    # min-relevance gate; BM25F ranking keeps the needed margin small.
+    fetch_limit = max(limit, math.ceil(limit * TRIGGER_CANDIDATE_FACTOR))
+    kb_roots = [project_kb, get_kb_root()] if federated else None
+    if kb_roots:
+        fetch_limit *= len(kb_roots)
+
+    # 会话内相同检索直接复用上一轮的候选集（知识库 index.json 未变化时）
+    state = trigger_session.load_session(session_id) if session_id else None
+    search_key = fingerprint = cached = None
+    if state is not None:
+        search_key = json.dumps([mode, raw_query if mode != 'keyword' else sorted(all_triggers),
+                                 fetch_limit, [str(r) for r in kb_roots or [get_kb_root()]]],
+                                ensure_ascii=False)
+        fingerprint = trigger_session.kb_fingerprint(kb_roots or [get_kb_root()])
+        cached = trigger_session.cached_candidates(state, search_key, fingerprint)
+
+    with profile_stage('trigger.search'):
+        found: Optional[List[Dict[str, Any]]] = None
+        if budget is not None:
+            # 限时：项目级知识库检索并入同一阶段调度（project.exact 优先）
+            project_local, found = _search_within_budget(
+                budget, mode, raw_query, all_triggers, proj_triggers, project_kb,
+                kb_roots, limit, fetch_limit, search_global=cached is None,
+            )
+            for entry in project_local:
+                eid = entry.get('id', '')
+                if eid not in seen_ids:
+                    seen_ids.add(eid)
+                    result['knowledge']['project_local'].append(entry)
+        if cached is not None:
+            matched = cached
+            profile_count('cache.session_candidates.hits')
+        elif found is not None:
+            matched = found
+        elif mode == 'semantic' and raw_query:
+            matched = query_semantic(raw_query, limit=fetch_limit, kb_roots=kb_roots)
+        elif mode == 'hybrid' and raw_query:
+            matched = query_hybrid(raw_query, limit=fetch_limit, kb_roots=kb_roots)
+        elif all_triggers:
+            matched = query_by_triggers(list(all_triggers), limit=fetch_limit)
+    # 预算内跳过了阶段的候选集不完整，不缓存
+    if state is not None and cached is None and not (budget and budget.skipped):
+        trigger_session.store_candidates(state, search_key, fingerprint, matched)
 
     # Deduplicate and split by relevance with min/high thresholds from config.
     # MIN_RELEVANCE_THRESHOLD gates out entries with zero keyword match that
@@ -267,7 +505,9 @@ def trigger_knowledge(
                  else entry.get('_match_score', 0))
         if score < min_threshold:
             continue   # exclude irrelevant entries entirely
-        if score >= high_threshold:
+        if federated and entry.get('_kb_root') == str(project_kb):
+            result['knowledge']['project_local'].append(entry)
+        elif score >= high_threshold:
             result['knowledge']['high_relevance'].append(entry)
         else:
             result['knowledge']['medium_relevance'].append(entry)
@@ -275,20 +515,40 @@ def trigger_knowledge(
     result['knowledge']['project_local'] = result['knowledge']['project_local'][:limit]
     result['knowledge']['high_relevance'] = result['knowledge']['high_relevance'][:limit]
     result['knowledge']['medium_relevance'] = result['knowledge']['medium_relevance'][:limit]
+    trace_set('mode', mode)
+    trace_count('candidates', len(matched))
+    trace_count('results', sum(len(result['knowledge'][k])
+                               for k in ('project_local', 'high_relevance', 'medium_relevance')))
 
     # 5. 根据检测到的场景/问题补充查询（仅填充 by_category，不直接展示）
-    if result['detected']['scenarios']:
-        for scenario in result['detected']['scenarios'][:2]:
-            entries = query_by_category('scenario', limit=2)
-            if entries:
-                result['knowledge']['by_category'][f'scenario:{scenario}'] = entries
-
-    if result['detected']['problems']:
-        for problem in result['detected']['problems'][:2]:
-            entries = query_by_category('problem', limit=2)
-            if entries:
-                result['knowledge']['by_category'][f'problem:{problem}'] = entries
-
+    #    走 index.json 的 scenario_index / problem_index；旧知识库没有该索引时
+    #    退回到按分类读取（同一分类只读一次）
+    def _by_category() -> None:
+        legacy: Dict[str, List[Dict[str, Any]]] = {}
+        for category, names in (('scenario', result['detected']['scenarios'][:2]),
+                                ('problem', result['detected']['problems'][:2])):
+            for name in names:
+                entries = query_by_label(category, name, limit=2)
+                if entries is None:
+                    if category not in legacy:
+                        legacy[category] = query_by_category(category, limit=2)
+                    entries = legacy[category]
+                if entries:
+                    result['knowledge']['by_category'][f'{category}:{name}'] = entries
+
+    with profile_stage('trigger.by_category'):
+        if budget is None:
+            _by_category()
+        elif result['detected']['scenarios'] or result['detected']['problems']:
+            budget.run('category', _by_category)
+
+    if budget is not None:
+        result['deadline'] = budget.to_dict()
+        trace_set('deadline_skipped', len(budget.skipped))
+
+    if state is not None:
+        trigger_session.apply_delta(result, state)
+        trigger_session.save_session(state)
     return result
 
 
@@ -355,6 +615,83 @@ def _format_entry(content: Dict[str, Any], char_limit: int) -> List[str]:
     return lines
 
 
+# (entry id, updated_at, char budget) → rendered markdown block
+_render_cache: 'OrderedDict[Tuple[str, str, int], str]' = OrderedDict()
+_render_lock = threading.Lock()
+_render_loaded: Set[str] = set()   # KB roots whose RENDER_CACHE_FILE was merged in
+_render_dirty = False
+
+
+def _render_key(key: Tuple[str, str, int]) -> str:
+    return '\t'.join(map(str, key))
+
+
+def _load_render_cache(kb_root: Path) -> None:
+    """把 <kb>/RENDER_CACHE_FILE 中的块并入内存缓存（每个知识库只读一次）。"""
+    if str(kb_root) in _render_loaded:
+        return
+    _render_loaded.add(str(kb_root))
+    data = load_json(kb_root / RENDER_CACHE_FILE)
+    blocks = data.get('blocks', {}) if isinstance(data, dict) else {}
+    for raw, block in blocks.items():
+        parts = raw.rsplit('\t', 2)
+        if len(parts) == 3 and parts[2].isdigit() and isinstance(block, str):
+            _render_cache.setdefault((parts[0], parts[1], int(parts[2])), block)
+
+
+def save_render_cache() -> None:
+    """RENDER_CACHE_PERSIST 开启时，把内存中的渲染块写回知识库目录。"""
+    global _render_dirty
+    if not (RENDER_CACHE_PERSIST and _render_dirty):
+        return
+    with _render_lock:
+        blocks = {_render_key(k): v for k, v in _render_cache.items()}
+        _render_dirty = False
+    try:
+        atomic_write_json(get_kb_root() / RENDER_CACHE_FILE, {'blocks': blocks})
+    except OSError:
+        pass
+
+
+def clear_render_cache() -> None:
+    """清空内存中的渲染缓存。"""
+    with _render_lock:
+        _render_cache.clear()
+        _render_loaded.clear()
+
+
+def _render_entry(entry: Dict[str, Any], char_limit: int) -> str:
+    """
+    渲染单个条目的 markdown 块（标题 + 预算内字段），带缓存。
+
+    键为 (条目 id, updated_at, 字符预算)：条目被更新时 updated_at 改变，旧块自然失效。
+    没有 id / updated_at 的条目直接渲染。
+    """
+    global _render_dirty
+    entry_id, updated_at = entry.get('id'), entry.get('updated_at')
+    key = (str(entry_id), str(updated_at), char_limit) if entry_id and updated_at else None
+    if key is not None:
+        with _render_lock:
+            block = _render_cache.get(key)
+            if block is not None:
+                _render_cache.move_to_end(key)
+                return block
+
+    name = entry.get('name', 'Unknown')
+    category = entry.get('category', '')
+    lines = [f"\n### [{category}] {name}"]
+    lines.extend(_format_entry(entry.get('content', {}), char_limit))
+    block = '\n'.join(lines)
+
+    if key is not None:
+        with _render_lock:
+            _render_cache[key] = block
+            while len(_render_cache) > RENDER_CACHE_SIZE:
+                _render_cache.popitem(last=False)
+            _render_dirty = True
+    return block
+
+
 def format_for_context(knowledge_result: Dict[str, Any]) -> str:
     """将知识结果格式化为可嵌入上下文的格式，使用动态字符预算。
 
@@ -362,6 +699,8 @@ def format_for_context(knowledge_result: Dict[str, Any]) -> str:
       ## 项目相关知识  — 来自项目级 KB，完全隔离跨项目噪音
       ## 相关知识      — 全局 KB 高相关（score >= HIGH_RELEVANCE_THRESHOLD）
       ## 可能相关      — 全局 KB 中等相关（MIN_THRESHOLD <= score < HIGH_THRESHOLD）
+
+    各条目的渲染块来自 _render_entry 的缓存，这里只做拼接。
     """
     lines: List[str] = []
 
@@ -369,20 +708,21 @@ def format_for_context(knowledge_result: Dict[str, Any]) -> str:
     high_rel = knowledge_result.get('knowledge', {}).get('high_relevance', [])
     med_rel = knowledge_result.get('knowledge', {}).get('medium_relevance', [])
 
+    delivered = knowledge_result.get('knowledge', {}).get('already_delivered', [])
+
     total_entries = len(proj_local) + len(high_rel) + len(med_rel)
     if total_entries == 0:
-        return ''
+        return _format_delivered(delivered)
+
+    if RENDER_CACHE_PERSIST:
+        with _render_lock:
+            _load_render_cache(get_kb_root())
 
     # Project-local entries get their own budget on top of global budget
     if proj_local:
         per_entry = PROJECT_LOCAL_BUDGET // min(len(proj_local), 5)
         lines.append("## 项目相关知识")
-        for entry in proj_local[:5]:
-            name = entry.get('name', 'Unknown')
-            category = entry.get('category', '')
-            content = entry.get('content', {})
-            lines.append(f"\n### [{category}] {name}")
-            lines.extend(_format_entry(content, per_entry))
+        lines.extend(_render_entry(entry, per_entry) for entry in proj_local[:5])
 
     # Global KB budget split between high and medium sections
     high_budget = int(CONTEXT_BUDGET * 0.7) if med_rel else CONTEXT_BUDGET
@@ -391,26 +731,100 @@ def format_for_context(knowledge_result: Dict[str, Any]) -> str:
     if high_rel:
         per_entry = high_budget // min(len(high_rel), 5)
         lines.append("\n## 相关知识" if proj_local else "## 相关知识")
-        for entry in high_rel[:5]:
-            name = entry.get('name', 'Unknown')
-            category = entry.get('category', '')
-            content = entry.get('content', {})
-            lines.append(f"\n### [{category}] {name}")
-            lines.extend(_format_entry(content, per_entry))
+        lines.extend(_render_entry(entry, per_entry) for entry in high_rel[:5])
 
     if med_rel:
         per_entry = med_budget // min(len(med_rel), 3)
         lines.append("\n## 可能相关")
-        for entry in med_rel[:3]:
-            name = entry.get('name', 'Unknown')
-            category = entry.get('category', '')
-            content = entry.get('content', {})
-            lines.append(f"\n### [{category}] {name}")
-            lines.extend(_format_entry(content, per_entry))
+        lines.extend(_render_entry(entry, per_entry) for entry in med_rel[:3])
 
+    save_render_cache()
+    if delivered:
+        lines.append('\n' + _format_delivered(delivered))
     return '\n'.join(lines)
 
 
+def _format_delivered(delivered: List[Dict[str, Any]]) -> str:
+    """会话中已下发条目的紧凑引用（--session）。"""
+    if not delivered:
+        return ''
+    refs = '; '.join(f"[{ref.get('category', '')}] {ref.get('name', '')}" for ref in delivered)
+    return f"## 已提供（见前文）\n{refs}"
+
+
+def explain_trigger(**kwargs: Any) -> Dict[str, Any]:
+    """
+    以 profiling 模式运行 trigger_knowledge（--explain / --profile）。
+
+    Returns:
+        {"result": trigger_knowledge 结果, "profile": 各阶段耗时/候选数/文件读取/缓存命中/评分明细}
+    """
+    with profiling() as profile:
+        result = trigger_knowledge(**kwargs)
+    return {'result': result, 'profile': profile.to_dict()}
+
+
+def trigger_knowledge_many(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    批量触发：整批共享 index.json / 条目加载和项目检测结果（见 query.batch_cache）。
+
+    Args:
+        requests: trigger_knowledge 的关键字参数字典列表
+
+    Returns:
+        与 requests 一一对应的结果列表
+    """
+    with batch_cache():
+        return [trigger_knowledge(**request) for request in requests]
+
+
+def _request_from_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """NDJSON 行（键同命令行参数: input/project/trigger/limit/mode/session/deadline_ms）→ trigger_knowledge 参数。"""
+    triggers = spec.get('trigger')
+    if isinstance(triggers, str):
+        triggers = [t.strip() for t in triggers.split(',') if t.strip()]
+    return {
+        'user_input': spec.get('input'),
+        'project_dir': spec.get('project'),
+        'explicit_triggers': triggers or None,
+        'limit': spec.get('limit') or 5,
+        'mode': spec.get('mode') or 'hybrid',
+        'session_id': spec.get('session'),
+        'deadline_ms': spec.get('deadline_ms'),
+    }
+
+
+def run_batch(lines: Iterable[str], out: TextIO) -> int:
+    """
+    trigger.py --batch: 每行一个 JSON 请求，逐行输出 {"index", "ok", "result"}；
+    请求带 "format": "context"/"triggers" 时额外输出渲染后的 "output"。
+
+    Returns:
+        失败的行数
+    """
+    def _handle(spec: Dict[str, Any]) -> Dict[str, Any]:
+        request = _request_from_spec(spec)
+        if not any([request['user_input'], request['project_dir'], request['explicit_triggers']]):
+            raise ValueError('input, project or trigger is required')
+        result = trigger_knowledge(**request)
+        record: Dict[str, Any] = {'result': result}
+        fmt = spec.get('format')
+        if fmt in ('context', 'triggers'):
+            record['output'] = format_result(result, fmt)
+        return record
+
+    return stream_batch(lines, out, _handle)
+
+
+def format_result(result: Dict[str, Any], fmt: str = 'json') -> str:
+    """按输出格式渲染 trigger_knowledge 的结果: json / context / triggers。"""
+    if fmt == 'context':
+        return format_for_context(result)
+    if fmt == 'triggers':
+        return ','.join(result.get('triggers_used', []))
+    return json.dumps(result, indent=2, ensure_ascii=False, default=str)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Detect and trigger relevant knowledge based on input',
@@ -423,6 +837,10 @@ Examples:
   python knowledge_trigger.py --trigger react,hooks,performance
   python knowledge_trigger.py --input "..." --format context
   python knowledge_trigger.py --input "..." --format context --project /path/to/project
+  cat requests.ndjson | python knowledge_trigger.py --batch
+  python knowledge_trigger.py --input "..." --explain
+  python knowledge_trigger.py --input "..." --format context --session <id>
+  python knowledge_trigger.py --input "..." --deadline-ms 50
         """
     )
     
@@ -434,8 +852,24 @@ Examples:
                         default='json', help='Output format')
     parser.add_argument('--mode', '-m', choices=['keyword', 'semantic', 'hybrid'],
                         default='hybrid', help='Search mode (default: hybrid)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Read NDJSON requests from stdin '
+                             '({"input": ..., "project": ..., "trigger": ...}) and stream NDJSON results')
+    parser.add_argument('--explain', '--profile', dest='explain', action='store_true',
+                        help='Output JSON {result, profile}: per-stage wall time, candidate counts, '
+                             'files read, cache hits and per-entry score breakdown')
+    parser.add_argument('--session', '-s', dest='session_id',
+                        help='Session id: only return entries not yet delivered in this session '
+                             '(others are listed in knowledge.already_delivered)')
+    parser.add_argument('--deadline-ms', type=float, dest='deadline_ms',
+                        help='Latency budget: run search stages in priority order (project exact, '
+                             'global exact, BM25, partial, fuzzy, category) and skip the rest once '
+                             'the budget is spent; the result lists them under "deadline"')
 
     args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(1 if run_batch(sys.stdin, sys.stdout) else 0)
     
     if not any([args.input, args.project, args.trigger]):
         parser.print_help()
@@ -445,20 +879,21 @@ Examples:
     if args.trigger:
         explicit_triggers = [t.strip() for t in args.trigger.split(',')]
     
-    result = trigger_knowledge(
+    kwargs = dict(
         user_input=args.input,
         project_dir=args.project,
         explicit_triggers=explicit_triggers,
         limit=args.limit,
         mode=args.mode,
+        session_id=args.session_id,
+        deadline_ms=args.deadline_ms,
     )
-    
-    if args.format == 'json':
-        print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
-    elif args.format == 'context':
-        print(format_for_context(result))
-    elif args.format == 'triggers':
-        print(','.join(result.get('triggers_used', [])))
+    if args.explain:
+        print(format_result(explain_trigger(**kwargs), 'json'))
+        return
+
+    result = trigger_knowledge(**kwargs)
+    print(format_result(result, args.format))
 
 
 if __name__ == '__main__':
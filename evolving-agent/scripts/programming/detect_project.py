@@ -4,12 +4,24 @@ Project Detector
 
 Detect project type and tech stack from project files.
 Supports: package.json, go.mod, pom.xml, requirements.txt, Cargo.toml, etc.
+
+detect_project_cached() keeps the result in <project>/.opencode/tech_cache.json,
+keyed by the (path, mtime, size) of every DETECTION_RULES manifest, so repeated
+detection in one project skips all parsing until a manifest changes.
+
+detect_workspace() handles monorepos (npm/pnpm workspaces, Go multi-module,
+Maven/Gradle multi-module): a bounded walk that skips node_modules, .git,
+vendor and build output finds every directory holding a manifest, packages
+are parsed on a thread pool, and per-package results are cached in
+<root>/.opencode/workspace_tech_cache.json by manifest fingerprint.
 """
 
+import copy
 import json
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Union
 import xml.etree.ElementTree as ET
@@ -142,6 +154,30 @@ DETECTION_RULES = {
 }
 
 
+CACHE_FILE = Path('.opencode') / 'tech_cache.json'
+CACHE_VERSION = 1
+
+# project path → (fingerprints, result) for repeated calls in one process
+_memo: Dict[str, tuple] = {}
+
+WORKSPACE_CACHE_FILE = Path('.opencode') / 'workspace_tech_cache.json'
+# Directories never descended into (dependencies, VCS, build output); any other
+# dot-directory is skipped as well
+IGNORED_DIRS = {
+    'node_modules', 'vendor', 'bower_components', 'jspm_packages',
+    'build', 'dist', 'out', 'target', 'bin', 'obj', 'coverage',
+    'venv', 'env', 'site-packages', '__pycache__',
+}
+DEFAULT_MAX_DEPTH = 6
+DEFAULT_MAX_DIRS = 5000
+DEFAULT_WORKERS = 8
+
+BASE_TECHS = ['javascript', 'python', 'go', 'java', 'kotlin', 'rust']
+FRAMEWORKS = ['react', 'vue', 'angular', 'nextjs', 'nuxt', 'django', 'flask',
+              'fastapi', 'spring-boot', 'spring', 'quarkus', 'gin', 'fiber',
+              'echo', 'actix', 'axum', 'express', 'fastify', 'nestjs', 'ktor']
+
+
 def get_nested_field(data: Dict[str, Any], field_path: str) -> Any:
     """Get nested field from dict using dot notation."""
     keys = field_path.split('.')
@@ -233,61 +269,169 @@ def parse_gradle_file(file_path: Path) -> str:
         return ""
 
 
+# Regex-rule parsers: which text parser feeds them and the re flags they use
+TEXT_PARSERS = {
+    'gomod': (parse_gomod_file, 0),
+    'requirements': (parse_requirements_file, re.MULTILINE | re.IGNORECASE),
+    'gradle': (parse_gradle_file, 0),
+    'toml_simple': (parse_toml_simple, 0),
+}
+
+
+_REGEX_META = set('.^$*+?{}[]()|\\')
+
+
+def _literal_prefix(pattern: str) -> tuple:
+    r"""
+    Split a regex into its literal prefix atoms and the rest:
+    r'gorm\.io/x\b' → (['g', 'o', 'r', 'm', r'\.', 'i', 'o', '/', 'x'], r'\b').
+    A leading '^' is kept as an atom; patterns with '|' get no prefix.
+    """
+    if '|' in pattern:
+        return [], pattern
+    atoms: List[str] = []
+    i = 0
+    if pattern.startswith('^'):
+        atoms.append('^')
+        i = 1
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            atom, step = pattern[i:i + 2], 2
+        elif ch not in _REGEX_META:
+            atom, step = re.escape(ch), 1
+        else:
+            break
+        if pattern[i + step:i + step + 1] in ('*', '+', '?', '{'):
+            break  # quantified atom belongs to the rest
+        atoms.append(atom)
+        i += step
+    return atoms, pattern[i:]
+
+
+def _trie_regex(node: dict) -> str:
+    """Regex for a prefix trie; each rule ends in an empty marker group (?P<rN>)."""
+    branches = [f"(?:{rest})(?P<r{idx}>)" if rest else f"(?P<r{idx}>)"
+                for rest, idx in node.get('', [])]
+    branches += [atom + _trie_regex(child) for atom, child in node.items() if atom != '']
+    return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+
+class RuleMatcher:
+    """
+    One manifest's detection rules compiled for a single pass.
+
+    - json: rules grouped by parent field ('dependencies', ...) into
+      {name: [tech]} tables, probed with the manifest's own keys
+    - pom: {groupId prefix: [tech]} table, probed with every prefix of each
+      parsed groupId
+    - regex parsers: the rules' literal prefixes merged into one trie-shaped
+      regex wrapped in a lookahead, so finditer tries every start position
+      once and walks shared prefixes once (re does not factor alternations
+      itself; a flat alternation re-tries every rule at every position)
+
+    Cost is linear in manifest size rather than in rule count. A scan
+    reports one rule per start position, so rules whose literal prefix is a
+    prefix of another rule's (they may match at the same position) are
+    re-checked individually when the scan misses them.
+    """
+
+    def __init__(self, rules: dict):
+        self.parser = rules.get('parser')
+        self.base_tech = rules.get('base_tech')
+        detect = rules.get('detect', [])
+        self.techs = [rule['tech'] for rule in detect]
+        self.fields: Dict[tuple, Dict[str, List[int]]] = {}
+        self.group_ids: Dict[str, List[int]] = {}
+        self.regex = None
+        self.recheck: List[tuple] = []
+
+        patterns: List[tuple] = []
+        for idx, rule in enumerate(detect):
+            if self.parser == 'json' and rule.get('field'):
+                *parent, name = rule['field'].split('.')
+                self.fields.setdefault(tuple(parent), {}).setdefault(name, []).append(idx)
+            elif self.parser == 'pom' and rule.get('groupId'):
+                self.group_ids.setdefault(rule['groupId'], []).append(idx)
+            elif self.parser in TEXT_PARSERS and rule.get('pattern'):
+                pattern = rule['pattern']
+                if self.parser == 'toml_simple':
+                    pattern = re.escape(pattern.lower())
+                patterns.append((idx, pattern))
+        if patterns:
+            self._compile_patterns(patterns, TEXT_PARSERS[self.parser][1])
+
+    def _compile_patterns(self, patterns: List[tuple], flags: int) -> None:
+        trie: dict = {}
+        for idx, pattern in patterns:
+            atoms, rest = _literal_prefix(pattern)
+            node = trie
+            for atom in atoms:
+                node = node.setdefault(atom, {})
+            node.setdefault('', []).append((rest, idx))
+        self.regex = re.compile(f"(?={_trie_regex(trie)})", flags)
+
+        by_idx = dict(patterns)
+
+        def visit(node: dict, ancestor_ends: bool) -> int:
+            """Mark rules sharing a start position with another; returns rule count."""
+            ends = node.get('', [])
+            below = sum(visit(child, ancestor_ends or bool(ends))
+                        for atom, child in node.items() if atom != '')
+            if ends and (ancestor_ends or below or len(ends) > 1):
+                self.recheck.extend((idx, re.compile(by_idx[idx], flags)) for _, idx in ends)
+            return below + len(ends)
+
+        visit(trie, False)
+
+    def _scan(self, content: str) -> set:
+        """Rule indexes whose pattern occurs in content."""
+        hits = {int(m.lastgroup[1:]) for m in self.regex.finditer(content)}
+        for idx, regex in self.recheck:
+            if idx not in hits and regex.search(content):
+                hits.add(idx)
+        return hits
+
+    def match(self, file_path: Path) -> List[str]:
+        hits: set = set()
+        if self.parser == 'json':
+            data = parse_json_file(file_path)
+            for parent, table in self.fields.items():
+                node = get_nested_field(data, '.'.join(parent)) if parent else data
+                if isinstance(node, dict):
+                    for name in (table.keys() & node.keys()):
+                        if node[name] is not None:
+                            hits.update(table[name])
+        elif self.parser == 'pom':
+            for gid in parse_pom_file(file_path):
+                for end in range(1, len(gid) + 1):
+                    hits.update(self.group_ids.get(gid[:end], ()))
+        elif self.regex is not None:
+            hits = self._scan(TEXT_PARSERS[self.parser][0](file_path))
+
+        detected = [self.base_tech] if self.base_tech else []
+        for idx in sorted(hits):
+            if self.techs[idx] not in detected:
+                detected.append(self.techs[idx])
+        return detected
+
+
+# id(rules) → (rules, matcher); holding `rules` keeps its id from being reused
+_matchers: Dict[int, tuple] = {}
+
+
+def compile_rules(rules: dict) -> RuleMatcher:
+    """Compiled (and cached) matcher for one DETECTION_RULES entry."""
+    cached = _matchers.get(id(rules))
+    if cached is None or cached[0] is not rules:
+        cached = (rules, RuleMatcher(rules))
+        _matchers[id(rules)] = cached
+    return cached[1]
+
+
 def detect_tech_from_file(file_path: Path, rules: dict) -> list:
-    """Detect tech stack from a single file."""
-    detected = []
-    parser = rules.get('parser')
-    
-    # Add base tech
-    if rules.get('base_tech'):
-        detected.append(rules['base_tech'])
-    
-    if parser == 'json':
-        data = parse_json_file(file_path)
-        for rule in rules.get('detect', []):
-            field = rule.get('field')
-            if field and get_nested_field(data, field) is not None:
-                detected.append(rule['tech'])
-    
-    elif parser == 'gomod':
-        content = parse_gomod_file(file_path)
-        for rule in rules.get('detect', []):
-            pattern = rule.get('pattern')
-            if pattern and re.search(pattern, content):
-                detected.append(rule['tech'])
-    
-    elif parser == 'pom':
-        group_ids = parse_pom_file(file_path)
-        for rule in rules.get('detect', []):
-            group_id = rule.get('groupId')
-            if group_id:
-                for gid in group_ids:
-                    if gid.startswith(group_id):
-                        detected.append(rule['tech'])
-                        break
-    
-    elif parser == 'requirements':
-        content = parse_requirements_file(file_path)
-        for rule in rules.get('detect', []):
-            pattern = rule.get('pattern')
-            if pattern and re.search(pattern, content, re.MULTILINE | re.IGNORECASE):
-                detected.append(rule['tech'])
-    
-    elif parser == 'toml_simple':
-        content = parse_toml_simple(file_path)
-        for rule in rules.get('detect', []):
-            pattern = rule.get('pattern')
-            if pattern and pattern.lower() in content:
-                detected.append(rule['tech'])
-    
-    elif parser == 'gradle':
-        content = parse_gradle_file(file_path)
-        for rule in rules.get('detect', []):
-            pattern = rule.get('pattern')
-            if pattern and re.search(pattern, content):
-                detected.append(rule['tech'])
-    
-    return list(set(detected))
+    """Detect tech stack from a single file (base tech first, then rule order)."""
+    return compile_rules(rules).match(file_path)
 
 
 def detect_project(project_dir: str) -> dict:
@@ -317,24 +461,192 @@ def detect_project(project_dir: str) -> dict:
         file_path = project_path / config_file
         if file_path.exists():
             result['files_found'].append(config_file)
-            detected = detect_tech_from_file(file_path, rules)
-            
-            for tech in detected:
-                if tech in ['javascript', 'python', 'go', 'java', 'kotlin', 'rust']:
-                    if tech not in result['base_tech']:
-                        result['base_tech'].append(tech)
-                elif tech in ['react', 'vue', 'angular', 'nextjs', 'nuxt', 'django', 'flask', 
-                             'fastapi', 'spring-boot', 'spring', 'quarkus', 'gin', 'fiber', 
-                             'echo', 'actix', 'axum', 'express', 'fastify', 'nestjs', 'ktor']:
-                    if tech not in result['frameworks']:
-                        result['frameworks'].append(tech)
-                else:
-                    if tech not in result['tools']:
-                        result['tools'].append(tech)
+            add_techs(result, detect_tech_from_file(file_path, rules))
     
     return result
 
 
+def add_techs(result: dict, techs: List[str]) -> None:
+    """Sort techs into result's base_tech / frameworks / tools (no duplicates)."""
+    for tech in techs:
+        if tech in BASE_TECHS:
+            bucket = result['base_tech']
+        elif tech in FRAMEWORKS:
+            bucket = result['frameworks']
+        else:
+            bucket = result['tools']
+        if tech not in bucket:
+            bucket.append(tech)
+
+
+def manifest_fingerprints(project_path: Path) -> Dict[str, Optional[List[int]]]:
+    """[mtime_ns, size] of each DETECTION_RULES manifest (None when absent)."""
+    fingerprints: Dict[str, Optional[List[int]]] = {}
+    for config_file in DETECTION_RULES:
+        try:
+            st = os.stat(project_path / config_file)
+        except OSError:
+            fingerprints[config_file] = None
+        else:
+            fingerprints[config_file] = [st.st_mtime_ns, st.st_size]
+    return fingerprints
+
+
+def _load_cache(cache_path: Path) -> Optional[dict]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get('version') == CACHE_VERSION else None
+
+
+def _save_cache(cache_path: Path, data: dict) -> None:
+    """Best effort: an unwritable project only loses the cache."""
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def detect_project_cached(project_dir: str) -> dict:
+    """
+    detect_project() with a per-project cache.
+
+    Only the manifests are stat()ed on a hit; any manifest appearing,
+    disappearing or changing mtime/size invalidates the cached result.
+    """
+    project_path = Path(project_dir).resolve()
+    if not project_path.is_dir():
+        return detect_project(project_dir)
+
+    key = str(project_path)
+    fingerprints = manifest_fingerprints(project_path)
+    memo = _memo.get(key)
+    if memo is not None and memo[0] == fingerprints:
+        return copy.deepcopy(memo[1])
+
+    cache_path = project_path / CACHE_FILE
+    cached = _load_cache(cache_path)
+    if cached and cached.get('project') == key and cached.get('manifests') == fingerprints:
+        result = cached['result']
+    else:
+        result = detect_project(key)
+        _save_cache(cache_path, {
+            'version': CACHE_VERSION,
+            'project': key,
+            'manifests': fingerprints,
+            'result': result,
+        })
+    _memo[key] = (fingerprints, result)
+    return copy.deepcopy(result)
+
+
+def find_manifest_dirs(root: Path, max_depth: int = DEFAULT_MAX_DEPTH,
+                       max_dirs: int = DEFAULT_MAX_DIRS) -> tuple:
+    """
+    Breadth-first walk for directories that hold a DETECTION_RULES manifest.
+
+    Returns:
+        (dirs, truncated): matching directories in walk order (root first),
+        and whether max_dirs stopped the walk early.
+    """
+    manifests = set(DETECTION_RULES)
+    found: List[Path] = []
+    queue = [(root, 0)]
+    visited = 0
+    while queue:
+        next_queue = []
+        for directory, depth in queue:
+            if visited >= max_dirs:
+                return found, True
+            visited += 1
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if any(e.name in manifests and e.is_file() for e in entries):
+                found.append(directory)
+            if depth >= max_depth:
+                continue
+            for e in sorted(entries, key=lambda e: e.name):
+                if (e.is_dir(follow_symlinks=False) and not e.name.startswith('.')
+                        and e.name not in IGNORED_DIRS):
+                    next_queue.append((Path(e.path), depth + 1))
+        queue = next_queue
+    return found, False
+
+
+def detect_workspace(project_dir: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                     max_workers: int = DEFAULT_WORKERS, use_cache: bool = True) -> dict:
+    """
+    Detect the tech stack of every package in a monorepo / workspace.
+
+    Returns:
+        dict with keys:
+        - root: Resolved workspace root
+        - packages: [{path (relative, '.' for the root), base_tech, frameworks,
+          tools, files_found}, ...] in walk order
+        - aggregate: base_tech / frameworks / tools over all packages, with
+          files_found as package-relative paths
+        - truncated: True when the walk hit its directory limit
+    """
+    root = Path(project_dir).resolve()
+    if not root.is_dir():
+        return {'error': f'Directory not found: {project_dir}'}
+
+    dirs, truncated = find_manifest_dirs(root, max_depth)
+    rel_paths = [d.relative_to(root).as_posix() or '.' for d in dirs]
+    fingerprints = [manifest_fingerprints(d) for d in dirs]
+
+    cache_path = root / WORKSPACE_CACHE_FILE
+    cached = (_load_cache(cache_path) or {}) if use_cache else {}
+    cached_packages = cached.get('packages', {}) if cached.get('root') == str(root) else {}
+
+    results: List[Optional[dict]] = []
+    stale: List[int] = []
+    for i, (rel, fp) in enumerate(zip(rel_paths, fingerprints)):
+        hit = cached_packages.get(rel)
+        if hit and hit.get('manifests') == fp:
+            results.append(hit['result'])
+        else:
+            results.append(None)
+            stale.append(i)
+
+    if stale:
+        workers = max(1, min(max_workers, len(stale)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, result in zip(stale, pool.map(lambda i: detect_project(str(dirs[i])), stale)):
+                results[i] = result
+
+    packages = []
+    aggregate: dict = {'base_tech': [], 'frameworks': [], 'tools': [], 'files_found': []}
+    for rel, result in zip(rel_paths, results):
+        packages.append({'path': rel, **result})
+        add_techs(aggregate, result['base_tech'] + result['frameworks'] + result['tools'])
+        aggregate['files_found'].extend(
+            name if rel == '.' else f"{rel}/{name}" for name in result['files_found'])
+
+    if use_cache and (stale or set(cached_packages) != set(rel_paths)):
+        _save_cache(cache_path, {
+            'version': CACHE_VERSION,
+            'root': str(root),
+            'packages': {rel: {'manifests': fp, 'result': result}
+                         for rel, fp, result in zip(rel_paths, fingerprints, results)},
+        })
+
+    return {'root': str(root), 'packages': packages, 'aggregate': aggregate,
+            'truncated': truncated}
+
+
 def main():
     import argparse
     
@@ -346,6 +658,7 @@ Examples:
   python detect_project.py /path/to/project
   python detect_project.py . --format json
   python detect_project.py . --format markdown
+  python detect_project.py . --workspace --max-depth 4
         """
     )
     
@@ -362,13 +675,43 @@ Examples:
         help='Output format'
     )
     
+    parser.add_argument(
+        '--workspace', '-w',
+        action='store_true',
+        help='Detect every package of a monorepo / workspace'
+    )
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        default=DEFAULT_MAX_DEPTH,
+        help=f'Workspace walk depth (default: {DEFAULT_MAX_DEPTH})'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Parser threads for --workspace (default: {DEFAULT_WORKERS})'
+    )
+    
     args = parser.parse_args()
-    result = detect_project(args.project_dir)
+    if args.workspace:
+        result = detect_workspace(args.project_dir, args.max_depth, args.jobs)
+    else:
+        result = detect_project(args.project_dir)
     
     if 'error' in result:
         print(result['error'], file=sys.stderr)
         sys.exit(1)
     
+    if args.workspace and args.format != 'json':
+        if args.format == 'markdown':
+            print(f"## Workspace Detection Result\n")
+            for package in result['packages']:
+                all_tech = package['base_tech'] + package['frameworks'] + package['tools']
+                print(f"- **{package['path']}**: {', '.join(all_tech) or 'unknown'}")
+            print()
+        result = result['aggregate']
+    
     if args.format == 'json':
         print(json.dumps(result, indent=2))
     elif args.format == 'markdown':
@@ -14,6 +14,7 @@ Evolving Agent - Unified CLI Entry Point
     project     项目检测和经验管理
     info        显示环境信息
     task        任务管理
+    trace       汇总耗时追踪 (EVOLVING_TRACE)
 
 示例:
     python run.py mode --status
@@ -85,6 +86,7 @@ from core.task_manager import (
     get_status_summary,
     cleanup_stale_session,
 )
+from core.tracing import span
 
 
 __version__ = "2.0.0"
@@ -434,11 +436,6 @@ def _handle_trigger_inprocess(args: argparse.Namespace, remaining: List[str]) ->
     if _knowledge_dir not in sys.path:
         sys.path.insert(0, _knowledge_dir)
 
-    from knowledge.trigger import (
-        trigger_knowledge,
-        format_for_context,
-    )
-
     user_input = getattr(args, 'input', None)
     project_dir = getattr(args, 'project', None)
     mode = getattr(args, 'mode', 'hybrid') or 'hybrid'
@@ -455,33 +452,133 @@ def _handle_trigger_inprocess(args: argparse.Namespace, remaining: List[str]) ->
                 break
     if trigger_val:
         explicit_triggers = [t.strip() for t in trigger_val.split(',')]
+    explain = '--explain' in remaining or '--profile' in remaining
+    session_id = None
+    for i, arg in enumerate(remaining):
+        if arg == '--session' and i + 1 < len(remaining):
+            session_id = remaining[i + 1]
+            break
+    deadline_ms = None
+    for i, arg in enumerate(remaining):
+        if arg == '--deadline-ms' and i + 1 < len(remaining):
+            try:
+                deadline_ms = float(remaining[i + 1])
+            except ValueError:
+                print(f"Error: --deadline-ms expects a number, got {remaining[i + 1]!r}", file=sys.stderr)
+                return 1
+            break
+
+    if '--batch' in remaining:
+        # NDJSON requests on stdin → NDJSON results on stdout
+        code = _run_via_daemon("trigger", ["--batch"])
+        if code is not None:
+            return code
+        from knowledge.trigger import run_batch
+        return 1 if run_batch(sys.stdin, sys.stdout) else 0
 
     if not any([user_input, project_dir, explicit_triggers]):
         print("Error: --input, --project, or --trigger is required", file=sys.stderr)
         return 1
 
+    # Warm daemon first (`knowledge serve`); fall back to in-process if none is listening
+    from knowledge import daemon
+    response = daemon.request({
+        'op': 'trigger',
+        'args': {
+            'user_input': user_input,
+            'project_dir': os.path.abspath(project_dir) if project_dir else None,
+            'explicit_triggers': explicit_triggers,
+            'limit': limit,
+            'mode': mode,
+            'format': fmt,
+            'explain': explain,
+            'session_id': session_id,
+            'deadline_ms': deadline_ms,
+        },
+    })
+    if response is not None:
+        if not response.get('ok'):
+            print(f"Error during knowledge trigger: {response.get('error')}", file=sys.stderr)
+            return 1
+        print(response['output'])
+        return 0
+
+    from knowledge.trigger import trigger_knowledge, explain_trigger, format_result
+
     try:
-        result = trigger_knowledge(
+        kwargs = dict(
             user_input=user_input,
             project_dir=project_dir,
             explicit_triggers=explicit_triggers,
             limit=limit,
             mode=mode,
+            session_id=session_id,
+            deadline_ms=deadline_ms,
         )
+        if explain:
+            result, fmt = explain_trigger(**kwargs), 'json'
+        else:
+            result = trigger_knowledge(**kwargs)
     except Exception as e:
         print(f"Error during knowledge trigger: {e}", file=sys.stderr)
         return 1
 
-    if fmt == 'json':
-        print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
-    elif fmt == 'context':
-        print(format_for_context(result))
-    elif fmt == 'triggers':
-        print(','.join(result.get('triggers_used', [])))
-
+    print(format_result(result, fmt))
     return 0
 
 
+def _run_via_daemon(script: str, script_args: List[str]) -> Any:
+    """
+    Run a knowledge script's main() in the warm daemon.
+
+    Returns:
+        Exit code, or None if no daemon is listening (caller runs a subprocess)
+    """
+    _knowledge_dir = str(_SCRIPTS_DIR / "knowledge")
+    if _knowledge_dir not in sys.path:
+        sys.path.insert(0, _knowledge_dir)
+    from knowledge import daemon
+
+    stdin_text = ''
+    if '--from-json' in script_args or '--batch' in script_args:
+        # Only consume stdin once a daemon is known to answer; otherwise the
+        # fallback subprocess must still be able to read it.
+        if os.environ.get('KNOWLEDGE_DAEMON', '1') == '0' or not daemon.is_running():
+            return None
+        stdin_text = sys.stdin.read()
+    response = daemon.request({
+        'op': 'run', 'script': script, 'argv': script_args, 'stdin': stdin_text,
+    })
+    if response is None:
+        return None
+    if not response.get('ok'):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        return 1
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stderr.write(response.get('stderr', ''))
+    return response.get('code', 0)
+
+
+def _handle_serve(args: argparse.Namespace) -> int:
+    """Handle 'knowledge serve': run (or stop) the warm query daemon."""
+    _knowledge_dir = str(_SCRIPTS_DIR / "knowledge")
+    if _knowledge_dir not in sys.path:
+        sys.path.insert(0, _knowledge_dir)
+    from knowledge import daemon
+
+    path = Path(args.socket) if getattr(args, 'socket', None) else None
+    if getattr(args, 'stop', False):
+        if daemon.stop(path):
+            print("Knowledge daemon stopped")
+            return 0
+        print("Knowledge daemon is not running", file=sys.stderr)
+        return 1
+    idle_timeout = getattr(args, 'max_idle', None)
+    if idle_timeout is None:
+        idle_timeout = daemon.DAEMON_IDLE_TIMEOUT
+    return daemon.serve(path, idle_timeout=idle_timeout)
+
+
 def handle_knowledge(args: argparse.Namespace, remaining: List[str]) -> int:
     """处理 knowledge 命令"""
     action = args.action
@@ -490,6 +587,9 @@ def handle_knowledge(args: argparse.Namespace, remaining: List[str]) -> int:
     if action == "trigger":
         return _handle_trigger_inprocess(args, remaining)
 
+    if action == "serve":
+        return _handle_serve(args)
+
     # Scripts mapping — these actions are delegated to sub-scripts
     mapping = {
         "query": ("knowledge", "query"),
@@ -522,6 +622,10 @@ def handle_knowledge(args: argparse.Namespace, remaining: List[str]) -> int:
         if action == "migrate":
             if getattr(args, 'dry_run', False) and '--dry-run' not in delegated_remaining:
                 delegated_remaining.append('--dry-run')
+        if action in ("query", "store"):
+            code = _run_via_daemon(script, delegated_remaining)
+            if code is not None:
+                return code
         return run_script(mod, script, delegated_remaining)
     
     # Built-in actions
@@ -588,7 +692,7 @@ def handle_knowledge(args: argparse.Namespace, remaining: List[str]) -> int:
         return 0
     
     print(f"Unknown action: {action}", file=sys.stderr)
-    print("Available actions: query, store, summarize, trigger, gc, decay, export, import, dashboard", file=sys.stderr)
+    print("Available actions: query, store, summarize, trigger, serve, gc, decay, export, import, dashboard", file=sys.stderr)
     return 1
 
 
@@ -870,6 +974,21 @@ def handle_verify(args: argparse.Namespace, remaining: List[str]) -> int:
     print(json.dumps({"status": "ok"}))
     return 0
 
+
+def handle_trace(args: argparse.Namespace, remaining: List[str]) -> int:
+    """汇总 EVOLVING_TRACE 记录的 span，按操作输出 p50/p95/p99"""
+    from core.tracing import main as tracing_main
+
+    argv = [args.action]
+    if args.file:
+        argv += ["--file", args.file]
+    if args.name:
+        argv += ["--name", args.name]
+    if args.json:
+        argv.append("--json")
+    return tracing_main(argv)
+
+
 def create_parser() -> argparse.ArgumentParser:
     """创建参数解析器"""
     parser = argparse.ArgumentParser(
@@ -881,9 +1000,12 @@ def create_parser() -> argparse.ArgumentParser:
   python run.py mode --status              查看进化模式状态
   python run.py mode --init                初始化进化模式
   python run.py knowledge query --stats    查看知识库统计
+  python run.py knowledge serve            启动常驻查询服务 (trigger/query/store 自动使用)
   python run.py github fetch <url>         获取 GitHub 仓库信息
   python run.py project detect .           检测当前项目技术栈
   python run.py info                       显示环境信息
+  EVOLVING_TRACE=1 python run.py ...       记录耗时 span 到 <知识库>/.trace.jsonl
+  python run.py trace report               按操作汇总 p50/p95/p99 耗时
         """
     )
     
@@ -919,8 +1041,8 @@ def create_parser() -> argparse.ArgumentParser:
     )
     knowledge_parser.add_argument(
         "action",
-        choices=["query", "store", "summarize", "trigger", "gc", "decay", "export", "import", "dashboard", "migrate"],
-        help="操作: query(查询), store(存储), summarize(归纳), trigger(触发), gc(垃圾回收), decay(衰减), export(导出), import(导入), dashboard(仪表板), migrate(迁移到项目级知识库)"
+        choices=["query", "store", "summarize", "trigger", "serve", "gc", "decay", "export", "import", "dashboard", "migrate"],
+        help="操作: query(查询), store(存储), summarize(归纳), trigger(触发), serve(常驻查询服务), gc(垃圾回收), decay(衰减), export(导出), import(导入), dashboard(仪表板), migrate(迁移到项目级知识库)"
     )
     knowledge_parser.add_argument(
         "--threshold",
@@ -978,6 +1100,20 @@ def create_parser() -> argparse.ArgumentParser:
         default="hybrid",
         help="搜索模式: keyword(关键词), semantic(语义), hybrid(混合, 默认)"
     )
+    knowledge_parser.add_argument(
+        "--socket",
+        help="serve: Unix socket 路径 (默认: 知识库目录下 .knowledge.sock)"
+    )
+    knowledge_parser.add_argument(
+        "--max-idle",
+        type=float,
+        help="serve: 空闲多少秒后自动退出 (默认: 3600, 0 表示不退出)"
+    )
+    knowledge_parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="serve: 停止正在运行的常驻查询服务"
+    )
     
     # -------------------------------------------------------------------------
     # github 子命令
@@ -1115,6 +1251,36 @@ def create_parser() -> argparse.ArgumentParser:
         help="Verify manifest.json checksums",
     )
     
+    # -------------------------------------------------------------------------
+    # trace 子命令
+    # -------------------------------------------------------------------------
+    trace_parser = subparsers.add_parser(
+        "trace",
+        help="汇总耗时追踪 (EVOLVING_TRACE)",
+        description="按操作汇总 EVOLVING_TRACE 记录的 span 耗时 (p50/p95/p99)"
+    )
+    trace_parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["report", "clear"],
+        default="report",
+        help="操作: report(汇总), clear(清空追踪文件)"
+    )
+    trace_parser.add_argument(
+        "--file",
+        help="追踪文件 (默认: $EVOLVING_TRACE 或 <知识库>/.trace.jsonl)"
+    )
+    trace_parser.add_argument(
+        "--name",
+        default="",
+        help="只汇总以此前缀开头的操作，如 knowledge."
+    )
+    trace_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="以 JSON 格式输出"
+    )
+    
     return parser
 
 
@@ -1144,11 +1310,17 @@ def main() -> int:
         "version": handle_version,
         "meta": handle_meta,
         "verify": handle_verify,
+        "trace": handle_trace,
     }
     
     handler = handlers.get(args.module)
     if handler:
-        return handler(args, remaining)
+        if args.module == "trace":
+            return handler(args, remaining)
+        with span(f"run.{args.module}", action=getattr(args, "action", None)) as current:
+            code = handler(args, remaining)
+            current.set("exit_code", code)
+            return code
     else:
         print(f"Unknown module: {args.module}", file=sys.stderr)
         return 1
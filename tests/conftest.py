@@ -2,9 +2,12 @@
 Pytest configuration and fixtures.
 """
 
+import json
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add all scripts directories to Python path
 scripts_dirs = [
     Path(__file__).parent.parent / 'evolving-agent' / 'scripts',
@@ -13,3 +16,84 @@ scripts_dirs = [
 for scripts_dir in scripts_dirs:
     if str(scripts_dir) not in sys.path:
         sys.path.insert(0, str(scripts_dir))
+
+
+# =============================================================================
+# Knowledge base fixtures
+# =============================================================================
+
+@pytest.fixture
+def make_kb(tmp_path, monkeypatch):
+    """
+    Factory writing a minimal knowledge base and making it the active one.
+
+    make_kb(entries, name="knowledge") writes each entry to
+    <tmp_path>/<name>/<dir>/<id>.json, where entries is a list (all in
+    experiences/) or a {dir: [entry, ...]} mapping, plus an index.json
+    trigger_index built from the entries' triggers. KNOWLEDGE_BASE_PATH is
+    pointed at it and query memo caches are cleared. Returns the KB root.
+    """
+    def _make(entries, name="knowledge"):
+        kb_root = tmp_path / name
+        by_dir = entries if isinstance(entries, dict) else {"experiences": entries}
+        trigger_index = {}
+        for dir_name, items in by_dir.items():
+            (kb_root / dir_name).mkdir(parents=True, exist_ok=True)
+            for entry in items:
+                path = kb_root / dir_name / f"{entry['id']}.json"
+                path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+                for trigger in entry.get("triggers", []):
+                    trigger_index.setdefault(trigger, []).append(entry["id"])
+        (kb_root / "index.json").write_text(
+            json.dumps({"trigger_index": trigger_index}, ensure_ascii=False), encoding="utf-8")
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(kb_root))
+        query = sys.modules.get("query")
+        if query is not None:
+            query.clear_memo()
+        return kb_root
+
+    return _make
+
+
+@pytest.fixture
+def result_ids():
+    """Ids in a trigger result's project_local / high / medium sections, in order."""
+    def _ids(result):
+        return [e["id"] for section in ("project_local", "high_relevance", "medium_relevance")
+                for e in result["knowledge"][section]]
+
+    return _ids
+
+
+# =============================================================================
+# Performance gate (tests/perf) — opt-in with `pytest -m perf`
+# =============================================================================
+
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "performance regression gate (pytest -m perf)")
+    group.addoption("--perf-update-baseline", action="store_true",
+                    help="Store this run as the baseline for the machine profile")
+    group.addoption("--perf-tolerance", action="append", default=[],
+                    help="Allowed slowdown, e.g. 0.25, trigger=0.5, bm25:cold=0.4 (repeatable)")
+    parser.addini("perf_sizes", "KB sizes benchmarked by the perf gate", default="100,1k")
+    parser.addini("perf_repeat", "Samples per operation in the perf gate", default="5")
+    parser.addini("perf_tolerance", "Default perf tolerances (same syntax as --perf-tolerance)",
+                  type="args", default=["0.25"])
+    parser.addini("perf_min_delta_ms", "Ignore perf changes smaller than this", default="1.0")
+
+
+def pytest_collection_modifyitems(config, items):
+    """perf tests only run when selected explicitly (`-m perf`)."""
+    if "perf" in (config.option.markexpr or ""):
+        return
+    skip = pytest.mark.skip(reason="perf benchmarks are opt-in: run with -m perf")
+    for item in items:
+        if item.get_closest_marker("perf"):
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    report = getattr(config, "_perf_report", None)
+    if report:
+        terminalreporter.section("perf gate")
+        terminalreporter.write_line(report)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmarks over synthetic knowledge bases.
+
+For each size a fresh KB is generated (synthetic_kb.generate_kb) and these
+operations are timed:
+
+    keyword   query._query_by_triggers_single_root
+    bm25      embedding.search
+    trigger   trigger.trigger_knowledge (hybrid)
+    stats     dashboard.generate_stats
+    gc        lifecycle.gc (dry_run — the scan is the cost; nothing is deleted)
+    store     store.store_knowledge
+    decay     lifecycle.decay_unused (mutates the KB, so it runs last)
+
+keyword / bm25 / trigger are measured in three cache phases:
+    cold   in-process caches dropped and the on-disk BM25 cache deleted
+    disk   in-process caches dropped, on-disk caches kept (a fresh CLI process)
+    warm   everything cached in this process (daemon / batch mode)
+The other operations have no caches of their own and report phase "steady".
+
+Usage:
+    python tests/perf/bench.py [--sizes 100,1k,10k,100k] [--repeat 5]
+                               [--seed 42] [--out results.json] [--workdir DIR]
+
+Results (--out) are JSON:
+    {"schema": 1, "created_at", "machine": {...}, "git": {...}, "config": {...},
+     "results": [{"size", "op", "phase", "samples_ms", "median_ms", "mean_ms",
+                  "stdev_ms", "min_ms", "max_ms"}, ...]}
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from synthetic_kb import generate_kb, make_entry, parse_size
+
+import dashboard
+import embedding
+import lifecycle
+import query
+import store
+import trigger
+
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = '100,1k,10k,100k'
+CACHE_PHASES = ('cold', 'disk', 'warm')
+
+# Fixed query mix: Chinese, English and mixed inputs over the generator vocabulary
+QUERIES = [
+    '修复 react 跨域问题',
+    'docker deployment request timeout',
+    'redis 缓存 memory leak',
+    'typescript 类型错误',
+    'postgres slow query 索引',
+    'kafka 消息队列 retry backoff',
+    'vue 状态管理 hydration mismatch',
+    'orderpayflow 并发 race condition',
+]
+TRIGGERS = [
+    ['react', '跨域'],
+    ['docker', 'timeout'],
+    ['redis', '缓存', 'memory'],
+    ['typescript', '类型错误'],
+    ['postgres', 'slow', '索引'],
+    ['kafka', '消息队列'],
+    ['vue', '状态管理'],
+    ['orderpayflow', '并发'],
+]
+
+
+def machine_profile() -> Dict[str, Any]:
+    """Host facts that decide whether two result files are comparable."""
+    return {
+        'node': platform.node(),
+        'system': platform.system(),
+        'release': platform.release(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'jieba': query.HAS_JIEBA,
+    }
+
+
+def git_info() -> Dict[str, Any]:
+    root = Path(__file__).parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=root, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    return {'commit': commit, 'dirty': dirty}
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        'samples_ms': [round(s, 3) for s in samples],
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'stdev_ms': round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def drop_caches(kb_root: Path, disk: bool) -> None:
+    """Forget everything this process cached; with disk=True also the on-disk BM25 cache."""
+    query.clear_memo()
+    embedding.invalidate_cache()
+    if disk:
+        (kb_root / '.bm25_cache.json').unlink(missing_ok=True)
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(fn: Callable[[int], Any], repeat: int,
+            before: Optional[Callable[[], None]] = None) -> List[float]:
+    """Time fn(i) repeat times; `before` runs untimed ahead of each sample."""
+    samples = []
+    for i in range(repeat):
+        if before is not None:
+            before()
+        samples.append(_time(lambda: fn(i)))
+    return samples
+
+
+def bench_size(size: int, repeat: int, seed: int, workdir: Path,
+               log: Callable[[str], None]) -> List[Dict[str, Any]]:
+    kb_root = workdir / f"kb-{size}"
+    if kb_root.exists():
+        shutil.rmtree(kb_root)
+    os.environ['KNOWLEDGE_BASE_PATH'] = str(kb_root)
+    drop_caches(kb_root, disk=True)
+
+    results: List[Dict[str, Any]] = []
+
+    def record(op: str, phase: str, samples: List[float]) -> None:
+        row = {'size': size, 'op': op, 'phase': phase, **summarize(samples)}
+        results.append(row)
+        log(f"  {op:<8} {phase:<6} median {row['median_ms']:>10.2f} ms"
+            f"  stdev {row['stdev_ms']:>9.2f}")
+
+    log(f"size {size}")
+    record('generate', 'steady', [_time(lambda: generate_kb(kb_root, size, seed))])
+
+    read_ops: Dict[str, Callable[[int], Any]] = {
+        'keyword': lambda i: query._query_by_triggers_single_root(
+            TRIGGERS[i % len(TRIGGERS)], 10, kb_root),
+        'bm25': lambda i: embedding.search(QUERIES[i % len(QUERIES)], kb_root, top_k=10),
+        'trigger': lambda i: trigger.trigger_knowledge(
+            user_input=QUERIES[i % len(QUERIES)], mode='hybrid'),
+    }
+    for phase in CACHE_PHASES:
+        for op, fn in read_ops.items():
+            if phase == 'warm':
+                fn(0)
+                before = None
+            else:
+                before = (lambda cold=phase == 'cold': drop_caches(kb_root, disk=cold))
+                if phase == 'disk':
+                    embedding.search(QUERIES[0], kb_root)  # make sure the disk cache exists
+            record(op, phase, measure(fn, repeat, before))
+
+    record('stats', 'steady', measure(lambda i: dashboard.generate_stats(kb_root), repeat))
+    record('gc', 'steady', measure(lambda i: lifecycle.gc(dry_run=True), repeat))
+
+    def store_one(i: int) -> None:
+        entry = make_entry(size + i, seed)
+        store.store_knowledge(entry['category'], entry['name'], entry['content'],
+                              sources=entry['sources'], tags=entry['tags'], kb_root=kb_root)
+    record('store', 'steady', measure(store_one, repeat))
+    record('decay', 'steady', measure(lambda i: lifecycle.decay_unused(), repeat))
+
+    drop_caches(kb_root, disk=False)
+    return results
+
+
+def run(sizes: List[int], repeat: int = 5, seed: int = 42, workdir: Optional[Path] = None,
+        log: Callable[[str], None] = lambda msg: None) -> Dict[str, Any]:
+    """Run the suite and return the result document (see module docstring)."""
+    own_workdir = workdir is None
+    workdir = Path(workdir or tempfile.mkdtemp(prefix='evolving-bench-'))
+    saved_kb = os.environ.get('KNOWLEDGE_BASE_PATH')
+    try:
+        results: List[Dict[str, Any]] = []
+        for size in sizes:
+            results.extend(bench_size(size, repeat, seed, workdir, log))
+    finally:
+        if saved_kb is None:
+            os.environ.pop('KNOWLEDGE_BASE_PATH', None)
+        else:
+            os.environ['KNOWLEDGE_BASE_PATH'] = saved_kb
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'schema': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_profile(),
+        'git': git_info(),
+        'config': {'sizes': sizes, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Knowledge base scaling benchmarks")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated KB sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=5, help="Samples per operation")
+    parser.add_argument('--seed', type=int, default=42, help="Synthetic KB seed")
+    parser.add_argument('--out', help="Write JSON results to this file (default: stdout)")
+    parser.add_argument('--workdir', help="Keep generated KBs here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    doc = run(sizes, max(1, args.repeat), args.seed,
+              Path(args.workdir) if args.workdir else None,
+              log=lambda msg: print(msg, file=sys.stderr))
+    text = json.dumps(doc, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + '\n', encoding='utf-8')
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Keyword dictionary scan benchmarks over synthetic session transcripts.
+
+For each size (bytes of UTF-8 text) a transcript is generated and these
+operations are timed:
+
+    session   core.trigger_detector.extract_session_summary
+    detect    trigger.detect_scenarios / detect_problems / detect_action_type
+    category  summarizer.infer_category
+    tech      summarizer.extract_tech_stack
+    readme    github.extract_patterns.detect_tech_stack
+
+Only public functions are called, so the same script runs on any checkout:
+record one tree's results with --out, then gate the other against them with
+compare.py (pass its own --baseline file so it does not overwrite the KB
+baseline).
+
+Usage:
+    python tests/perf/bench_keywords.py [--sizes 64k,256k,1m] [--repeat 5]
+                                        [--seed 42] [--out results.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench import SCHEMA_VERSION, git_info, machine_profile, measure, summarize
+from synthetic_kb import parse_size
+
+import summarizer
+import trigger
+from core.trigger_detector import extract_session_summary
+from github.extract_patterns import detect_tech_stack
+
+DEFAULT_SIZES = '64k,256k,1m'
+
+TRANSCRIPT_LINES = [
+    '用户: 帮我修复登录接口的跨域报错',
+    '助手: 我先尝试调整 nginx 配置，第一次尝试失败了',
+    'error: connection refused while calling the api',
+    'def handler(req):\n    return db.query(sql)',
+    '助手: 换成 dev proxy 之后成功了，任务完成',
+    '用户: 很好，记住这个做法，以后都这样配置',
+    'log: GET /api/users 200 12ms via redis cache',
+    '助手: 这个项目用 react + typescript，构建走 webpack 和 docker',
+    '用户: 页面渲染很慢，列表滚动卡顿',
+]
+
+
+def transcript(size: int, seed: int = 42) -> str:
+    """Deterministic chat-like text of about `size` UTF-8 bytes."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    total = 0
+    while total < size:
+        line = rng.choice(TRANSCRIPT_LINES)
+        lines.append(line)
+        total += len(line.encode('utf-8')) + 1
+    return '\n'.join(lines)
+
+
+def _detect(text: str) -> Any:
+    # detection results are memoized per input; time the scan, not the cache
+    clear = getattr(getattr(trigger, '_detect_labels', None), 'cache_clear', None)
+    if clear is not None:
+        clear()
+    return (trigger.detect_scenarios(text), trigger.detect_problems(text),
+            trigger.detect_action_type(text))
+
+
+OPS: Dict[str, Callable[[str], Any]] = {
+    'session': extract_session_summary,
+    'detect': _detect,
+    'category': summarizer.infer_category,
+    'tech': summarizer.extract_tech_stack,
+    'readme': detect_tech_stack,
+}
+
+
+def bench_size(size: int, repeat: int, seed: int,
+               log: Callable[[str], None]) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    log(f"size {size}")
+    text = transcript(size, seed)
+    for op, fn in OPS.items():
+        row = {'size': size, 'op': op, 'phase': 'transcript',
+               **summarize(measure(lambda i: fn(text), repeat))}
+        results.append(row)
+        log(f"  {op:<9} median {row['median_ms']:>10.2f} ms  stdev {row['stdev_ms']:>9.2f}")
+    return results
+
+
+def run(sizes: List[int], repeat: int = 5, seed: int = 42,
+        log: Callable[[str], None] = lambda msg: None) -> Dict[str, Any]:
+    """Run the suite and return the result document (bench.py schema)."""
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        results.extend(bench_size(size, repeat, seed, log))
+    return {
+        'schema': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_profile(),
+        'git': git_info(),
+        'config': {'suite': 'keywords', 'sizes': sizes, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Keyword dictionary scan benchmarks")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated transcript sizes in bytes (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=5, help="Samples per operation")
+    parser.add_argument('--seed', type=int, default=42, help="Transcript seed")
+    parser.add_argument('--out', help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    doc = run(sizes, max(1, args.repeat), args.seed,
+              log=lambda msg: print(msg, file=sys.stderr))
+    text = json.dumps(doc, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + '\n', encoding='utf-8')
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Summarizer extraction benchmarks over synthetic session transcripts.
+
+For each size (bytes of UTF-8 text) two inputs are generated and these
+operations are timed:
+
+    extract   summarizer.extract_knowledge_from_text
+    validate  summarizer.validate_input
+    tech      summarizer.extract_tech_stack
+
+Phases name the input shape:
+    transcript    a realistic mix of chat lines, code and knowledge markers
+    adversarial   one long line of pattern heads whose tails never follow
+                  (the shape that made the old DOTALL patterns backtrack)
+
+Usage:
+    python tests/perf/bench_summarizer.py [--sizes 64k,1m,4m] [--repeat 5]
+                                          [--seed 42] [--out results.json]
+
+The result document has the bench.py schema, so compare.py gates it the same
+way (pass its own --baseline file so it does not overwrite the KB baseline).
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench import SCHEMA_VERSION, git_info, machine_profile, measure, summarize
+from synthetic_kb import parse_size
+
+import summarizer
+
+DEFAULT_SIZES = '64k,1m,4m'
+
+TRANSCRIPT_LINES = [
+    '用户: 帮我看一下这个接口为什么超时',
+    '助手: 我检查了数据库连接池配置，发现最大连接数过小。',
+    '问题：接口超时 → 解决：增大连接池到 20',
+    '注意：修改后需要重启服务',
+    'def handler(req):\n    return db.query(sql)',
+    '遇到 timeout 错误，最终通过增加索引解决',
+    '建议：以后所有慢查询都先 explain',
+    'error: connection refused fixed by restarting redis',
+    '教训：没有压测就上线 → 避免：发布前跑基准',
+    '这个项目都使用 pnpm 管理依赖',
+    '我们应该在 CI 里加上类型检查，',
+    '不要在循环里开事务。',
+    'log: GET /api/users 200 12ms',
+]
+
+ADVERSARIAL_UNIT = '问题：遇到错误 通过 修复了 error 这个项目 '
+
+
+def transcript(size: int, seed: int = 42) -> str:
+    """Deterministic chat-like text of about `size` UTF-8 bytes."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    total = 0
+    while total < size:
+        line = rng.choice(TRANSCRIPT_LINES)
+        lines.append(line)
+        total += len(line.encode('utf-8')) + 1
+    return '\n'.join(lines)
+
+
+def adversarial(size: int, seed: int = 42) -> str:
+    """A single line of about `size` bytes full of heads that never complete."""
+    return ADVERSARIAL_UNIT * max(1, size // len(ADVERSARIAL_UNIT.encode('utf-8')))
+
+
+INPUTS: Dict[str, Callable[[int, int], str]] = {
+    'transcript': transcript,
+    'adversarial': adversarial,
+}
+
+OPS: Dict[str, Callable[[str], Any]] = {
+    'extract': summarizer.extract_knowledge_from_text,
+    'validate': summarizer.validate_input,
+    'tech': summarizer.extract_tech_stack,
+}
+
+
+def bench_size(size: int, repeat: int, seed: int,
+               log: Callable[[str], None]) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    log(f"size {size}")
+    for phase, make in INPUTS.items():
+        text = make(size, seed)
+        for op, fn in OPS.items():
+            row = {'size': size, 'op': op, 'phase': phase,
+                   **summarize(measure(lambda i: fn(text), repeat))}
+            results.append(row)
+            log(f"  {op:<8} {phase:<11} median {row['median_ms']:>10.2f} ms"
+                f"  stdev {row['stdev_ms']:>9.2f}")
+    return results
+
+
+def run(sizes: List[int], repeat: int = 5, seed: int = 42,
+        log: Callable[[str], None] = lambda msg: None) -> Dict[str, Any]:
+    """Run the suite and return the result document (bench.py schema)."""
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        results.extend(bench_size(size, repeat, seed, log))
+    return {
+        'schema': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_profile(),
+        'git': git_info(),
+        'config': {'suite': 'summarizer', 'sizes': sizes, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarizer extraction benchmarks")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated transcript sizes in bytes (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=5, help="Samples per operation")
+    parser.add_argument('--seed', type=int, default=42, help="Transcript seed")
+    parser.add_argument('--out', help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    doc = run(sizes, max(1, args.repeat), args.seed,
+              log=lambda msg: print(msg, file=sys.stderr))
+    text = json.dumps(doc, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + '\n', encoding='utf-8')
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate: compare bench.py results with a stored baseline.
+
+Baselines are bench.py result documents kept per machine profile under
+tests/perf/baselines/<profile>.json (commit the one for your CI runner).
+An operation regresses when its median is slower than the baseline median
+by more than its tolerance, by more than an absolute floor (sub-millisecond
+ops jitter by more than any sane percentage) AND by more than NOISE_SIGMAS
+combined standard deviations of the two runs. `generate` only times the
+synthetic KB builder and is reported but never gated.
+
+Tolerances are given as "0.25" (default for every op), "trigger=0.5"
+(one op, all phases) or "bm25:cold=0.4" (one op in one phase).
+
+Usage:
+    python tests/perf/compare.py save results.json [--profile NAME]
+    python tests/perf/compare.py check results.json [--baseline PATH]
+        [--tolerance 0.25] [--tolerance trigger=0.5] [--min-delta-ms 1.0]
+
+Pytest (opt-in, see tests/conftest.py):
+    pytest -m perf [--perf-update-baseline]
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 1.0
+NOISE_SIGMAS = 2.0
+UNGATED_OPS = {'generate'}
+
+Key = Tuple[int, str, str]
+
+
+def profile_name(machine: Dict[str, Any]) -> str:
+    """Stable id for a machine profile, e.g. 'linux-x86_64-8cpu-cpython3.11'."""
+    python = '.'.join(str(machine.get('python', '')).split('.')[:2])
+    parts = [
+        machine.get('system') or 'unknown',
+        machine.get('machine') or 'unknown',
+        f"{machine.get('cpu_count') or 0}cpu",
+        f"{machine.get('implementation', 'python')}{python}",
+    ]
+    if machine.get('jieba'):
+        parts.append('jieba')
+    return re.sub(r'[^a-z0-9.\-]+', '_', '-'.join(parts).lower())
+
+
+def baseline_path(profile: str, baseline_dir: Path = BASELINE_DIR) -> Path:
+    return Path(baseline_dir) / f"{profile}.json"
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(doc: Dict[str, Any], path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    return path
+
+
+def parse_tolerances(specs: Iterable[str]) -> Dict[str, float]:
+    """['0.3', 'trigger=0.5', 'bm25:cold=0.4'] → {'*': 0.3, 'trigger': 0.5, 'bm25:cold': 0.4}"""
+    tolerances = {'*': DEFAULT_TOLERANCE}
+    for spec in specs:
+        for item in str(spec).replace(',', ' ').split():
+            key, sep, value = item.rpartition('=')
+            try:
+                tolerances[key if sep else '*'] = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid tolerance: {item!r}") from None
+    return tolerances
+
+
+def tolerance_for(tolerances: Dict[str, float], op: str, phase: str) -> float:
+    for key in (f"{op}:{phase}", op, '*'):
+        if key in tolerances:
+            return tolerances[key]
+    return DEFAULT_TOLERANCE
+
+
+def _index(doc: Dict[str, Any]) -> Dict[Key, Dict[str, Any]]:
+    return {(r['size'], r['op'], r['phase']): r for r in doc.get('results', [])}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            tolerances: Optional[Dict[str, float]] = None,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """
+    Diff two result documents row by row.
+
+    Returns:
+        One row per (size, op, phase) with base/current median and stdev,
+        change ratio, the tolerance applied and a status of
+        'ok' | 'regression' | 'improved' | 'new' | 'missing' | 'info'.
+    """
+    tolerances = tolerances or {'*': DEFAULT_TOLERANCE}
+    base_rows, cur_rows = _index(baseline), _index(current)
+    rows: List[Dict[str, Any]] = []
+    for key in sorted(set(base_rows) | set(cur_rows)):
+        size, op, phase = key
+        base, cur = base_rows.get(key), cur_rows.get(key)
+        tolerance = tolerance_for(tolerances, op, phase)
+        row: Dict[str, Any] = {
+            'size': size, 'op': op, 'phase': phase, 'tolerance': tolerance,
+            'base_ms': base['median_ms'] if base else None,
+            'base_stdev_ms': base.get('stdev_ms', 0.0) if base else None,
+            'current_ms': cur['median_ms'] if cur else None,
+            'current_stdev_ms': cur.get('stdev_ms', 0.0) if cur else None,
+            'change': None,
+        }
+        if base is None or cur is None:
+            row['status'] = 'new' if base is None else 'missing'
+        else:
+            delta = cur['median_ms'] - base['median_ms']
+            row['change'] = delta / base['median_ms'] if base['median_ms'] > 0 else 0.0
+            noise = NOISE_SIGMAS * math.hypot(row['base_stdev_ms'], row['current_stdev_ms'])
+            if op in UNGATED_OPS:
+                row['status'] = 'info'
+            elif abs(delta) <= max(min_delta_ms, noise) or abs(row['change']) <= tolerance:
+                row['status'] = 'ok'
+            else:
+                row['status'] = 'regression' if delta > 0 else 'improved'
+        rows.append(row)
+    return rows
+
+
+def regressions(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [r for r in rows if r['status'] == 'regression']
+
+
+def _ms(value: Optional[float], stdev: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    return f"{value:.2f} ±{stdev or 0.0:.2f}"
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """Fixed-width diff table: median ± stdev, change and status per row."""
+    header = ('size', 'op', 'phase', 'baseline ms', 'current ms', 'change', 'tol', 'status')
+    lines = [header]
+    for r in rows:
+        change = f"{r['change'] * 100:+.1f}%" if r['change'] is not None else '-'
+        lines.append((str(r['size']), r['op'], r['phase'],
+                      _ms(r['base_ms'], r['base_stdev_ms']),
+                      _ms(r['current_ms'], r['current_stdev_ms']),
+                      change, f"{r['tolerance'] * 100:.0f}%",
+                      r['status'].upper() if r['status'] == 'regression' else r['status']))
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return '\n'.join('  '.join(cell.rjust(w) if i in (0, 3, 4, 5, 6) else cell.ljust(w)
+                               for i, (cell, w) in enumerate(zip(line, widths))).rstrip()
+                     for line in lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark results with a baseline")
+    parser.add_argument('action', choices=['save', 'check'])
+    parser.add_argument('results', help="bench.py --out JSON file")
+    parser.add_argument('--profile', help="Machine profile name (default: from the results)")
+    parser.add_argument('--baseline', help="Baseline file (default: baselines/<profile>.json)")
+    parser.add_argument('--tolerance', action='append', default=[],
+                        help="Allowed slowdown, e.g. 0.25, trigger=0.5, bm25:cold=0.4 (repeatable)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Ignore changes smaller than this many ms")
+    parser.add_argument('--json', action='store_true', help="Output diff rows as JSON")
+    args = parser.parse_args(argv)
+
+    current = load_results(Path(args.results))
+    profile = args.profile or profile_name(current.get('machine', {}))
+    path = Path(args.baseline) if args.baseline else baseline_path(profile)
+
+    if args.action == 'save':
+        print(f"Baseline saved: {save_baseline(current, path)}")
+        return 0
+
+    if not path.exists():
+        print(f"No baseline for profile {profile}: {path}", file=sys.stderr)
+        return 2
+    rows = compare(load_results(path), current, parse_tolerances(args.tolerance),
+                   args.min_delta_ms)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(format_table(rows))
+    found = regressions(rows)
+    if found:
+        print(f"\n{len(found)} regression(s) beyond tolerance", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic knowledge base for scaling benchmarks.
+
+Entry i depends only on (seed, i), so a 1k KB is the first 1k entries of the
+10k one and results stay comparable across versions. Entries mix Chinese and
+English names, are spread over every CATEGORY_DIRS category, carry the
+content fields of the matching store_* helper, and get their triggers from
+store.extract_triggers — the same way real entries do.
+
+Entries and indexes are written directly in the on-disk format of
+store_knowledge (entry files, per-category index.json, global index.json);
+going through store_knowledge itself rewrites index.json on every call and
+would make a 100k KB take hours to build.
+
+Usage:
+    python tests/perf/synthetic_kb.py /tmp/kb --size 10k [--seed 42]
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'evolving-agent' / 'scripts'))
+
+from core.config import CATEGORY_DIRS, LABEL_INDEXES
+from store import entry_labels, extract_triggers
+
+
+TECH = [
+    'react', 'vue', 'angular', 'svelte', 'next.js', 'nuxt', 'typescript', 'javascript',
+    'node', 'express', 'nestjs', 'django', 'flask', 'fastapi', 'spring', 'golang',
+    'rust', 'python', 'java', 'kotlin', 'swift', 'flutter', 'docker', 'kubernetes',
+    'nginx', 'redis', 'mysql', 'postgres', 'mongodb', 'kafka', 'rabbitmq', 'graphql',
+    'webpack', 'vite', 'jest', 'pytest', 'vitest', 'playwright', 'terraform', 'grpc',
+]
+
+ZH_TOPICS = [
+    '跨域', '内存泄漏', '性能优化', '部署', '数据库', '缓存', '登录认证', '超时',
+    '并发', '路由', '状态管理', '表单校验', '单元测试', '日志', '权限', '分页',
+    '文件上传', '消息队列', '连接池', '热更新', '打包体积', '类型错误', '异步',
+    '死锁', '索引', '限流', '重试', '监控告警', '国际化', '序列化',
+]
+
+EN_TOPICS = [
+    'cors error', 'memory leak', 'slow query', 'build failure', 'cache invalidation',
+    'auth token refresh', 'request timeout', 'race condition', 'hydration mismatch',
+    'connection reset', 'flaky test', 'bundle size', 'null pointer', 'deadlock',
+    'rate limiting', 'retry backoff', 'schema migration', 'hot reload', 'cold start',
+    'pagination', 'file upload', 'websocket reconnect', 'dependency conflict',
+]
+
+ZH_VERBS = ['修复', '优化', '排查', '解决', '配置', '实现', '重构', '迁移']
+EN_VERBS = ['Fix', 'Optimize', 'Debug', 'Handle', 'Configure', 'Implement', 'Refactor']
+
+ZH_PHRASES = [
+    '在生产环境复现', '升级依赖后出现', '高并发场景下', '只在首次加载时', '本地正常线上异常',
+    '需要加监控', '通过配置开关控制', '先加单元测试再修改', '检查日志定位根因',
+]
+
+EN_PHRASES = [
+    'only reproduces in production', 'after upgrading dependencies', 'under high load',
+    'on the first page load', 'add a regression test first', 'check the logs for the root cause',
+    'guard it behind a feature flag', 'measure before and after',
+]
+
+# Syllables for project-specific component names (orderflow, paygate, ...):
+# gives the trigger vocabulary the long tail real KBs have
+SYLLABLES = ['order', 'pay', 'user', 'cart', 'feed', 'auth', 'sync', 'geo', 'chat', 'media',
+             'search', 'report', 'ship', 'stock', 'notify', 'audit', 'bill', 'task']
+SUFFIXES = ['flow', 'gate', 'hub', 'core', 'worker', 'proxy', 'store', 'bridge', 'kit', 'desk']
+
+LEVELS = ['beginner', 'intermediate', 'advanced']
+PATTERN_KINDS = ['creational', 'structural', 'behavioral', 'architectural', 'concurrency']
+TESTING_TYPES = ['unit', 'integration', 'e2e', 'performance']
+
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """'100' → 100, '10k' → 10000, '1m' → 1000000."""
+    text = text.strip().lower()
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _component(rng: random.Random) -> str:
+    return f"{rng.choice(SYLLABLES)}{rng.choice(SYLLABLES)}{rng.choice(SUFFIXES)}"
+
+
+def _sentence(rng: random.Random, tech: str, topic_zh: str, topic_en: str) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.choice(ZH_VERBS)}{tech} {topic_zh}问题，{rng.choice(ZH_PHRASES)}"
+    return f"{rng.choice(EN_VERBS)} {topic_en} in {tech}, {rng.choice(EN_PHRASES)}"
+
+
+def _content(category: str, rng: random.Random, name: str, tech: str,
+             topic_zh: str, topic_en: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Content dict shaped like the store_<category> helper, plus extra tags."""
+    related = sorted({tech, rng.choice(TECH)})
+    sentences = [_sentence(rng, rng.choice(TECH), rng.choice(ZH_TOPICS), rng.choice(EN_TOPICS))
+                 for _ in range(3)]
+    if category == 'experience':
+        return {'description': sentences[0], 'context': sentences[1], 'solution': sentences[2],
+                'pitfalls': [rng.choice(ZH_PHRASES)], 'related_tech': related}, [topic_zh]
+    if category == 'tech-stack':
+        return {'tech_name': tech, 'version': f"{rng.randint(1, 20)}.{rng.randint(0, 9)}",
+                'best_practices': sentences[:2], 'conventions': [sentences[2]],
+                'common_patterns': [topic_en], 'gotchas': [rng.choice(EN_PHRASES)]}, [tech]
+    if category == 'scenario':
+        return {'scenario_name': name, 'description': sentences[0],
+                'typical_approach': sentences[1], 'steps': sentences,
+                'considerations': [rng.choice(ZH_PHRASES)], 'related_tech': related}, []
+    if category == 'problem':
+        return {'problem_name': name, 'symptoms': [f"{tech} {topic_en}", f"{topic_zh}报错"],
+                'root_causes': [sentences[0]],
+                'solutions': [{'approach': sentences[1], 'code': ''}],
+                'prevention': [sentences[2]]}, [topic_zh]
+    if category == 'testing':
+        framework = rng.choice(['jest', 'pytest', 'vitest', 'playwright'])
+        testing_type = rng.choice(TESTING_TYPES)
+        return {'testing_type': testing_type, 'framework': framework,
+                'best_practices': sentences[:2], 'patterns': [topic_en],
+                'anti_patterns': [sentences[2]], 'example_structure': ''}, \
+            [testing_type, 'testing', framework]
+    if category == 'pattern':
+        kind = rng.choice(PATTERN_KINDS)
+        return {'pattern_name': name, 'category': kind, 'description': sentences[0],
+                'when_to_use': sentences[1], 'structure': '', 'example': sentences[2],
+                'pros': [rng.choice(EN_PHRASES)], 'cons': [rng.choice(ZH_PHRASES)]}, [kind]
+    level = rng.choice(LEVELS)
+    return {'skill_name': name, 'level': level, 'description': sentences[0],
+            'key_concepts': [topic_en, topic_zh], 'practical_tips': sentences[1:],
+            'common_mistakes': [rng.choice(EN_PHRASES)]}, [level]
+
+
+def make_entry(i: int, seed: int = 42, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Build synthetic entry number i.
+
+    Everything except the timestamps (offsets from `now`) is a pure function
+    of (seed, i).
+    """
+    rng = random.Random(f"{seed}:{i}")
+    now = now or datetime.now()
+    categories = list(CATEGORY_DIRS)
+    category = categories[i % len(categories)]
+    tech = rng.choice(TECH)
+    topic_zh = rng.choice(ZH_TOPICS)
+    topic_en = rng.choice(EN_TOPICS)
+    if rng.random() < 0.5:
+        name = f"{rng.choice(ZH_VERBS)}{tech}{topic_zh}问题"
+    else:
+        name = f"{rng.choice(EN_VERBS)} {tech} {topic_en}"
+    if rng.random() < 0.6:
+        name = f"{name} ({_component(rng)})"
+    name = f"{name} #{i}"
+
+    content, tags = _content(category, rng, name, tech, topic_zh, topic_en)
+    created = now - timedelta(days=rng.uniform(0, 400))
+    # Zipf-like usage: most entries are rarely used, a few are hot
+    usage_count = int(rng.paretovariate(1.5)) - 1
+    entry: Dict[str, Any] = {
+        'id': f"{category}-synthetic-{i:06d}",
+        'category': category,
+        'name': name,
+        'triggers': extract_triggers(name, content, tags),
+        'content': content,
+        'sources': [f"session-{rng.randrange(10_000):04d}"],
+        'tags': tags,
+        'created_at': created.isoformat(),
+        'updated_at': created.isoformat(),
+        'usage_count': usage_count,
+        # ~5% below the default gc threshold (0.1)
+        'effectiveness': round(rng.uniform(0.0, 0.1) if rng.random() < 0.05
+                               else rng.uniform(0.1, 1.0), 3),
+    }
+    if usage_count:
+        entry['last_used_at'] = (created + (now - created) * rng.random()).isoformat()
+    return entry
+
+
+def generate_kb(kb_root: Path, size: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Write a synthetic KB with `size` entries under kb_root.
+
+    Returns:
+        {"entries": N, "triggers": distinct triggers, "by_category": {...}}
+    """
+    kb_root = Path(kb_root)
+    now = datetime.now()
+    trigger_index: Dict[str, List[str]] = {}
+    category_index: Dict[str, List[str]] = {d: [] for d in CATEGORY_DIRS.values()}
+    category_entries: Dict[str, List[Dict[str, str]]] = {d: [] for d in CATEGORY_DIRS.values()}
+    label_indexes: Dict[str, Dict[str, List[str]]] = {name: {} for name in LABEL_INDEXES.values()}
+    for cat_dir in CATEGORY_DIRS.values():
+        (kb_root / cat_dir).mkdir(parents=True, exist_ok=True)
+
+    for i in range(size):
+        entry = make_entry(i, seed, now)
+        cat_dir = CATEGORY_DIRS[entry['category']]
+        with open(kb_root / cat_dir / f"{entry['id']}.json", 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        for trigger in entry['triggers']:
+            trigger_index.setdefault(trigger, []).append(entry['id'])
+        category_index[cat_dir].append(entry['id'])
+        if entry['category'] in LABEL_INDEXES:
+            label_index = label_indexes[LABEL_INDEXES[entry['category']]]
+            for label in entry_labels(entry['category'], entry['triggers'], entry['tags']):
+                label_index.setdefault(label, []).append(entry['id'])
+        category_entries[cat_dir].append(
+            {'id': entry['id'], 'name': entry['name'], 'created_at': entry['created_at']})
+
+    stamp = now.isoformat()
+    for cat_dir, items in category_entries.items():
+        with open(kb_root / cat_dir / 'index.json', 'w', encoding='utf-8') as f:
+            json.dump({'entries': items, 'last_updated': stamp}, f, indent=2, ensure_ascii=False)
+
+    by_category = {cat: len(ids) for cat, ids in category_index.items()}
+    index = {
+        'trigger_index': trigger_index,
+        'category_index': category_index,
+        **label_indexes,
+        'stats': {'total_entries': size, 'by_category': by_category},
+        'recent_entries': [eid for ids in category_index.values() for eid in ids[-3:]][:20],
+        'last_updated': stamp,
+    }
+    with open(kb_root / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return {'entries': size, 'triggers': len(trigger_index), 'by_category': by_category}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic knowledge base")
+    parser.add_argument('kb_root', help="Target directory")
+    parser.add_argument('--size', default='1k', help="Entry count, e.g. 100, 1k, 100k")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    print(json.dumps(generate_kb(Path(args.kb_root), parse_size(args.size), args.seed),
+                     ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
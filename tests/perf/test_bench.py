@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic KB generator and the benchmark runner (tests/perf).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import bench
+from synthetic_kb import generate_kb, make_entry, parse_size
+
+
+class TestSyntheticKb:
+
+    def test_parse_size(self):
+        assert [parse_size(s) for s in ("100", "1k", "10K", "1.5k", "1m")] == \
+            [100, 1000, 10000, 1500, 1000000]
+
+    def test_entries_are_deterministic(self):
+        first, second = make_entry(7, seed=1), make_entry(7, seed=1)
+        for entry in (first, second):
+            for key in ("created_at", "updated_at", "last_used_at"):
+                entry.pop(key, None)
+        assert first == second
+        assert make_entry(7, seed=2)["name"] != make_entry(7, seed=1)["name"]
+
+    def test_generated_kb_matches_store_layout(self, tmp_path):
+        info = generate_kb(tmp_path, 21, seed=3)
+        index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+
+        assert info["entries"] == index["stats"]["total_entries"] == 21
+        assert all(count == 3 for count in info["by_category"].values())
+        entry = json.loads((tmp_path / "problems" / "problem-synthetic-000003.json")
+                           .read_text(encoding="utf-8"))
+        assert {"symptoms", "root_causes", "solutions"} <= set(entry["content"])
+        for trigger in entry["triggers"]:
+            assert entry["id"] in index["trigger_index"][trigger]
+
+
+class TestBench:
+
+    def test_result_document(self, tmp_path):
+        doc = bench.run([14], repeat=2, workdir=tmp_path)
+        assert doc["schema"] == bench.SCHEMA_VERSION
+        assert doc["config"] == {"sizes": [14], "repeat": 2, "seed": 42}
+
+        ops = {(r["op"], r["phase"]) for r in doc["results"]}
+        for op in ("keyword", "bm25", "trigger"):
+            assert {(op, phase) for phase in bench.CACHE_PHASES} <= ops
+        for op in ("stats", "gc", "store", "decay"):
+            assert (op, "steady") in ops
+        row = next(r for r in doc["results"] if r["op"] == "store")
+        assert len(row["samples_ms"]) == 2
+        assert row["min_ms"] <= row["median_ms"] <= row["max_ms"]
+
+
+class TestBenchSummarizer:
+
+    def test_result_document(self):
+        import bench_summarizer
+
+        doc = bench_summarizer.run([2000], repeat=2)
+        assert doc["schema"] == bench.SCHEMA_VERSION
+        assert doc["config"]["suite"] == "summarizer"
+        ops = {(r["op"], r["phase"]) for r in doc["results"]}
+        assert ops == {(op, phase) for op in bench_summarizer.OPS
+                       for phase in bench_summarizer.INPUTS}
+
+    def test_inputs_reach_requested_size(self):
+        import bench_summarizer
+
+        for make in bench_summarizer.INPUTS.values():
+            text = make(5000, 1)
+            assert 4000 <= len(text.encode("utf-8")) <= 6000
+        assert bench_summarizer.transcript(5000, 1) == bench_summarizer.transcript(5000, 1)
+
+
+class TestBenchKeywords:
+
+    def test_result_document(self):
+        import bench_keywords
+
+        doc = bench_keywords.run([2000], repeat=2)
+        assert doc["schema"] == bench.SCHEMA_VERSION
+        assert doc["config"]["suite"] == "keywords"
+        assert {r["op"] for r in doc["results"]} == set(bench_keywords.OPS)
+
+    def test_transcript_hits_every_dictionary(self):
+        import bench_keywords
+
+        text = bench_keywords.transcript(5000, 1)
+        assert 4000 <= len(text.encode("utf-8")) <= 6000
+        assert bench_keywords.OPS["session"](text)["attempts"] > 1
+        assert all(bench_keywords._detect(text)[:2])
+        assert bench_keywords.OPS["tech"](text)
+        assert any(bench_keywords.OPS["readme"](text).values())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the perf regression comparison (tests/perf/compare.py).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import compare
+
+
+def _doc(*rows):
+    return {"machine": {"system": "Linux", "machine": "x86_64", "cpu_count": 8,
+                        "implementation": "CPython", "python": "3.11.9", "jieba": False},
+            "results": [{"size": size, "op": op, "phase": phase, "median_ms": ms, "stdev_ms": 0.5}
+                        for size, op, phase, ms in rows]}
+
+
+class TestCompare:
+
+    def test_profile_name(self):
+        assert compare.profile_name(_doc()["machine"]) == "linux-x86_64-8cpu-cpython3.11"
+
+    def test_statuses(self):
+        base = _doc((100, "trigger", "warm", 10.0), (100, "bm25", "cold", 100.0),
+                    (100, "store", "steady", 0.2), (100, "gc", "steady", 50.0))
+        cur = _doc((100, "trigger", "warm", 14.0), (100, "bm25", "cold", 60.0),
+                   (100, "store", "steady", 0.6), (100, "stats", "steady", 5.0))
+        rows = {r["op"]: r for r in compare.compare(base, cur, {"*": 0.25})}
+
+        assert rows["trigger"]["status"] == "regression"
+        assert rows["trigger"]["change"] == pytest.approx(0.4)
+        assert rows["bm25"]["status"] == "improved"
+        assert rows["store"]["status"] == "ok"       # +200% but under the 1 ms floor
+        assert rows["gc"]["status"] == "missing"
+        assert rows["stats"]["status"] == "new"
+        assert [r["op"] for r in compare.regressions(list(rows.values()))] == ["trigger"]
+
+    def test_per_op_tolerance(self):
+        tolerances = compare.parse_tolerances(["0.1", "trigger=0.5", "bm25:cold=0.3"])
+        assert compare.tolerance_for(tolerances, "trigger", "warm") == 0.5
+        assert compare.tolerance_for(tolerances, "bm25", "cold") == 0.3
+        assert compare.tolerance_for(tolerances, "bm25", "warm") == 0.1
+
+        base, cur = _doc((100, "trigger", "warm", 10.0)), _doc((100, "trigger", "warm", 14.0))
+        assert compare.regressions(compare.compare(base, cur, tolerances)) == []
+
+    def test_check_cli(self, tmp_path, capsys):
+        baseline, results = tmp_path / "base.json", tmp_path / "cur.json"
+        baseline.write_text(json.dumps(_doc((100, "trigger", "warm", 10.0))))
+        results.write_text(json.dumps(_doc((100, "trigger", "warm", 20.0))))
+
+        argv = ["check", str(results), "--baseline", str(baseline)]
+        assert compare.main(argv) == 1
+        assert "REGRESSION" in capsys.readouterr().out
+        assert compare.main(argv + ["--tolerance", "trigger=1.5"]) == 0
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate (opt-in): `pytest -m perf`.
+
+Runs bench.py at the pytest.ini `perf_sizes` and compares each operation's
+median with the stored baseline of this machine profile. The first run (or
+--perf-update-baseline) records the baseline instead of comparing.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import bench
+import compare
+
+
+@pytest.mark.perf
+def test_no_perf_regression(request, tmp_path):
+    config = request.config
+    sizes = [bench.parse_size(s) for s in str(config.getini("perf_sizes")).split(",") if s.strip()]
+    repeat = int(config.getini("perf_repeat"))
+    tolerances = compare.parse_tolerances(
+        list(config.getini("perf_tolerance")) + config.getoption("--perf-tolerance"))
+
+    current = bench.run(sizes, repeat, workdir=tmp_path)
+    profile = compare.profile_name(current["machine"])
+    path = compare.baseline_path(profile)
+
+    if config.getoption("--perf-update-baseline") or not path.exists():
+        compare.save_baseline(current, path)
+        pytest.skip(f"perf baseline recorded for {profile}: {path}")
+
+    rows = compare.compare(compare.load_results(path), current, tolerances,
+                           float(config.getini("perf_min_delta_ms")))
+    table = compare.format_table(rows)
+    config._perf_report = f"profile {profile} (baseline {path})\n{table}"
+    found = compare.regressions(rows)
+    assert not found, f"{len(found)} perf regression(s) vs {path}:\n{table}"
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for core.aho_corasick and the keyword scans built on it
+(trigger.detect_*, trigger_detector, summarizer).
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts'))
+
+from core.aho_corasick import AhoCorasick, keyword_matcher
+from core.trigger_detector import extract_session_summary
+import summarizer
+import trigger
+
+
+class TestAutomaton:
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        alphabet = 'abc错误'
+        for _ in range(200):
+            patterns = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                        for _ in range(rng.randint(1, 8))]
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            automaton = AhoCorasick(patterns)
+            expected = {i for i, p in enumerate(patterns) if p in text}
+            assert automaton.found(text) == expected
+            occurrences = sorted((s + len(p), i) for i, p in enumerate(patterns)
+                                 for s in range(len(text)) if text.startswith(p, s))
+            assert sorted(automaton.iter_matches(text)) == occurrences
+
+    def test_first_reports_earliest_completion(self):
+        automaton = AhoCorasick(['bcd', 'abcde', 'c'])
+        assert automaton.first('xabcde') == (3, 2)
+        assert automaton.first('xyz') is None
+
+
+class TestKeywordMatcher:
+
+    def test_labels_follow_dictionary_order(self):
+        source = {'api': ['api', '接口'], 'auth': ['login', '登录']}
+        matcher = keyword_matcher(source)
+        assert matcher.labels('修复登录 API') == ['api', 'auth']
+        assert matcher.label_hits('API 接口 login') == {'api': 2, 'auth': 1}
+        assert matcher.first_label('nothing here') is None
+
+    def test_positions_and_counts(self):
+        matcher = keyword_matcher(['error', 'fix'])
+        text = 'Fix the error, then fix again'
+        assert [(start, kw) for start, kw, _ in matcher.iter_matches(text)] == \
+            [(0, 'fix'), (8, 'error'), (20, 'fix')]
+        assert matcher.count(text) == 3
+        assert matcher.first_position('no match') is None
+
+    def test_substring_scan_matches_automaton(self, monkeypatch):
+        import core.aho_corasick as aho_corasick
+
+        matcher = aho_corasick.KeywordMatcher(
+            [('错误', 'error'), ('fix', 'fix'), ('', 'empty'), ('bug', 'error')])
+        text = 'Fix the BUG, 又一个错误'
+        monkeypatch.setattr(aho_corasick, 'SUBSTRING_SCAN_MAX_KEYWORDS', 0)
+        automaton = (matcher.found(text), matcher.labels(text), matcher.label_hits(text))
+        monkeypatch.setattr(aho_corasick, 'SUBSTRING_SCAN_MAX_KEYWORDS', 1000)
+        assert (matcher.found(text), matcher.labels(text), matcher.label_hits(text)) == automaton
+        assert automaton[1] == ['error', 'fix']
+
+    def test_compiled_once_per_dictionary(self):
+        source = ['alpha', 'beta']
+        assert keyword_matcher(source) is keyword_matcher(source)
+        assert keyword_matcher(['alpha', 'beta']) is keyword_matcher(source)
+
+
+class TestScans:
+
+    def test_trigger_detection(self):
+        text = '修复登录接口的跨域报错'
+        assert 'api' in trigger.detect_scenarios(text)
+        assert 'auth' in trigger.detect_scenarios(text)
+        assert trigger.detect_problems(text)
+        assert trigger.detect_action_type(text) == trigger.detect_action_type(text)
+
+    def test_session_summary_feedback_line(self):
+        context = "Tried one approach\nERROR: it failed\nUser said: 记住这个做法\nit works now"
+        summary = extract_session_summary(context)
+        assert summary['attempts'] == 3
+        assert summary['success'] is True
+        assert summary['feedback'] == 'User said: 记住这个做法'
+
+    def test_summarizer_tech_stack_order(self):
+        assert summarizer.extract_tech_stack('Docker and React with python') == \
+            [kw for kw in summarizer.TECH_KEYWORDS if kw in 'docker and react with python']
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the BM25 index layout.
+
+Compares bytes per posting of the compact array-backed BM25Index against
+the previous layout (one dict of term frequencies per document plus a
+string-keyed idf dict), rebuilt here as a reference.
+
+Run directly for a report at several corpus sizes:
+    python tests/test_bm25_memory.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+import embedding
+import query
+from embedding import BM25Index, _bm25_tokenize
+
+
+_ZH_CHARS = "修复跨域请求问题优化数据库查询性能渲染列表组件状态管理缓存部署容器测试接口认证登录配置路由"
+
+
+def _make_corpus(doc_count: int, vocab_size: int = 5000, seed: int = 42):
+    """Deterministic mixed English/Chinese corpus with a skewed vocabulary."""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    docs = []
+    for _ in range(doc_count):
+        words = [vocab[min(int(rng.paretovariate(1.2)) - 1, vocab_size - 1)]
+                 for _ in range(25)]
+        words += [rng.choice(vocab) for _ in range(5)]
+        zh = "".join(rng.choice(_ZH_CHARS) for _ in range(12))
+        docs.append(" ".join(words) + " " + zh)
+    return docs
+
+
+def _deep_sizeof(obj, seen=None) -> int:
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(x, seen) for x in obj)
+    return size
+
+
+def _legacy_layout_stats(docs):
+    """Bytes per posting of the old dict-per-document layout."""
+    doc_freqs = []
+    idf = {}
+    for text in docs:
+        tf = {}
+        for token in _bm25_tokenize(text):
+            t = token.lower()
+            tf[t] = tf.get(t, 0) + 1
+        doc_freqs.append(tf)
+        for term in tf:
+            idf[term] = 1.0
+    postings = sum(len(tf) for tf in doc_freqs)
+    size = _deep_sizeof(doc_freqs) + _deep_sizeof(idf)
+    return {"postings": postings, "bytes": size, "bytes_per_posting": round(size / postings, 1)}
+
+
+def memory_report(doc_count: int):
+    docs = _make_corpus(doc_count)
+    before = _legacy_layout_stats(docs)
+    after = BM25Index(docs, [str(i) for i in range(doc_count)]).memory_stats()
+    return before, after
+
+
+class TestBM25Memory:
+    """The compact layout must stay well below the dict layout."""
+
+    def test_same_postings_as_legacy_layout(self):
+        docs = _make_corpus(200)
+        before = _legacy_layout_stats(docs)
+        after = BM25Index(docs, [str(i) for i in range(200)]).memory_stats()
+        assert after["postings"] == before["postings"]
+
+    def test_bytes_per_posting_reduced(self, monkeypatch):
+        # Pin the tokenizer: jieba yields more distinct terms per posting than
+        # the bigram fallback, which shifts the ratio
+        monkeypatch.setattr(query, "HAS_JIEBA", False)
+        monkeypatch.setattr(embedding, "HAS_JIEBA", False)
+        before, after = memory_report(1000)
+        assert after["bytes_per_posting"] * 3 < before["bytes_per_posting"]
+
+    def test_fields_build_only_bm25f_table(self):
+        docs = ["react hooks", "vue router"]
+        fields = [{"name": "react hooks"}, {"name": "vue router"}]
+        index = BM25Index(docs, ["a", "b"], fields)
+        stats = index.memory_stats()
+        assert stats["terms"] == 4
+        assert stats["postings"] == 4
+        assert len(index.post_docs) == 0 and len(index.idf) == 0
+
+    def test_fields_tokenized_once(self, monkeypatch):
+        import embedding
+
+        calls = []
+        real = embedding._term_counts
+        monkeypatch.setattr(embedding, "_term_counts",
+                            lambda text: calls.append(text) or real(text))
+        BM25Index(["react hooks"], ["a"], [{"name": "react", "description": "hooks"}])
+        assert sorted(calls) == ["hooks", "react"]
+
+    def test_index_uses_slots(self):
+        index = BM25Index(["a b"], ["doc"])
+        assert not hasattr(index, "__dict__")
+        with pytest.raises(AttributeError):
+            index.extra = 1
+
+
+if __name__ == "__main__":
+    print(f"{'docs':>7} {'postings':>9} {'legacy B/p':>11} {'compact B/p':>12} {'ratio':>6}")
+    for n in (100, 1000, 10000):
+        before, after = memory_report(n)
+        ratio = before["bytes_per_posting"] / max(after["bytes_per_posting"], 0.1)
+        print(f"{n:>7} {before['postings']:>9} {before['bytes_per_posting']:>11} "
+              f"{after['bytes_per_posting']:>12} {ratio:>5.1f}x")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for the hashed-vector dense retriever (knowledge/dense.py).
+
+Run directly for recall@10 (IVF vs brute force) and latency at several
+corpus sizes:
+    python tests/test_dense_index.py
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+np = pytest.importorskip("numpy")
+
+import dense
+from dense import DenseIndex
+
+
+_TOPICS = [
+    "react hooks state render component props effect memo",
+    "docker container deploy image compose registry volume",
+    "database query index slow sql postgres transaction",
+    "cors proxy request header origin preflight browser",
+    "pytest fixture mock assert coverage parametrize",
+    "jwt login token auth session refresh oauth",
+    "redis cache ttl eviction key cluster",
+    "golang goroutine channel context deadlock mutex",
+    "跨域 请求 代理 浏览器 预检",
+    "数据库 索引 慢查询 事务 优化",
+]
+
+
+def _make_corpus(doc_count: int, seed: int = 7):
+    """Deterministic topical corpus: each doc mixes one topic with noise words."""
+    rng = random.Random(seed)
+    topic_words = [t.split() for t in _TOPICS]
+    noise = [f"misc{i}" for i in range(2000)]
+    docs = []
+    for i in range(doc_count):
+        words = topic_words[i % len(topic_words)]
+        body = [rng.choice(words) for _ in range(8)] + [rng.choice(noise) for _ in range(6)]
+        docs.append(" ".join(body))
+    return docs
+
+
+def _queries(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    topic_words = [t.split() for t in _TOPICS]
+    return [" ".join(rng.sample(topic_words[i % len(topic_words)], 2)) for i in range(count)]
+
+
+def recall_report(doc_count: int, query_count: int = 50, top_k: int = 10):
+    """recall@k of IVF vs brute force, plus mean latency (ms) of both."""
+    docs = _make_corpus(doc_count)
+    index = DenseIndex.build(docs, [str(i) for i in range(doc_count)])
+    queries = [index.encode(q) for q in _queries(query_count)]
+
+    hit = total = 0
+    exact_time = ann_time = 0.0
+    for q in queries:
+        t0 = time.perf_counter()
+        exact = index.search_vector(q, top_k=top_k, exact=True)
+        t1 = time.perf_counter()
+        approx = index.search_vector(q, top_k=top_k)
+        t2 = time.perf_counter()
+        exact_time += t1 - t0
+        ann_time += t2 - t1
+        truth = {doc_id for doc_id, _ in exact}
+        hit += len(truth & {doc_id for doc_id, _ in approx})
+        total += len(truth)
+    return {
+        "docs": doc_count,
+        "ivf": index.centroids is not None,
+        "recall_at_10": round(hit / max(total, 1), 3),
+        "exact_ms": round(exact_time * 1000 / query_count, 3),
+        "ivf_ms": round(ann_time * 1000 / query_count, 3),
+    }
+
+
+def _make_kb(tmp_path, entries):
+    kb_root = tmp_path / "knowledge"
+    exp_dir = kb_root / "experiences"
+    exp_dir.mkdir(parents=True)
+    for entry in entries:
+        with open(exp_dir / f"{entry['id']}.json", "w") as f:
+            json.dump(entry, f)
+    with open(kb_root / "index.json", "w") as f:
+        json.dump({"trigger_index": {}}, f)
+    return kb_root
+
+
+_ENTRIES = [
+    {"id": "exp-cors", "name": "修复跨域请求问题", "triggers": ["cors", "跨域"],
+     "content": {"solution": "configure the dev proxy for cross-origin requests"}},
+    {"id": "exp-docker", "name": "Docker image too large", "triggers": ["docker"],
+     "content": {"solution": "use multi-stage builds"}},
+    {"id": "exp-react", "name": "React useEffect infinite loop", "triggers": ["react", "hooks"],
+     "content": {"solution": "fix the dependency array"}},
+]
+
+
+class TestVectors:
+
+    def test_rows_are_unit_length(self):
+        index = DenseIndex.build(_make_corpus(50), [str(i) for i in range(50)])
+        norms = np.linalg.norm(index.vectors, axis=1)
+        assert index.vectors.dtype == np.float32
+        assert np.allclose(norms, 1.0, atol=1e-5)
+
+    def test_char_ngrams_match_word_variants(self):
+        index = DenseIndex.build(
+            ["optimization of slow queries", "docker compose volumes"], ["a", "b"]
+        )
+        assert index.search("optimize query", top_k=1)[0][0] == "a"
+
+    def test_unknown_query_returns_nothing(self):
+        index = DenseIndex.build(["react hooks"], ["a"])
+        assert index.search("", top_k=5) == []
+
+
+class TestIVF:
+
+    def test_small_corpus_is_brute_force(self):
+        index = DenseIndex.build(_make_corpus(20), [str(i) for i in range(20)])
+        assert index.centroids is None
+
+    def test_lists_cover_every_row_once(self, monkeypatch):
+        monkeypatch.setattr(dense, "DENSE_IVF_MIN_DOCS", 100)
+        index = DenseIndex.build(_make_corpus(400), [str(i) for i in range(400)])
+        assert index.centroids is not None
+        assert sorted(index.list_order.tolist()) == list(range(400))
+        assert index.list_offsets[-1] == 400
+
+    def test_recall_against_brute_force(self, monkeypatch):
+        monkeypatch.setattr(dense, "DENSE_IVF_MIN_DOCS", 100)
+        report = recall_report(3000, query_count=30)
+        assert report["ivf"]
+        assert report["recall_at_10"] >= 0.9
+
+
+class TestPersistence:
+
+    def test_index_persisted_and_memory_mapped(self, tmp_path):
+        kb_root = _make_kb(tmp_path, _ENTRIES)
+        dense.invalidate_cache()
+        built = dense._get_or_build_index(kb_root)
+        assert (kb_root / dense.INDEX_DIR / "vectors.f32").exists()
+
+        dense.invalidate_cache()
+        loaded = dense._get_or_build_index(kb_root)
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.doc_ids == built.doc_ids
+        assert np.allclose(np.asarray(loaded.vectors), built.vectors)
+
+    def test_stale_index_rebuilt(self, tmp_path):
+        kb_root = _make_kb(tmp_path, _ENTRIES[:2])
+        dense.invalidate_cache()
+        dense._get_or_build_index(kb_root)
+        with open(kb_root / "experiences" / "exp-react.json", "w") as f:
+            json.dump(_ENTRIES[2], f)
+        dense.invalidate_cache()
+        assert "exp-react" in dense._get_or_build_index(kb_root).doc_ids
+
+    def test_search_normalized(self, tmp_path):
+        kb_root = _make_kb(tmp_path, _ENTRIES)
+        dense.invalidate_cache()
+        hits = dense.search("跨域请求 proxy", kb_root, top_k=3)
+        assert hits[0][0] == "exp-cors"
+        assert hits[0][1] == pytest.approx(1.0)
+
+
+class TestQuerySemanticDense:
+
+    def test_dense_method(self, tmp_path, monkeypatch):
+        import query
+        kb_root = _make_kb(tmp_path, _ENTRIES)
+        monkeypatch.setattr(query, "get_kb_root", lambda: kb_root)
+        dense.invalidate_cache()
+        results = query.query_semantic("docker multi-stage", limit=2, method="dense")
+        assert results[0]["id"] == "exp-docker"
+        assert results[0]["_match_type"] == "semantic"
+
+    def test_falls_back_to_bm25_without_numpy(self, tmp_path, monkeypatch):
+        import query
+        kb_root = _make_kb(tmp_path, _ENTRIES)
+        monkeypatch.setattr(query, "get_kb_root", lambda: kb_root)
+        monkeypatch.setattr(dense, "HAS_NUMPY", False)
+        results = query.query_semantic("docker", limit=2, method="dense")
+        assert results[0]["id"] == "exp-docker"
+        assert not (kb_root / dense.INDEX_DIR).exists()
+
+
+if __name__ == "__main__":
+    dense.DENSE_IVF_MIN_DOCS = 1000
+    print(f"{'docs':>7} {'ivf':>4} {'recall@10':>10} {'exact ms':>9} {'ivf ms':>7}")
+    for n in (1000, 10000, 50000):
+        r = recall_report(n)
+        print(f"{r['docs']:>7} {str(r['ivf']):>4} {r['recall_at_10']:>10} "
+              f"{r['exact_ms']:>9} {r['ivf_ms']:>7}")
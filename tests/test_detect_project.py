@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for programming/detect_project.py: manifest-fingerprint cache of
+detect_project_cached() and its use by trigger.detect_project_tech.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'programming'))
+
+import detect_project
+import trigger
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(detect_project, '_memo', {})
+    (tmp_path / 'package.json').write_text(
+        json.dumps({'dependencies': {'react': '^18'}}), encoding='utf-8')
+    calls = []
+    original = detect_project.detect_project
+    monkeypatch.setattr(detect_project, 'detect_project',
+                        lambda d: calls.append(d) or original(d))
+    return tmp_path, calls
+
+
+def test_cached_until_manifest_changes(project, monkeypatch):
+    root, calls = project
+    first = detect_project.detect_project_cached(str(root))
+    assert first['frameworks'] == ['react']
+    assert (root / detect_project.CACHE_FILE).exists()
+
+    # New process: in-memory memo gone, on-disk cache still valid
+    monkeypatch.setattr(detect_project, '_memo', {})
+    assert detect_project.detect_project_cached(str(root)) == first
+    assert len(calls) == 1
+
+    (root / 'go.mod').write_text('module demo\nrequire github.com/gin-gonic/gin v1\n',
+                                 encoding='utf-8')
+    updated = detect_project.detect_project_cached(str(root))
+    assert 'gin' in updated['frameworks']
+    assert len(calls) == 2
+
+
+def test_results_are_copies(project):
+    root, _ = project
+    detect_project.detect_project_cached(str(root))['frameworks'].append('mutated')
+    assert detect_project.detect_project_cached(str(root))['frameworks'] == ['react']
+
+
+def test_trigger_uses_cached_detector(project):
+    root, calls = project
+    trigger.detect_project_tech(str(root))
+    trigger.detect_project_tech(str(root))
+    assert len(calls) == 1
+
+
+class TestWorkspace:
+
+    @pytest.fixture
+    def monorepo(self, tmp_path):
+        (tmp_path / 'package.json').write_text(json.dumps({'private': True}), encoding='utf-8')
+        web = tmp_path / 'packages' / 'web'
+        web.mkdir(parents=True)
+        (web / 'package.json').write_text(
+            json.dumps({'dependencies': {'vue': '^3'}}), encoding='utf-8')
+        api = tmp_path / 'services' / 'api'
+        api.mkdir(parents=True)
+        (api / 'go.mod').write_text('module api\nrequire github.com/gin-gonic/gin v1\n',
+                                    encoding='utf-8')
+        ignored = tmp_path / 'node_modules' / 'react'
+        ignored.mkdir(parents=True)
+        (ignored / 'package.json').write_text(
+            json.dumps({'dependencies': {'react': '*'}}), encoding='utf-8')
+        return tmp_path
+
+    def test_packages_and_aggregate(self, monorepo):
+        result = detect_project.detect_workspace(str(monorepo))
+        assert [p['path'] for p in result['packages']] == ['.', 'packages/web', 'services/api']
+        assert result['aggregate']['base_tech'] == ['javascript', 'go']
+        assert sorted(result['aggregate']['frameworks']) == ['gin', 'vue']
+        assert 'services/api/go.mod' in result['aggregate']['files_found']
+        assert result['truncated'] is False
+
+    def test_depth_limit(self, monorepo):
+        result = detect_project.detect_workspace(str(monorepo), max_depth=1)
+        assert [p['path'] for p in result['packages']] == ['.']
+
+    def test_only_changed_packages_reparsed(self, monorepo, monkeypatch):
+        detect_project.detect_workspace(str(monorepo))
+        calls = []
+        original = detect_project.detect_project
+        monkeypatch.setattr(detect_project, 'detect_project',
+                            lambda d: calls.append(d) or original(d))
+        (monorepo / 'packages' / 'web' / 'package.json').write_text(
+            json.dumps({'dependencies': {'vue': '^3', 'express': '^4'}}), encoding='utf-8')
+
+        result = detect_project.detect_workspace(str(monorepo))
+        assert calls == [str(monorepo.resolve() / 'packages' / 'web')]
+        assert 'express' in result['aggregate']['frameworks']
+
+
+class TestRuleMatcher:
+
+    def test_overlapping_patterns_all_detected(self, tmp_path):
+        rules = {'parser': 'gradle', 'base_tech': 'java', 'detect': [
+            {'pattern': r'org\.springframework', 'tech': 'spring'},
+            {'pattern': r'org\.springframework\.boot', 'tech': 'spring-boot'},
+            {'pattern': r'framework\.boot', 'tech': 'boot'},
+        ]}
+        path = tmp_path / 'build.gradle'
+        path.write_text("implementation 'org.springframework.boot:starter'\n", encoding='utf-8')
+        assert detect_project.detect_tech_from_file(path, rules) == \
+            ['java', 'spring', 'spring-boot', 'boot']
+
+    def test_pom_group_id_prefixes(self, tmp_path):
+        path = tmp_path / 'pom.xml'
+        path.write_text('<project><dependencies>'
+                        '<dependency><groupId>org.springframework.boot</groupId></dependency>'
+                        '<dependency><groupId>junit</groupId></dependency>'
+                        '</dependencies></project>', encoding='utf-8')
+        detected = detect_project.detect_tech_from_file(
+            path, detect_project.DETECTION_RULES['pom.xml'])
+        assert detected == ['java', 'spring-boot', 'spring', 'junit']
+
+    def test_large_rule_set_compiled_once(self, tmp_path):
+        rules = {'parser': 'gomod', 'base_tech': 'go', 'detect': [
+            {'pattern': rf'github\.com/org{i}/lib{i}\b', 'tech': f'lib{i}'} for i in range(300)]}
+        path = tmp_path / 'go.mod'
+        path.write_text('module demo\nrequire github.com/org42/lib42 v1\n'
+                        'require github.com/org4/lib4x v1\n', encoding='utf-8')
+        assert detect_project.detect_tech_from_file(path, rules) == ['go', 'lib42']
+        assert detect_project.compile_rules(rules) is detect_project.compile_rules(rules)
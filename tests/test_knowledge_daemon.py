@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Tests for the knowledge query daemon (knowledge/daemon.py)."""
+
+import json
+import os
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+import daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+CORS_ENTRY = {
+    "id": "experience-cors-1",
+    "name": "修复跨域请求问题",
+    "triggers": ["cors", "跨域"],
+    "content": {"solution": "use the dev proxy"},
+    "effectiveness": 0.8,
+}
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch, make_kb):
+    kb_root = make_kb([CORS_ENTRY], name="kb")
+    monkeypatch.delenv("KNOWLEDGE_DAEMON", raising=False)
+    sock = tmp_path / "d.sock"
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=daemon.serve,
+        kwargs={"path": sock, "idle_timeout": 0, "kb_root": kb_root, "ready": ready},
+        daemon=True,
+    )
+    thread.start()
+    assert ready.wait(10)
+    yield sock, kb_root
+    daemon.stop(sock)
+    thread.join(5)
+
+
+class TestClientFallback:
+
+    def test_no_socket_returns_none(self, tmp_path):
+        assert daemon.request({"op": "ping"}, path=tmp_path / "missing.sock") is None
+
+    def test_stale_socket_returns_none(self, tmp_path):
+        stale = tmp_path / "stale.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(stale))
+        server.close()  # file remains, nobody listens
+        assert daemon.request({"op": "ping"}, path=stale) is None
+
+    def test_disabled_by_env(self, running_daemon, monkeypatch):
+        sock, _ = running_daemon
+        monkeypatch.setenv("KNOWLEDGE_DAEMON", "0")
+        assert daemon.request({"op": "ping"}, path=sock) is None
+        assert daemon.is_running(sock)
+
+
+class TestProtocol:
+
+    def test_ping(self, running_daemon):
+        sock, kb_root = running_daemon
+        response = daemon.request({"op": "ping"}, path=sock)
+        assert response["ok"] is True
+        assert response["kb_root"] == str(kb_root)
+
+    def test_unknown_op(self, running_daemon):
+        sock, _ = running_daemon
+        response = daemon.request({"op": "nope"}, path=sock)
+        assert response["ok"] is False
+
+    def test_several_requests_per_connection(self, running_daemon):
+        sock, _ = running_daemon
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(sock))
+            client.sendall(b'{"op":"ping"}\n{"op":"ping"}\n')
+            data = b""
+            while data.count(b"\n") < 2:
+                data += client.recv(4096)
+        lines = data.splitlines()
+        assert [json.loads(line)["ok"] for line in lines] == [True, True]
+
+    def test_trigger(self, running_daemon):
+        sock, _ = running_daemon
+        response = daemon.request({
+            "op": "trigger",
+            "args": {"user_input": "跨域 cors", "mode": "keyword", "format": "json"},
+        }, path=sock)
+        assert response["ok"] is True
+        result = json.loads(response["output"])
+        names = [e["name"] for e in result["knowledge"]["high_relevance"]
+                 + result["knowledge"]["medium_relevance"]]
+        assert "修复跨域请求问题" in names
+
+    def test_run_query_script(self, running_daemon):
+        sock, _ = running_daemon
+        response = daemon.request(
+            {"op": "run", "script": "query", "argv": ["--id", "experience-cors-1"]}, path=sock
+        )
+        assert response["code"] == 0
+        assert json.loads(response["stdout"])["id"] == "experience-cors-1"
+
+        missing = daemon.request(
+            {"op": "run", "script": "query", "argv": ["--id", "nope"]}, path=sock
+        )
+        assert missing["code"] == 1
+        assert "Entry not found" in missing["stderr"]
+
+    def test_only_knowledge_scripts_runnable(self, running_daemon):
+        sock, _ = running_daemon
+        response = daemon.request({"op": "run", "script": "os", "argv": []}, path=sock)
+        assert response["ok"] is False
+
+    def test_store_then_search_sees_new_entry(self, running_daemon):
+        sock, _ = running_daemon
+        entry = {"name": "Redis eviction policy", "category": "experience",
+                 "content": {"solution": "allkeys-lru"}, "triggers": ["redis"]}
+        stored = daemon.request({
+            "op": "run", "script": "store", "argv": ["--from-json"],
+            "stdin": json.dumps(entry),
+        }, path=sock)
+        assert stored["code"] == 0
+
+        response = daemon.request({
+            "op": "trigger",
+            "args": {"user_input": "redis eviction", "mode": "semantic", "format": "json"},
+        }, path=sock)
+        result = json.loads(response["output"])
+        names = [e["name"] for e in result["knowledge"]["high_relevance"]
+                 + result["knowledge"]["medium_relevance"]]
+        assert "Redis eviction policy" in names
+
+    def test_request_carries_client_context(self, running_daemon, monkeypatch):
+        sock, _ = running_daemon
+        sent = []
+        monkeypatch.setattr(daemon, "_send", lambda payload, path, timeout: sent.append(payload))
+        daemon.request({"op": "run", "script": "query", "argv": []}, path=sock)
+        daemon.request({"op": "ping"}, path=sock)
+        assert sent[0]["client"] == daemon.client_context()
+        assert "client" not in sent[1]
+
+    def test_run_uses_client_knowledge_base(self, running_daemon, tmp_path):
+        sock, kb_root = running_daemon
+        other_kb = tmp_path / "other" / "kb"
+        other_kb.mkdir(parents=True)
+        client = {"cwd": str(tmp_path / "other"), "env": {"KNOWLEDGE_BASE_PATH": str(other_kb)}}
+
+        entry = {"name": "Other project entry", "category": "experience",
+                 "content": {"solution": "x"}, "triggers": ["other"]}
+        stored = daemon.request({
+            "op": "run", "script": "store", "argv": ["--from-json"],
+            "stdin": json.dumps(entry), "client": client,
+        }, path=sock)
+        assert stored["code"] == 0
+        assert list((other_kb / "experiences").glob("*.json"))
+        assert len(list((kb_root / "experiences").glob("*.json"))) == 1
+
+        own = daemon.request(
+            {"op": "run", "script": "query", "argv": ["--id", "experience-cors-1"],
+             "client": client}, path=sock)
+        assert own["code"] == 1
+        assert os.environ["KNOWLEDGE_BASE_PATH"] == str(kb_root)
+
+    def test_run_uses_client_cwd(self, running_daemon, tmp_path):
+        sock, _ = running_daemon
+        project = tmp_path / "proj"
+        project.mkdir()
+        (project / "package.json").write_text('{"dependencies": {"react": "18"}}')
+        cwd = os.getcwd()
+        response = daemon.request({
+            "op": "run", "script": "trigger", "argv": ["--project", ".", "--mode", "keyword"],
+            "client": {"cwd": str(project), "env": {"KNOWLEDGE_BASE_PATH": str(tmp_path / "kb")}},
+        }, path=sock)
+        assert response["code"] == 0
+        assert "react" in json.loads(response["stdout"])["triggers_used"]
+        assert os.getcwd() == cwd
+
+        missing = daemon.request({
+            "op": "run", "script": "query", "argv": ["--stats"],
+            "client": {"cwd": str(tmp_path / "gone"), "env": {}},
+        }, path=sock)
+        assert missing["ok"] is False
+        assert os.getcwd() == cwd
+
+
+class TestLifecycle:
+
+    def test_stop_removes_socket(self, tmp_path, make_kb):
+        kb_root = make_kb([CORS_ENTRY], name="kb")
+        sock = tmp_path / "d.sock"
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=daemon.serve,
+            kwargs={"path": sock, "idle_timeout": 0, "kb_root": kb_root,
+                    "warm": False, "ready": ready},
+            daemon=True,
+        )
+        thread.start()
+        assert ready.wait(10)
+        assert daemon.stop(sock)
+        thread.join(5)
+        assert not thread.is_alive()
+        assert not sock.exists()
+        assert daemon.stop(sock) is False
+
+    def test_second_daemon_refuses_to_start(self, running_daemon):
+        sock, kb_root = running_daemon
+        assert daemon.serve(sock, idle_timeout=0, kb_root=kb_root, warm=False) == 1
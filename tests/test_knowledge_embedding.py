@@ -11,7 +11,12 @@ sys.path.insert(
     0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
 )
 
-from embedding import HAS_EMBEDDING, BM25Index, search, build_index, invalidate_cache, _bm25_tokenize
+import embedding
+from embedding import (
+    HAS_EMBEDDING, BM25Index, search, build_index, invalidate_cache, _bm25_tokenize,
+    _entry_to_fields, _load_cache, _split_cjk_run, HAS_JIEBA, _load_entries,
+    federated_search, merged_idf, _idf,
+)
 
 
 def _make_kb(tmp_path, entries):
@@ -231,3 +236,263 @@ class TestCache:
         # After invalidation, should rebuild
         r2 = search("a", kb_root, top_k=5)
         assert len(r2) == 1
+
+
+class TestBM25F:
+    """Field-weighted BM25F ranking."""
+
+    def test_entry_to_fields_includes_content(self):
+        fields = _entry_to_fields({
+            "name": "CORS fix",
+            "triggers": ["cors"],
+            "content": {
+                "description": "desc",
+                "solutions": [{"description": "use a dev proxy"}],
+                "symptoms": ["blocked by policy"],
+                "root_causes": ["missing header"],
+                "pitfalls": [],
+            },
+        })
+        assert fields["name"] == "CORS fix"
+        assert fields["triggers"] == "cors"
+        assert "dev proxy" in fields["solution"]
+        assert fields["symptoms"] == "blocked by policy"
+        assert fields["root_causes"] == "missing header"
+        assert "pitfalls" not in fields
+
+    def test_name_hit_outranks_description_hit(self):
+        docs = ["redis guide", "caching guide"]
+        fields = [
+            {"name": "redis guide", "description": "general notes"},
+            {"name": "caching guide", "description": "notes about redis usage"},
+        ]
+        index = BM25Index(docs, ["doc-name", "doc-desc"], fields)
+        results = index.search(["redis"], top_k=2)
+        assert [r[0] for r in results] == ["doc-name", "doc-desc"]
+
+    def test_solution_field_is_searchable(self, tmp_path):
+        invalidate_cache()
+        kb_root = _make_kb(
+            tmp_path,
+            [
+                {
+                    "id": "experience-deploy-001",
+                    "name": "Deploy notes",
+                    "triggers": ["deploy"],
+                    "content": {
+                        "description": "Release checklist",
+                        "solution": "pin the kubernetes manifest version",
+                    },
+                },
+            ],
+        )
+        results = search("kubernetes manifest", kb_root, top_k=5)
+        assert results and results[0][0] == "experience-deploy-001"
+
+    def test_cache_persists_fields(self, tmp_path):
+        invalidate_cache()
+        kb_root = _make_kb(
+            tmp_path,
+            [
+                {
+                    "id": "exp-1",
+                    "name": "Entry 1",
+                    "triggers": ["a"],
+                    "content": {"description": "First", "pitfalls": ["watch out"]},
+                },
+            ],
+        )
+        build_index(kb_root)
+        cache = _load_cache(kb_root)
+        assert cache["doc_fields"][0]["pitfalls"] == "watch out"
+
+        # Rebuilt from the disk cache in a fresh process: still BM25F
+        invalidate_cache()
+        index, _, _ = build_index(kb_root)
+        assert index.has_fields
+
+
+@pytest.mark.skipif(HAS_JIEBA, reason="bigram mode only applies without jieba")
+class TestCJKBigramTokenization:
+    """CJK bigram tokenization (no-jieba path)."""
+
+    def test_bigram_mode(self):
+        assert _split_cjk_run("跨域请求", "bigram") == ["跨域", "域请", "请求"]
+
+    def test_bigram_unigram_mode(self):
+        tokens = _split_cjk_run("跨域", "bigram+unigram")
+        assert tokens == ["跨域", "跨", "域"]
+
+    def test_char_mode_is_legacy(self):
+        assert _split_cjk_run("跨域请求", "char") == ["跨", "域", "请", "求"]
+
+    def test_stopwords_cut_runs(self):
+        tokens = _bm25_tokenize("如何修复跨域的问题")
+        assert "的" not in tokens
+        assert "如何" not in tokens and "何修" not in tokens
+        assert {"修复", "跨域", "问题"} <= set(tokens)
+
+    def test_stop_chars_inside_words_kept(self):
+        for word in ("目的", "存在", "行为", "个人", "关于", "和谐"):
+            assert word in _bm25_tokenize(f"说明{word}")
+        assert _split_cjk_run("的", "bigram") == []
+        assert "的" not in _split_cjk_run("目的", "bigram+unigram")
+
+    def test_stop_char_word_is_searchable(self):
+        docs = ["关于缓存失效的说明", "优化数据库的性能"]
+        index = BM25Index(docs, ["doc-cache", "doc-db"])
+        assert [doc_id for doc_id, _ in index.search(_bm25_tokenize("关于"), top_k=5)] == \
+            ["doc-cache"]
+
+    def test_single_char_segment_kept(self):
+        assert _bm25_tokenize("慢") == ["慢"]
+
+    def test_stopword_char_does_not_match_everything(self):
+        docs = ["修复跨域的问题", "优化数据库的性能"]
+        index = BM25Index(docs, ["doc-cors", "doc-db"])
+        assert index.search(_bm25_tokenize("的"), top_k=5) == []
+
+    def test_cjk_synonyms_split_for_search(self, tmp_path):
+        invalidate_cache()
+        kb_root = _make_kb(
+            tmp_path,
+            [
+                {
+                    "id": "experience-list-001",
+                    "name": "大列表虚拟滚动",
+                    "triggers": ["windowing"],
+                    "content": {"description": "长列表只渲染可见区域"},
+                },
+            ],
+        )
+        # "virtualization" expands to 列表 / 大列表 via the synonym map
+        results = search("virtualization", kb_root, top_k=5)
+        assert results and results[0][0] == "experience-list-001"
+
+
+class TestParallelBuild:
+    """Process-pool index build must match the serial build."""
+
+    def _entries(self, n):
+        topics = ["react hooks", "跨域请求", "数据库性能", "docker 部署", "pytest fixtures"]
+        return [
+            {
+                "id": f"exp-{i:03d}",
+                "name": f"{topics[i % len(topics)]} note {i}",
+                "triggers": [topics[i % len(topics)].split()[0]],
+                "content": {"description": f"entry {i} about {topics[(i * 3) % len(topics)]}",
+                            "pitfalls": [f"pitfall {i}"]},
+            }
+            for i in range(n)
+        ]
+
+    def test_parallel_matches_serial(self, tmp_path, monkeypatch):
+        kb_root = _make_kb(tmp_path, self._entries(40))
+
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_BUILD", False)
+        entries, ids, texts, fields, stats = _load_entries(kb_root)
+        assert stats is None
+        serial = BM25Index(texts, ids, fields)
+
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_BUILD", True)
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_MIN_DOCS", 10)
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_WORKERS", 2)
+        p_entries, p_ids, p_texts, p_fields, p_stats = _load_entries(kb_root)
+        assert p_stats is not None and len(p_stats) == 40
+        assert p_ids == ids
+        assert p_entries == entries
+        parallel = BM25Index(p_texts, p_ids, p_fields, p_stats)
+
+        for query in (["react"], _bm25_tokenize("跨域请求"), ["pitfall", "docker"]):
+            assert parallel.search(query, top_k=10) == serial.search(query, top_k=10)
+
+    def test_below_threshold_stays_serial(self, tmp_path, monkeypatch):
+        kb_root = _make_kb(tmp_path, self._entries(5))
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_MIN_DOCS", 10)
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_WORKERS", 2)
+        assert _load_entries(kb_root)[4] is None
+
+    def test_pool_failure_falls_back_to_serial(self, tmp_path, monkeypatch):
+        kb_root = _make_kb(tmp_path, self._entries(12))
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_MIN_DOCS", 10)
+        monkeypatch.setattr(embedding, "BM25_PARALLEL_WORKERS", 2)
+        monkeypatch.setattr(embedding, "_run_in_pool", lambda func, items: None)
+        entries, ids, texts, fields, stats = _load_entries(kb_root)
+        assert stats is None
+        assert len(ids) == 12
+
+
+class TestFederatedSearch:
+    """Several KB roots ranked together with merged corpus statistics."""
+
+    def _roots(self, tmp_path):
+        project_kb = _make_kb(tmp_path / "project" / ".opencode", [
+            {"id": "exp-p1", "name": "redis cache warmup", "triggers": ["redis"]},
+            {"id": "exp-p2", "name": "redis key naming", "triggers": ["redis"]},
+        ])
+        global_entries = [
+            {"id": f"exp-g{i}", "name": f"react component note {i}", "triggers": ["react"]}
+            for i in range(8)
+        ]
+        global_entries.append(
+            {"id": "exp-g-redis", "name": "redis connection pool", "triggers": ["redis"]}
+        )
+        global_kb = _make_kb(tmp_path / "global", global_entries)
+        return project_kb, global_kb
+
+    def test_merged_idf_sums_counts(self, tmp_path):
+        project_kb, global_kb = self._roots(tmp_path)
+        p_index = build_index(project_kb)[0]
+        g_index = build_index(global_kb)[0]
+        idf = merged_idf([p_index, g_index], ["Redis"])
+        assert idf["redis"] == pytest.approx(_idf(11, 3))
+        # Locally every project doc has "redis": merged idf is higher
+        assert idf["redis"] > p_index.field_idf[p_index.term_ids["redis"]]
+
+    def test_hits_from_all_roots(self, tmp_path):
+        project_kb, global_kb = self._roots(tmp_path)
+        hits = federated_search("redis", [project_kb, global_kb], top_k=5)
+        roots = {root for root, _, _ in hits}
+        assert roots == {project_kb, global_kb}
+        assert {doc_id for _, doc_id, _ in hits} == {"exp-p1", "exp-p2", "exp-g-redis"}
+        scores = [score for _, _, score in hits]
+        assert scores == sorted(scores, reverse=True)
+        assert scores[0] == pytest.approx(1.0)
+
+    def test_missing_root_is_skipped(self, tmp_path):
+        _, global_kb = self._roots(tmp_path)
+        hits = federated_search("redis", [tmp_path / "nope", global_kb], top_k=5)
+        assert [doc_id for _, doc_id, _ in hits] == ["exp-g-redis"]
+
+    def test_trigger_ranks_project_and_global_together(self, tmp_path, monkeypatch):
+        import trigger
+        project_kb, global_kb = self._roots(tmp_path)
+        monkeypatch.setattr(trigger, "get_kb_root", lambda: global_kb)
+        result = trigger.trigger_knowledge(
+            user_input="redis", project_dir=str(tmp_path / "project"), mode="semantic"
+        )
+        knowledge = result["knowledge"]
+        assert {e["id"] for e in knowledge["project_local"]} == {"exp-p1", "exp-p2"}
+        global_ids = {e["id"] for e in knowledge["high_relevance"] + knowledge["medium_relevance"]}
+        assert global_ids == {"exp-g-redis"}
+
+
+    @pytest.mark.parametrize("mode", ["semantic", "hybrid"])
+    @pytest.mark.parametrize("deadline_ms", [None, 60000])
+    def test_project_entry_found_via_detected_tech(self, tmp_path, monkeypatch, mode, deadline_ms):
+        import trigger
+        project_kb, global_kb = self._roots(tmp_path)
+        (tmp_path / "project" / "package.json").write_text('{"dependencies": {"react": "18"}}')
+        with open(project_kb / "experiences" / "exp-p-react.json", "w") as f:
+            json.dump({"id": "exp-p-react", "name": "memo heavy lists", "triggers": ["react"]}, f)
+        index = json.loads((project_kb / "index.json").read_text())
+        index["trigger_index"]["react"] = ["exp-p-react"]
+        (project_kb / "index.json").write_text(json.dumps(index))
+        monkeypatch.setattr(trigger, "get_kb_root", lambda: global_kb)
+
+        result = trigger.trigger_knowledge(
+            user_input="页面卡顿怎么办", project_dir=str(tmp_path / "project"),
+            mode=mode, deadline_ms=deadline_ms,
+        )
+        assert "react" in result["triggers_used"]
+        assert [e["id"] for e in result["knowledge"]["project_local"]] == ["exp-p-react"]
@@ -4,6 +4,8 @@ Tests for knowledge fuzzy matching.
 """
 
 import json
+import re
+import subprocess
 import tempfile
 from pathlib import Path
 
@@ -329,3 +331,46 @@ class TestTokenize:
         """中英文混合内容"""
         tokens = tokenize("React 渲染 hooks")
         assert len(tokens) >= 2
+
+
+class TestLazyJieba:
+    """jieba 延迟加载 + KB 目录词典缓存"""
+
+    def test_import_does_not_load_jieba(self):
+        """导入 query 不加载 jieba（推迟到首次分词）"""
+        code = "import sys, query; print('jieba' in sys.modules, query._jieba is None)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             cwd=str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'),
+                             check=True).stdout.split()
+        assert out == ["False", "True"]
+
+    @pytest.mark.skipif(not HAS_JIEBA, reason="requires jieba")
+    @pytest.mark.parametrize("text", [
+        "C++ memory leak", "C# async", "c++11 build", "fix C++ 内存泄漏",
+        "React useEffect 3.5% node.js", "reactor dockerfile", "x86_64 __init__ AT&T",
+    ])
+    def test_ascii_matches_jieba(self, text):
+        """英文文本与含中文文本走同一 jieba 切分，c++ / c# 不被拆开"""
+        import query
+
+        expected = [t for t in query._get_jieba().lcut(text)
+                    if t.strip() and re.search(r"[\w\u4e00-\u9fff]", t)]
+        assert tokenize(text) == expected
+
+    @pytest.mark.skipif(not HAS_JIEBA, reason="requires jieba")
+    def test_dictionary_cached_in_kb_root(self, tmp_path, monkeypatch):
+        """首次加载写入 KB 目录缓存，之后直接从缓存载入且包含技术词典"""
+        import jieba
+        import query
+
+        monkeypatch.setattr(query, "get_kb_root", lambda: tmp_path)
+        monkeypatch.setattr(query, "_jieba", None)
+        monkeypatch.setattr(jieba.dt, "initialized", False)
+        query._get_jieba()
+        assert (tmp_path / query.JIEBA_CACHE_FILE).exists()
+
+        monkeypatch.setattr(query, "_jieba", None)
+        monkeypatch.setattr(jieba.dt, "initialized", False)
+        monkeypatch.setattr(jieba, "initialize", lambda *a: pytest.fail("dictionary rebuilt"))
+        query.clear_memo()
+        assert "虚拟列表" in tokenize("优化虚拟列表滚动")
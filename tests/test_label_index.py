@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the scenario / problem secondary indexes in index.json and the
+trigger_knowledge by_category lookups that use them.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts'))
+
+import query
+import trigger
+from store import store_knowledge, store_problem, store_scenario
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    kb_root = tmp_path / 'knowledge'
+    kb_root.mkdir()
+    monkeypatch.setenv('KNOWLEDGE_BASE_PATH', str(kb_root))
+    store_problem('CORS preflight fails', symptoms=['blocked by cors'], root_causes=['no header'],
+                  solutions=[{'approach': 'add Access-Control-Allow-Origin'}],
+                  triggers=['cors', '跨域'], kb_root=kb_root)
+    store_problem('Memory leak in worker', symptoms=['oom'], root_causes=['cache'],
+                  solutions=[{'approach': 'bound the cache'}], triggers=['memory', 'leak'],
+                  kb_root=kb_root)
+    store_scenario('Login with JWT', description='token auth', typical_approach='jwt',
+                   triggers=['login', 'jwt'], kb_root=kb_root)
+    return kb_root
+
+
+def _index(kb_root):
+    return json.loads((kb_root / 'index.json').read_text(encoding='utf-8'))
+
+
+def test_store_populates_label_indexes(kb):
+    index = _index(kb)
+    assert len(index['problem_index']['cors']) == 1
+    assert len(index['problem_index']['memory']) == 1
+    assert len(index['scenario_index']['auth']) == 1
+    assert all(eid.startswith('problem-') for ids in index['problem_index'].values() for eid in ids)
+
+
+def test_relabel_on_update(kb):
+    entry_id = _index(kb)['problem_index']['memory'][0]
+    store_knowledge('problem', 'Worker hangs', {'symptoms': ['hangs']},
+                    triggers=['timeout'], entry_id=entry_id, kb_root=kb)
+    index = _index(kb)
+    assert 'memory' not in index['problem_index']
+    assert entry_id in index['problem_index']['timeout']
+
+
+def test_by_category_uses_labels_without_scanning(kb, monkeypatch):
+    monkeypatch.setattr(query, 'query_by_category',
+                        lambda *a, **k: pytest.fail('category directory scanned'))
+    monkeypatch.setattr(trigger, 'query_by_category',
+                        lambda *a, **k: pytest.fail('category directory scanned'))
+    result = trigger.trigger_knowledge(user_input='修复跨域 cors 报错', mode='keyword')
+    by_category = result['knowledge']['by_category']
+    assert [e['name'] for e in by_category['problem:cors']] == ['CORS preflight fails']
+    assert 'problem:memory' not in by_category
+
+
+def test_legacy_index_falls_back(kb):
+    index = _index(kb)
+    del index['problem_index'], index['scenario_index']
+    (kb / 'index.json').write_text(json.dumps(index), encoding='utf-8')
+    assert query.query_by_label('problem', 'cors') is None
+    result = trigger.trigger_knowledge(user_input='cors 跨域', mode='keyword')
+    assert result['knowledge']['by_category']['problem:cors']
+
+
+def test_first_store_on_legacy_index_backfills(kb):
+    index = _index(kb)
+    del index['problem_index'], index['scenario_index']
+    (kb / 'index.json').write_text(json.dumps(index), encoding='utf-8')
+
+    store_problem('Disk full on build agent', symptoms=['no space left'], root_causes=['logs'],
+                  solutions=[{'approach': 'rotate logs'}], triggers=['disk'], kb_root=kb)
+
+    index = _index(kb)
+    assert len(index['problem_index']['cors']) == 1
+    assert len(index['problem_index']['memory']) == 1
+    assert 'scenario_index' not in index
+    result = trigger.trigger_knowledge(user_input='cors 跨域', mode='keyword')
+    assert [e['name'] for e in result['knowledge']['by_category']['problem:cors']] == \
+        ['CORS preflight fails']
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for batch querying: query_many / trigger_knowledge_many and the
+--batch NDJSON stream mode of query.py and trigger.py.
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+import query
+import trigger
+from query import batch_cache, execute_query, load_json, query_many
+
+
+@pytest.fixture
+def kb(make_kb):
+    return make_kb({
+        "experiences": [
+            {"id": "experience-cors-1", "name": "修复跨域请求问题", "triggers": ["cors", "跨域"],
+             "content": {"solution": "use the dev proxy"}, "effectiveness": 0.8},
+            {"id": "experience-docker-1", "name": "Docker image too large",
+             "triggers": ["docker"], "content": {"solution": "multi-stage build"},
+             "effectiveness": 0.7},
+        ],
+        "problems": [
+            {"id": "problem-redis-1", "name": "Redis memory full", "triggers": ["redis"],
+             "tags": ["cache"], "content": {"solution": "set maxmemory-policy"}},
+        ],
+    })
+
+
+class TestBatchCache:
+
+    def test_file_read_once_per_batch(self, kb, monkeypatch):
+        reads = []
+        real_read = query._read_json
+        monkeypatch.setattr(query, "_read_json", lambda p: reads.append(p) or real_read(p))
+
+        with batch_cache():
+            for _ in range(3):
+                query.query_by_triggers(["cors"])
+        assert reads.count(kb / "index.json") == 1
+
+        reads.clear()
+        query.query_by_triggers(["cors"])
+        query.query_by_triggers(["cors"])
+        assert reads.count(kb / "index.json") == 2
+
+    def test_loaded_entries_are_copies(self, kb):
+        path = kb / "experiences" / "experience-cors-1.json"
+        with batch_cache():
+            first = load_json(path)
+            first["_match_score"] = 3
+            assert "_match_score" not in load_json(path)
+
+    def test_usage_write_drops_memo(self, kb):
+        path = kb / "experiences" / "experience-cors-1.json"
+        with batch_cache():
+            entry = load_json(path)
+            query.update_usage(path, entry)
+            assert load_json(path)["usage_count"] == 1
+
+
+class TestQueryMany:
+
+    def test_results_match_single_queries(self, kb):
+        specs = [
+            {"trigger": "cors"},
+            {"trigger": ["docker"], "mode": "semantic", "limit": 1},
+            {"category": "problem"},
+            {"tags": "cache"},
+            {"id": "experience-docker-1"},
+        ]
+        batch = query_many(specs)
+        single = [execute_query(spec) for spec in specs]
+        assert json.loads(json.dumps(batch, default=str)) == json.loads(json.dumps(single, default=str))
+        assert batch[0][0]["id"] == "experience-cors-1"
+        assert batch[4]["name"] == "Docker image too large"
+
+    def test_missing_id_is_none(self, kb):
+        assert query_many([{"id": "nope"}]) == [None]
+
+
+class TestNdjsonStream:
+
+    def test_query_stream(self, kb):
+        lines = ['{"trigger": "cors", "ref": "a"}', "", "not json", '{"id": "problem-redis-1"}']
+        out = io.StringIO()
+        failures = query.run_batch(lines, out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        assert failures == 1
+        assert [r["index"] for r in records] == [0, 1, 2]
+        assert records[0]["ref"] == "a"
+        assert records[0]["result"][0]["id"] == "experience-cors-1"
+        assert records[1]["ok"] is False
+        assert records[2]["result"]["id"] == "problem-redis-1"
+
+    def test_trigger_stream(self, kb):
+        lines = [
+            json.dumps({"input": "跨域 cors", "mode": "keyword"}),
+            json.dumps({"trigger": "docker", "mode": "keyword", "format": "triggers"}),
+            json.dumps({"mode": "keyword"}),
+        ]
+        out = io.StringIO()
+        failures = trigger.run_batch(lines, out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        assert failures == 1
+        names = [e["name"] for e in records[0]["result"]["knowledge"]["high_relevance"]
+                 + records[0]["result"]["knowledge"]["medium_relevance"]]
+        assert "修复跨域请求问题" in names
+        assert "docker" in records[1]["output"].split(",")
+        assert records[2]["ok"] is False
+
+
+class TestTriggerMany:
+
+    def test_project_detected_once(self, kb, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(trigger, "detect_project_tech",
+                            lambda d: calls.append(d) or {"base_tech": [], "frameworks": [],
+                                                          "tools": []})
+        results = trigger.trigger_knowledge_many([
+            {"user_input": "cors", "project_dir": str(tmp_path), "mode": "keyword"},
+            {"user_input": "docker", "project_dir": str(tmp_path), "mode": "keyword"},
+        ])
+        assert len(results) == 2
+        assert calls == [str(tmp_path)]
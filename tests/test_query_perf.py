@@ -69,6 +69,34 @@ class TestSynonymExpansionCap:
         assert len(lower_expanded) == len(set(lower_expanded))
 
 
+class TestMemo:
+    """Bounded memo for tokenize() / expand_with_synonyms()."""
+
+    def test_tokenize_memo_hits(self):
+        from knowledge import query
+        query.clear_memo()
+        first = query.tokenize("react hooks 渲染")
+        first.append("mutated")
+        assert query.tokenize("react hooks 渲染") == first[:-1]
+        stats = query.memo_stats()["tokenize"]
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_long_text_not_memoized(self):
+        from knowledge import query
+        query.clear_memo()
+        query.tokenize("word " * query.TOKENIZE_CACHE_MAX_CHARS)
+        assert query.memo_stats()["tokenize"]["size"] == 0
+
+    def test_synonym_memo_and_stats(self):
+        from knowledge import query
+        query.clear_memo()
+        a = expand_with_synonyms(["CORS", "跨域"], max_expansions=2)
+        b = expand_with_synonyms(["CORS", "跨域"], max_expansions=2)
+        assert a == b == ["CORS", "跨域", "cross-origin"]
+        assert query.memo_stats()["synonyms"]["hit_rate"] == 0.5
+        assert "memo" in query.get_stats()
+
+
 class TestTriggerCap:
     """Test trigger cap optimization."""
 
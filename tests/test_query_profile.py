@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for query profiling / explain mode (query.profiling, trigger.explain_trigger,
+--explain on query.py and trigger.py).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+import query
+import trigger
+from query import compute_relevance, explain_relevance, profiling
+
+
+@pytest.fixture
+def kb(make_kb):
+    return make_kb([
+        {"id": "experience-cors-1", "name": "修复跨域请求问题", "triggers": ["cors", "跨域"],
+         "content": {"solution": "use the dev proxy"}, "effectiveness": 0.8},
+        {"id": "experience-docker-1", "name": "Docker image too large",
+         "triggers": ["docker"], "content": {"solution": "multi-stage build"}},
+    ])
+
+
+class TestProfile:
+
+    def test_keyword_stages_and_counters(self, kb):
+        with profiling() as profile:
+            results = query.query_by_triggers(["cors"], use_synonyms=False)
+        report = profile.to_dict()
+
+        stages = report["stages"]
+        for name in ("keyword.index_load", "keyword.exact", "keyword.partial",
+                     "keyword.fuzzy", "keyword.entry_load", "keyword.relevance"):
+            assert name in stages
+        assert stages["keyword.exact"]["candidates"] == 1
+        assert stages["keyword.entry_load"]["candidates"] == len(results) == 1
+        assert report["counters"]["files_opened"] == 2  # index.json + one entry
+        assert report["counters"]["bytes_read"] > 0
+
+        [score] = report["scores"]
+        assert score["id"] == "experience-cors-1"
+        assert score["score"] == pytest.approx(results[0]["_relevance_score"])
+        assert set(score["weights"]) == {"trigger_match", "effectiveness", "recency", "usage"}
+
+    def test_fuzzy_stage_recorded_without_matches(self, kb):
+        with profiling() as profile:
+            assert query.query_by_triggers(["zzqx"], use_synonyms=False) == []
+        fuzzy = profile.to_dict()["stages"]["keyword.fuzzy"]
+        assert fuzzy["candidates"] == 0
+        assert fuzzy["comparisons"] == 3  # one query trigger x three indexed triggers
+        assert fuzzy["calls"] >= 1
+
+    def test_inactive_outside_context(self, kb):
+        with profiling():
+            pass
+        assert query._profile is None
+        query.query_by_triggers(["cors"])
+
+    def test_nested_profiling_shares_outer(self):
+        with profiling() as outer:
+            with profiling() as inner:
+                assert inner is outer
+
+
+class TestExplainRelevance:
+
+    def test_matches_compute_relevance(self):
+        entry = {"_match_score": 2, "effectiveness": 0.9, "usage_count": 30}
+        breakdown = explain_relevance(entry, ["x"])
+        assert breakdown["score"] == compute_relevance(entry, ["x"])
+        assert breakdown["usage"] == pytest.approx(0.3)
+
+    def test_zero_match_keyword_entry_gated(self):
+        assert explain_relevance({"_match_score": 0, "effectiveness": 1.0}, []) == {
+            "score": 0.0, "gated": True, "match": 0.0}
+
+
+class TestExplainCli:
+
+    def test_trigger_explain(self, kb, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "argv", ["trigger.py", "-i", "cors 跨域", "-m", "keyword",
+                                          "--explain"])
+        trigger.main()
+        payload = json.loads(capsys.readouterr().out)
+        assert payload["result"]["knowledge"]["high_relevance"][0]["id"] == "experience-cors-1"
+        assert "trigger.search" in payload["profile"]["stages"]
+        assert payload["profile"]["scores"]
+
+    def test_query_profile_alias(self, kb, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "argv", ["query.py", "--trigger", "docker", "--profile"])
+        query.main()
+        payload = json.loads(capsys.readouterr().out)
+        assert payload["result"][0]["id"] == "experience-docker-1"
+        assert payload["profile"]["total_ms"] >= 0
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the rendered-context cache behind trigger.format_for_context.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts"))
+
+import trigger
+
+
+def _entry(entry_id, solution, updated_at="2026-01-01T00:00:00"):
+    return {"id": entry_id, "name": entry_id, "category": "experience",
+            "updated_at": updated_at, "content": {"solution": solution}}
+
+
+def _result(*entries):
+    return {"knowledge": {"high_relevance": list(entries)}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    trigger.clear_render_cache()
+    yield
+    trigger.clear_render_cache()
+
+
+def test_blocks_reused_until_entry_updated(monkeypatch):
+    calls = []
+    original = trigger._format_entry
+    monkeypatch.setattr(trigger, "_format_entry",
+                        lambda content, limit: calls.append(limit) or original(content, limit))
+
+    first = trigger.format_for_context(_result(_entry("e1", "use a proxy")))
+    assert trigger.format_for_context(_result(_entry("e1", "use a proxy"))) == first
+    assert len(calls) == 1
+
+    updated = trigger.format_for_context(
+        _result(_entry("e1", "use CORS headers", updated_at="2026-02-01T00:00:00")))
+    assert "use CORS headers" in updated
+    assert len(calls) == 2
+
+    # A different budget (two entries share the section) renders again
+    trigger.format_for_context(_result(_entry("e1", "use a proxy"), _entry("e2", "x")))
+    assert len(calls) == 4
+
+
+def test_persisted_in_kb(tmp_path, monkeypatch):
+    monkeypatch.setattr(trigger, "RENDER_CACHE_PERSIST", True)
+    monkeypatch.setattr(trigger, "get_kb_root", lambda: tmp_path)
+    text = trigger.format_for_context(_result(_entry("e1", "use a proxy")))
+    assert (tmp_path / trigger.RENDER_CACHE_FILE).exists()
+
+    trigger.clear_render_cache()
+    monkeypatch.setattr(trigger, "_format_entry", lambda content, limit: ["unused"])
+    assert trigger.format_for_context(_result(_entry("e1", "use a proxy"))) == text
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the precompiled summarizer extraction engine (scan_patterns).
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+
+import summarizer
+from summarizer import extract_knowledge_from_text, scan_patterns, validate_input
+
+
+SINGLE_LINE_SAMPLES = [
+    "问题：登录失败 → 解决：检查token是否过期",
+    "问题：接口超时。原因是连接池太小，解决方案：增大到 20。",
+    "遇到 timeout 错误，最终通过增加索引解决",
+    "error: connection refused fixed by restarting redis",
+    "修复了空指针，原因是未判空",
+    "教训：没有压测就上线 → 避免：发布前跑基准",
+    "决策：使用PostgreSQL → 原因：需要事务支持",
+    "建议：以后所有慢查询都先 explain",
+    "注意：修改后需要重启服务",
+    "这个项目都使用 pnpm 管理依赖",
+    "我们应该在 CI 里加上类型检查，",
+    "不要在循环里开事务。",
+]
+
+
+def _reference(text):
+    """Plain re.findall per pattern — what scan_patterns must agree with on single lines."""
+    return {family: [re.findall(p, text, re.IGNORECASE | re.DOTALL) for p in patterns]
+            for family, patterns in summarizer.EXTRACTION_PATTERNS.items()}
+
+
+class TestScanPatterns:
+
+    @pytest.mark.parametrize("text", SINGLE_LINE_SAMPLES)
+    def test_single_line_matches_findall(self, text):
+        assert scan_patterns(text) == _reference(text)
+
+    def test_every_pattern_has_a_rule(self):
+        found = scan_patterns("")
+        for family, patterns in summarizer.EXTRACTION_PATTERNS.items():
+            assert len(found[family]) == len(patterns)
+
+    def test_matches_do_not_cross_lines(self):
+        text = "教训：忘记关闭句柄\n后来才发现 → 避免：使用 with"
+        assert scan_patterns(text)['lesson'][0] == []
+
+    def test_value_may_start_on_next_line(self):
+        assert scan_patterns("问题：超时 → 解决：\n  增大连接池")['problem_solution'][0] == \
+            [('超时', '增大连接池')]
+        assert scan_patterns("注意：\n  先备份")['gotcha'][0] == ['先备份']
+
+    def test_problem_solution_window_spans_lines(self):
+        text = "问题：接口超时\n原因：连接池太小\n解决：增大到 20\n"
+        assert scan_patterns(text)['problem_solution'][1] == [('接口超时', '增大到 20')]
+
+    def test_unterminated_heads_are_linear(self):
+        line = "问题：遇到错误 通过 修复了 error 这个项目 " * 2000
+        start = time.perf_counter()
+        extract_knowledge_from_text(line)
+        validate_input(line)
+        assert time.perf_counter() - start < 2.0
+
+
+class TestValidateInputEquivalence:
+
+    @pytest.mark.parametrize("text", [
+        "问题：登录失败 → 解决：检查token",
+        "问题：登录失败\n→ 解决：检查token",
+        "决策：用 PG\n\n→ 原因：事务",
+        "只是普通的一段聊天记录",
+    ])
+    def test_same_as_format_patterns(self, text):
+        expected = any(re.search(p, text, re.DOTALL) for p, _ in summarizer.FORMAT_PATTERNS)
+        assert (validate_input(text) == (True, text)) is expected
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming summarizer (summarize_stream) and its checkpoints.
+"""
+
+import io
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts' / 'knowledge'))
+
+import summarizer
+from summarizer import checkpoint_path, summarize_stream
+
+
+LINES = [
+    "问题：登录接口偶发超时 → 解决：把连接池调大到 50",
+    "问题：部署后页面空白",
+    "原因：静态资源路径配置错误",
+    "解决：修改 publicPath 为相对路径",
+    "注意：",
+    "  上线前先备份数据库",
+    "教训：没有压测就上线 → 避免：发布前跑基准测试",
+    "这个项目都使用 pnpm 管理依赖",
+    "log: GET /api/users 200 12ms via redis",
+    "",
+]
+
+
+def _log(repeat=20):
+    return ("\n".join(LINES * repeat) + "\n").encode("utf-8")
+
+
+def _names(result):
+    return Counter((e["type"], e["name"]) for e in result["extracted"])
+
+
+class _Pipe:
+    """Non-seekable stream (stdin)."""
+
+    def __init__(self, data):
+        self._buf = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._buf.read(size)
+
+    def seekable(self):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def kb(tmp_path, monkeypatch):
+    monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path / "knowledge"))
+    return tmp_path / "knowledge"
+
+
+def _whole(data):
+    found = summarizer.scan_patterns(data.decode("utf-8"))
+    return Counter((e["type"], e["name"]) for e in summarizer._knowledge_from_matches(found))
+
+
+@pytest.mark.parametrize("window_bytes", [1, 64, 1024, 1 << 20])
+def test_windows_match_whole_text_scan(window_bytes):
+    data = _log()
+    result = summarize_stream(io.BytesIO(data), window_bytes=window_bytes)
+    assert _names(result) == _whole(data)
+    assert result["tech_stack"] == ["redis"]
+    assert result["stream"] == {"resumed": False, "start_offset": 0, "end_offset": len(data),
+                                "windows": result["stream"]["windows"], "checkpoint": None}
+
+
+def test_rerun_only_processes_appended_tail(kb):
+    data = _log()
+    first = summarize_stream(io.BytesIO(data), session_id="s1", window_bytes=256)
+    assert checkpoint_path("s1").exists()
+    assert checkpoint_path("s1").parent == kb / summarizer.SUMMARIZER_CHECKPOINT_DIR
+
+    unchanged = summarize_stream(io.BytesIO(data), session_id="s1", window_bytes=256)
+    assert unchanged["stream"]["resumed"] is True
+    assert unchanged["stream"]["start_offset"] > 0
+    assert unchanged["extracted"] == []
+
+    appended = data + "决策：使用 PostgreSQL → 原因：需要事务支持\n".encode("utf-8")
+    second = summarize_stream(io.BytesIO(appended), session_id="s1", window_bytes=256)
+    assert [e["name"] for e in second["extracted"]] == ["使用 PostgreSQL"]
+    assert _names(first) + _names(second) == _whole(appended)
+
+
+def test_match_completed_by_appended_line():
+    summarize_stream(io.BytesIO("注意：\n".encode("utf-8")), session_id="s2")
+    result = summarize_stream(io.BytesIO("注意：\n  先备份数据库再迁移\n".encode("utf-8")),
+                              session_id="s2")
+    assert [e["name"] for e in result["extracted"]] == ["先备份数据库再迁移"]
+
+
+def test_pipe_input_resumes_from_checkpoint():
+    data = _log(5)
+    summarize_stream(_Pipe(data), session_id="s3", window_bytes=128)
+    appended = data + "教训：忘记关闭文件句柄 → 避免：使用 with 语句\n".encode("utf-8")
+    result = summarize_stream(_Pipe(appended), session_id="s3", window_bytes=128)
+    assert result["stream"]["resumed"] is True
+    assert [e["name"] for e in result["extracted"]] == ["忘记关闭文件句柄"]
+
+
+@pytest.mark.parametrize("make_stream", [io.BytesIO, _Pipe])
+def test_rewritten_log_starts_over(make_stream):
+    summarize_stream(make_stream(_log(3)), session_id="s4", window_bytes=128)
+    rewritten = _log(3).replace("登录".encode("utf-8"), "注册".encode("utf-8"))
+    result = summarize_stream(make_stream(rewritten), session_id="s4", window_bytes=128)
+    assert result["stream"]["resumed"] is False
+    assert _names(result) == _whole(rewritten)
+
+
+def test_from_start_ignores_checkpoint():
+    data = _log(2)
+    first = summarize_stream(io.BytesIO(data), session_id="s5")
+    again = summarize_stream(io.BytesIO(data), session_id="s5", resume=False)
+    assert again["stream"]["resumed"] is False
+    assert _names(again) == _names(first)
+
+
+def test_corrupt_checkpoint_is_ignored():
+    path = checkpoint_path("s6")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"session_id": "s6", "offset": "x"}), encoding="utf-8")
+    result = summarize_stream(io.BytesIO(_log(1)), session_id="s6")
+    assert result["stream"]["resumed"] is False
+    assert json.loads(path.read_text(encoding="utf-8"))["length"] == len(_log(1))
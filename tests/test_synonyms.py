@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled synonym dictionary (query.SynonymGraph) and the
+KB-level synonyms.json override.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge")
+)
+
+import query
+from query import SynonymGraph, expand_with_synonyms, get_synonym_graph
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    monkeypatch.setattr(query, "get_kb_root", lambda: tmp_path)
+    query.clear_memo()
+    yield tmp_path
+    query.clear_memo()
+
+
+def _write(kb_root, data):
+    path = kb_root / query.SYNONYMS_FILE
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+class TestSynonymGraph:
+
+    def test_ids_and_lowercase_lookup(self):
+        graph = SynonymGraph.compile({"K8s": ["Kubernetes", "pod"]})
+        assert graph.neighbors("k8s") == [("Kubernetes", "kubernetes"), ("pod", "pod")]
+        assert graph.neighbors("unknown") == []
+
+    def test_groups_are_mutual(self):
+        graph = SynonymGraph.compile({}, groups=[["pg", "postgres", "postgresql"]])
+        assert [s for s, _ in graph.neighbors("postgresql")] == ["pg", "postgres"]
+
+    def test_closure_depth_and_cap(self):
+        mapping = {"a": ["b"], "b": ["c", "d"], "c": ["e"]}
+        one_hop = SynonymGraph.compile(mapping)
+        assert [s for s, _ in one_hop.neighbors("a")] == ["b"]
+
+        closed = SynonymGraph.compile(mapping, depth=3)
+        assert [s for s, _ in closed.neighbors("a")] == ["b", "c", "d", "e"]
+
+        capped = SynonymGraph.compile(mapping, depth=3, max_neighbors=2)
+        assert [s for s, _ in capped.neighbors("a")] == ["b", "c"]
+
+
+class TestSynonymsFile:
+
+    def test_builtin_without_file(self, kb):
+        assert get_synonym_graph().stats()["source"] == "builtin"
+        assert "cross-origin" in expand_with_synonyms(["cors"])
+
+    def test_file_extends_builtin(self, kb):
+        _write(kb, {"k8s": ["kubernetes", "容器编排"]})
+        assert expand_with_synonyms(["k8s"]) == ["k8s", "kubernetes", "容器编排"]
+        assert "cross-origin" in expand_with_synonyms(["cors"])
+
+    def test_extend_false_replaces_builtin(self, kb):
+        _write(kb, {"extend": False, "groups": [["pg", "postgres"]]})
+        assert expand_with_synonyms(["cors"]) == ["cors"]
+        assert expand_with_synonyms(["pg"]) == ["pg", "postgres"]
+
+    def test_closure_depth_from_file(self, kb):
+        _write(kb, {"extend": False, "closure_depth": 2,
+                    "map": {"a": ["b"], "b": ["c"]}})
+        assert expand_with_synonyms(["a"]) == ["a", "b", "c"]
+
+    def test_recompiled_when_file_changes(self, kb):
+        path = _write(kb, {"k8s": ["kubernetes"]})
+        first = get_synonym_graph()
+        assert get_synonym_graph() is first
+        assert expand_with_synonyms(["k8s"]) == ["k8s", "kubernetes"]
+
+        _write(kb, {"k8s": ["kubernetes", "helm"]})
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert get_synonym_graph() is not first
+        assert expand_with_synonyms(["k8s"]) == ["k8s", "kubernetes", "helm"]
+
+    def test_invalid_file_falls_back_to_builtin(self, kb, capsys):
+        (kb / query.SYNONYMS_FILE).write_text("{not json", encoding="utf-8")
+        assert "cross-origin" in expand_with_synonyms(["cors"])
+        assert "ignoring" in capsys.readouterr().err
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for core.tracing: EVOLVING_TRACE spans, the @traced decorator and
+per-operation p50/p95/p99 aggregation.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'evolving-agent' / 'scripts'))
+
+from core import tracing
+from core.task_manager import create_task, init_feature_list, transition
+from core.tracing import aggregate, load_spans, span, trace_count, trace_set, traced
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(tracing.TRACE_ENV_VAR, str(path))
+    return path
+
+
+class TestSpans:
+
+    def test_disabled_is_noop(self, tmp_path, monkeypatch):
+        monkeypatch.delenv(tracing.TRACE_ENV_VAR, raising=False)
+        with span("op") as current:
+            current.count("x")
+            trace_count("y")
+        assert not tracing.is_enabled()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_nested_span_records_parent_and_counters(self, trace_file):
+        @traced("inner")
+        def inner():
+            trace_count("items", 3)
+            trace_set("kind", "test")
+
+        with span("outer", action="run"):
+            inner()
+            inner()
+
+        records = load_spans(trace_file)
+        assert [r["name"] for r in records] == ["inner", "inner", "outer"]
+        assert records[0]["parent"] == "outer"
+        assert records[0]["counters"] == {"items": 3}
+        assert records[0]["attrs"] == {"kind": "test"}
+        assert records[2]["parent"] is None
+        assert records[2]["attrs"] == {"action": "run"}
+
+    def test_error_recorded_and_reraised(self, trace_file):
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        [record] = load_spans(trace_file)
+        assert record["ok"] is False
+        assert record["error"] == "ValueError"
+
+    def test_task_transition_traced(self, tmp_path, trace_file):
+        init_feature_list(tmp_path, "demo")
+        task = create_task(tmp_path, "Trace me")
+        transition(tmp_path, task["id"], "in_progress")
+
+        [record] = [r for r in load_spans(trace_file) if r["name"] == "task.transition"]
+        assert record["attrs"] == {"from": "pending", "to": "in_progress"}
+
+
+class TestAggregate:
+
+    def test_percentiles_per_operation(self):
+        records = [{"name": "a", "ms": float(ms)} for ms in range(1, 101)]
+        records.append({"name": "b", "ms": 5.0, "ok": False, "counters": {"n": 2}})
+        summary = aggregate(records)
+
+        assert summary["a"]["count"] == 100
+        assert summary["a"]["p50"] == pytest.approx(50.5)
+        assert summary["a"]["p95"] == pytest.approx(95.05)
+        assert summary["a"]["p99"] == pytest.approx(99.01)
+        assert summary["b"]["errors"] == 1
+        assert summary["b"]["counters"] == {"n": 2}
+        assert list(aggregate(records, prefix="b")) == ["b"]
+
+    def test_report_skips_malformed_lines(self, tmp_path, capsys):
+        path = tmp_path / "trace.jsonl"
+        path.write_text('{"name": "op", "ms": 2}\nnot json\n{"name": "op", "ms": 4}\n',
+                        encoding="utf-8")
+        assert tracing.main(["report", "--file", str(path), "--json"]) == 0
+        summary = json.loads(capsys.readouterr().out)
+        assert summary["op"]["count"] == 2
+        assert summary["op"]["p50"] == 3.0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for latency-budgeted triggering (trigger_knowledge(deadline_ms=...)).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts"))
+
+import trigger
+
+
+@pytest.fixture
+def kb(make_kb):
+    return make_kb([
+        {"id": f"experience-{i}", "name": name, "category": "experience", "triggers": [trig],
+         "content": {"solution": name}}
+        for i, (name, trig) in enumerate([("cors proxy", "cors"),
+                                          ("cors preflight", "cors-preflight"),
+                                          ("redis cache", "redis")])
+    ])
+
+
+def test_no_deadline_has_no_report(kb):
+    result = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword")
+    assert "deadline" not in result
+
+
+def test_ample_budget_matches_unbudgeted(kb, result_ids):
+    plain = trigger.trigger_knowledge(user_input="修复 cors 跨域问题", mode="keyword")
+    budgeted = trigger.trigger_knowledge(user_input="修复 cors 跨域问题", mode="keyword",
+                                         deadline_ms=60_000)
+    assert result_ids(budgeted) == result_ids(plain)
+    report = budgeted["deadline"]
+    assert report["completed"] == ["global.exact", "partial", "fuzzy", "category"]
+    assert report["skipped"] == []
+    assert report["deadline_ms"] == 60_000
+
+
+def test_exhausted_budget_keeps_exact_matches(kb, result_ids):
+    result = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", deadline_ms=0)
+    # exact stage always runs; the partial-only match (cors-preflight) is dropped
+    assert result_ids(result) == ["experience-0"]
+    assert result["deadline"]["completed"] == ["global.exact"]
+    assert result["deadline"]["skipped"] == ["partial", "fuzzy"]
+
+
+def test_exhausted_budget_skips_bm25(kb, result_ids):
+    result = trigger.trigger_knowledge(user_input="cors proxy", mode="hybrid", deadline_ms=0)
+    assert result["deadline"]["skipped"][:1] == ["bm25"]
+    assert "experience-0" in result_ids(result)
+
+
+def test_batch_spec_passes_deadline():
+    request = trigger._request_from_spec({"input": "cors", "deadline_ms": 25})
+    assert request["deadline_ms"] == 25
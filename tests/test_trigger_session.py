@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for session-scoped delta triggering (trigger_knowledge(session_id=...)).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts" / "knowledge"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "evolving-agent" / "scripts"))
+
+import session
+import trigger
+
+
+@pytest.fixture
+def kb(make_kb):
+    return make_kb([
+        {"id": f"experience-cors-{i}", "name": name, "category": "experience",
+         "triggers": ["cors"], "updated_at": "2026-01-01T00:00:00", "content": {"solution": name}}
+        for i, name in enumerate(["cors proxy", "cors headers"])
+    ])
+
+
+def test_known_entries_become_references(kb, result_ids):
+    first = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    assert sorted(result_ids(first)) == ["experience-cors-0", "experience-cors-1"]
+    assert first["session"]["new"] == 2
+
+    second = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    assert result_ids(second) == []
+    assert {r["id"] for r in second["knowledge"]["already_delivered"]} == set(result_ids(first))
+    assert "## 已提供（见前文）" in trigger.format_for_context(second)
+
+    # Other sessions are unaffected
+    other = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s2")
+    assert len(result_ids(other)) == 2
+
+
+def test_updated_entry_resent(kb, result_ids):
+    trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    path = kb / "experiences" / "experience-cors-0.json"
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    entry["updated_at"] = "2026-03-01T00:00:00"
+    path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    # store rewrites index.json on every update
+    index_path = kb / "index.json"
+    index_path.write_text(index_path.read_text(encoding="utf-8") + " ", encoding="utf-8")
+
+    result = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    assert result_ids(result) == ["experience-cors-0"]
+    assert result["session"]["changed"] == 1
+
+
+def test_candidate_set_reused(kb, monkeypatch):
+    trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    monkeypatch.setattr(trigger, "query_by_triggers",
+                        lambda *a, **k: pytest.fail("search should come from the session"))
+    result = trigger.trigger_knowledge(explicit_triggers=["cors"], mode="keyword", session_id="s1")
+    assert len(result["knowledge"]["already_delivered"]) == 2
+    assert session.clear_session("s1")